@@ -0,0 +1,175 @@
+"""
+Account lifecycle: reset, delete and export all data of one user.
+
+Reset and delete are atomic.  On PostgreSQL the per-table DELETEs go out
+as one statement (data-modifying CTEs), so a whole reset is a single round
+trip; on SQLite they run one by one inside a transaction on the writer
+thread, where a round trip costs nothing.
+
+Export reads every table through a cursor inside one read-only snapshot
+and yields text chunks, so memory use does not grow with the history.
+"""
+
+import csv
+import io
+import json
+import logging
+from datetime import date, datetime
+
+from bot.backends import POSTGRES, get_dialect
+from bot.database import forget_user, get_pool, read_write
+from bot.services.review_queue import flush_answers, forget_user_queues
+
+logger = logging.getLogger(__name__)
+
+# Learning data: cleared by reset, together with streak and achievements.
+PROGRESS_TABLES = (
+    "progress",
+    "phrases_progress",
+    "grammar_results",
+    "daily_stats",
+    "daily_stats_rollup",
+    "dialogues_progress",
+    "culture_progress",
+    "exercises_progress",
+    "pronunciation_progress",
+    "pronunciation_summary",
+)
+# Everything keyed by user_id; removed before the users row on delete.
+ACCOUNT_TABLES = PROGRESS_TABLES + ("feedback", "placement_responses", "rate_limits")
+EXPORT_TABLES = ("users",) + PROGRESS_TABLES + ("feedback", "placement_responses")
+EXPORT_FORMATS = ("json", "csv")
+
+_EXPORT_PREFETCH = 500
+_CHUNK_SIZE = 64 * 1024
+
+_RESET_USER_SQL = (
+    "UPDATE users SET current_streak = 0, last_active_date = NULL, achievements = '[]' "
+    "WHERE user_id = $1"
+)
+_DELETE_USER_SQL = "DELETE FROM users WHERE user_id = $1"
+
+
+async def _delete_rows(conn, user_id: int, tables: tuple, final_sql: str) -> str:
+    """Delete the user's rows from *tables*, then run *final_sql*; return its status."""
+    if get_dialect(conn) == POSTGRES:
+        ctes = ",\n".join(
+            f"del_{table} AS (DELETE FROM {table} WHERE user_id = $1)" for table in tables
+        )
+        return await conn.execute(f"WITH {ctes}\n{final_sql}", user_id)
+
+    for table in tables:
+        await conn.execute(f"DELETE FROM {table} WHERE user_id = $1", user_id)
+    return await conn.execute(final_sql, user_id)
+
+
+@read_write
+async def reset_account(user_id: int) -> None:
+    """Delete ALL learning progress of a user (irreversible); the account stays."""
+    # Answers still being written would bring rows back after the delete
+    await flush_answers()
+    pool = await get_pool()
+    async with pool.acquire() as conn:
+        async with conn.transaction():
+            await _delete_rows(conn, user_id, PROGRESS_TABLES, _RESET_USER_SQL)
+    forget_user_queues(user_id)
+
+
+@read_write
+async def delete_account(user_id: int) -> bool:
+    """Delete the user and every row that belongs to them.
+
+    Returns False if there was no such user.
+    """
+    await flush_answers()
+    pool = await get_pool()
+    async with pool.acquire() as conn:
+        async with conn.transaction():
+            status = await _delete_rows(conn, user_id, ACCOUNT_TABLES, _DELETE_USER_SQL)
+    forget_user(user_id)
+    forget_user_queues(user_id)
+    deleted = status.split()[-1] != "0"
+    if deleted:
+        logger.info(f"Account {user_id} deleted")
+    return deleted
+
+
+# ── Export ──────────────────────────────────────────────────────
+
+def _plain(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _json_default(value):
+    plain = _plain(value)
+    return str(plain) if plain is value else plain
+
+
+def _rows(conn, table: str, user_id: int):
+    return conn.cursor(
+        f"SELECT * FROM {table} WHERE user_id = $1", user_id, prefetch=_EXPORT_PREFETCH
+    )
+
+
+async def _json_pieces(conn, user_id: int):
+    yield '{"user_id": %d, "exported_at": %s, "tables": {' % (
+        user_id, json.dumps(datetime.now().isoformat(timespec="seconds"))
+    )
+    for i, table in enumerate(EXPORT_TABLES):
+        yield f'{"," if i else ""}"{table}": ['
+        separator = ""
+        async for record in _rows(conn, table, user_id):
+            yield separator + json.dumps(dict(record.items()), default=_json_default, ensure_ascii=False)
+            separator = ","
+        yield "]"
+    yield "}}\n"
+
+
+async def _csv_pieces(conn, user_id: int):
+    """One section per non-empty table: a header row, then its rows.
+
+    The first column is always the table name; sections are separated by
+    an empty line.
+    """
+    out = io.StringIO()
+    writer = csv.writer(out)
+    first_section = True
+    for table in EXPORT_TABLES:
+        header = True
+        async for record in _rows(conn, table, user_id):
+            if header:
+                if not first_section:
+                    writer.writerow([])
+                writer.writerow(["table", *record.keys()])
+                header = first_section = False
+            writer.writerow([table, *(_plain(v) for v in record.values())])
+            yield out.getvalue()
+            out.seek(0)
+            out.truncate()
+
+
+async def export_account(user_id: int, fmt: str = "json"):
+    """Yield all data of a user as JSON or CSV text, in chunks of ~64 KB.
+
+    Rows are streamed from the database; nothing is collected in memory.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+    pieces = _json_pieces if fmt == "json" else _csv_pieces
+
+    pool = await get_pool()
+    async with pool.acquire() as conn:
+        async with conn.transaction(isolation="repeatable_read", readonly=True):
+            chunk = []
+            size = 0
+            async for piece in pieces(conn, user_id):
+                chunk.append(piece)
+                size += len(piece)
+                if size >= _CHUNK_SIZE:
+                    yield "".join(chunk)
+                    chunk = []
+                    size = 0
+            if chunk:
+                yield "".join(chunk)
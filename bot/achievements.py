@@ -91,8 +91,8 @@ async def check_achievements(user_id: int, current_streak: int) -> list:
                 logger.info(f"  chatterbox: phrases={count}/50, unlocked={unlocked}")
 
             elif ach["id"] == "master_a1":
-                from bot.content_manager import get_all_words
-                total_a1 = len(get_all_words("A1", "1")) + len(get_all_words("A1", "2"))
+                from bot.content_manager import get_total_counts
+                total_a1 = get_total_counts("A1")["words"]
                 if total_a1 > 0:
                     mastered = await conn.fetchrow(
                         """SELECT COUNT(*) as c FROM progress
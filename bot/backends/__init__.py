@@ -0,0 +1,37 @@
+"""
+Storage backends behind bot.database.
+
+Both expose the subset of the asyncpg API the project uses: a pool with
+`acquire()`/`close()`/`is_closing()` and connections with `execute`,
+`executemany`, `fetch`, `fetchrow`, `fetchval`, `transaction()` and
+`cursor()` (async iteration; on asyncpg only inside a transaction).
+
+    postgresql://...      -> asyncpg (bot.backends.postgres)
+    sqlite:///path/to.db  -> embedded SQLite in WAL mode (bot.backends.sqlite)
+
+Queries are written in the PostgreSQL dialect; the SQLite backend
+translates the parts used in this project.  Code that needs genuinely
+Postgres-only features (partitions, advisory locks) branches on
+`get_dialect(conn)`.
+"""
+
+POSTGRES = "postgres"
+SQLITE = "sqlite"
+
+
+def is_sqlite_url(url: str) -> bool:
+    return url.startswith("sqlite:")
+
+
+async def create_pool(url: str):
+    """Create a connection pool for *url*."""
+    if is_sqlite_url(url):
+        from bot.backends import sqlite
+        return await sqlite.create_pool(url)
+    from bot.backends import postgres
+    return await postgres.create_pool(url)
+
+
+def get_dialect(conn) -> str:
+    """Return POSTGRES or SQLITE for a connection or pool."""
+    return getattr(conn, "dialect", POSTGRES)
@@ -0,0 +1,116 @@
+"""
+Timing proxies around a backend pool and its connections.
+
+Every statement is timed into `db_query_seconds{query, caller, role}`,
+where *query* and *caller* come from `query_context` (set by the
+@read_only/@read_write decorators in bot.database: the database function
+and the code that called it).  `pool.acquire()` waits go into
+`db_pool_wait_seconds{role}`.  Statements slower than DB_SLOW_QUERY_MS
+are logged with their SQL and parameter types; values are never logged.
+"""
+
+import contextvars
+import logging
+import re
+import time
+
+from bot import metrics
+from bot.config import DB_SLOW_QUERY_MS
+
+logger = logging.getLogger(__name__)
+
+# (query name, caller) of the database function being executed.
+query_context = contextvars.ContextVar("db_query_context", default=("-", "-"))
+
+_query_seconds = metrics.histogram(
+    "db_query_seconds", "Database statement duration", ("query", "caller", "role")
+)
+_pool_wait_seconds = metrics.histogram(
+    "db_pool_wait_seconds", "Time spent waiting in pool.acquire()", ("role",)
+)
+_query_errors = metrics.counter(
+    "db_query_errors_total", "Database statements that raised", ("query", "role")
+)
+
+_SLOW_SEC = DB_SLOW_QUERY_MS / 1000 if DB_SLOW_QUERY_MS > 0 else float("inf")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def _redact(args) -> str:
+    return ", ".join(f"${i}=<{type(v).__name__}>" for i, v in enumerate(args, 1))
+
+
+class InstrumentedConnection:
+    def __init__(self, conn, role: str):
+        self._conn = conn
+        self._role = role
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    async def _timed(self, method, sql: str, args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return await method(sql, *args, **kwargs)
+        except Exception:
+            _query_errors.inc(query_context.get()[0], self._role)
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            query, caller = query_context.get()
+            _query_seconds.observe(elapsed, query, caller, self._role)
+            if elapsed >= _SLOW_SEC:
+                logger.warning(
+                    f"Slow query {query} ({caller}, {self._role}) {elapsed * 1000:.0f} ms: "
+                    f"{_WHITESPACE_RE.sub(' ', sql).strip()[:500]} [{self._describe(method, args)}]"
+                )
+
+    def _describe(self, method, args) -> str:
+        if method == self._conn.executemany:
+            return f"{len(args[0])} rows"
+        return _redact(args)
+
+    async def execute(self, sql: str, *args):
+        return await self._timed(self._conn.execute, sql, args)
+
+    async def executemany(self, sql: str, args):
+        return await self._timed(self._conn.executemany, sql, (list(args),))
+
+    async def fetch(self, sql: str, *args):
+        return await self._timed(self._conn.fetch, sql, args)
+
+    async def fetchrow(self, sql: str, *args):
+        return await self._timed(self._conn.fetchrow, sql, args)
+
+    async def fetchval(self, sql: str, *args, column: int = 0):
+        return await self._timed(self._conn.fetchval, sql, args, column=column)
+
+
+class _Acquire:
+    def __init__(self, pool: "InstrumentedPool"):
+        self._pool = pool
+        self._context = None
+
+    async def __aenter__(self) -> InstrumentedConnection:
+        started = time.perf_counter()
+        self._context = self._pool._pool.acquire()
+        conn = await self._context.__aenter__()
+        _pool_wait_seconds.observe(time.perf_counter() - started, self._pool._role)
+        return InstrumentedConnection(conn, self._pool._role)
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return await self._context.__aexit__(exc_type, exc, tb)
+
+
+class InstrumentedPool:
+    """Pool proxy whose acquire() yields timed connections."""
+
+    def __init__(self, pool, role: str):
+        self._pool = pool
+        self._role = role
+
+    def __getattr__(self, name):
+        return getattr(self._pool, name)
+
+    def acquire(self) -> _Acquire:
+        return _Acquire(self)
@@ -0,0 +1,30 @@
+"""
+PostgreSQL backend (asyncpg).
+"""
+
+import ssl
+
+import asyncpg
+
+
+def get_ssl_context():
+    """Create SSL context for Supabase/cloud PostgreSQL connections."""
+    ctx = ssl.create_default_context()
+    ctx.check_hostname = False
+    ctx.verify_mode = ssl.CERT_NONE  # Supabase uses self-signed certs
+    return ctx
+
+
+async def create_pool(url: str):
+    # Determine if we need SSL (for cloud databases like Supabase, Neon, etc.)
+    use_ssl = 'supabase' in url or 'neon' in url or 'render' in url
+
+    return await asyncpg.create_pool(
+        url,
+        min_size=1,
+        max_size=5,  # Reduced for free tier limits
+        command_timeout=60,
+        ssl=get_ssl_context() if use_ssl else None,
+        # For PgBouncer/Supabase pooler - disable prepared statements
+        statement_cache_size=0 if 'pooler.supabase' in url else 100
+    )
@@ -0,0 +1,679 @@
+"""
+Embedded SQLite backend for single-node and offline deployments.
+
+The database runs in WAL mode.  Every write goes through one writer thread,
+which groups the statements queued at the same moment into a single commit;
+each statement runs in its own savepoint, so one failing statement does not
+affect the rest of the batch.  Awaiting a write returns after its commit.
+Reads outside a transaction run on a pool of read-only connections (one per
+reader thread) and never wait for the writer.
+
+`conn.transaction()` holds the writer for its whole duration: all statements
+of that connection, reads included, run on the writer connection, and writes
+from other connections wait until the transaction ends.
+`conn.transaction(readonly=True)` instead pins a dedicated read-only
+connection holding one WAL snapshot and never blocks the writer.
+`conn.cursor(sql, *args, prefetch=50)` iterates a result in batches.
+
+Queries are written for PostgreSQL; the following is translated:
+
+    $1, $2 ...                   -> ?1, ?2 ...
+    col = ANY($n)                -> col IN (SELECT value FROM json_each(?n))
+    expr::type                   -> expr (casts are dropped)
+    SERIAL PRIMARY KEY           -> INTEGER PRIMARY KEY AUTOINCREMENT
+    ADD/DROP COLUMN IF [NOT] EXISTS  (checked against PRAGMA table_info)
+    NOW(), GREATEST(), LEAST(), date_trunc('day'|'week'|'month'|'year', d)
+
+List parameters are passed as JSON, date/datetime as ISO strings.  DATE and
+TIMESTAMP columns come back as date/datetime objects; date_trunc() returns
+a 'YYYY-MM-DD' string (PostgreSQL code casts it with ::date).
+"""
+
+import asyncio
+import atexit
+import json
+import logging
+import os
+import queue
+import re
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+
+from bot.backends import SQLITE
+from bot.config import SQLITE_READ_CONNECTIONS, SQLITE_WRITE_BATCH_SIZE
+
+logger = logging.getLogger(__name__)
+
+_BUSY_TIMEOUT_SEC = 30
+# An open transaction whose coroutine sends nothing for this long is rolled
+# back, so a dead event loop cannot block the writer forever.
+_SESSION_IDLE_TIMEOUT_SEC = 120
+
+_STOP = object()
+
+
+# ── SQL translation ─────────────────────────────────────────────
+
+_ANY_RE = re.compile(r"=\s*ANY\s*\(\s*\$(\d+)\s*\)", re.I)
+_CAST_RE = re.compile(r"::\s*\w+(?:\[\])?")
+_PARAM_RE = re.compile(r"\$(\d+)")
+_SERIAL_RE = re.compile(r"\b(?:BIG)?SERIAL\s+PRIMARY\s+KEY\b", re.I)
+_ALTER_COLUMN_RE = re.compile(
+    r"^\s*ALTER\s+TABLE\s+(\w+)\s+(ADD|DROP)\s+COLUMN\s+IF\s+(?:NOT\s+)?EXISTS\s+(\w+)(.*)$",
+    re.I | re.S,
+)
+_WRITE_RE = re.compile(r"\b(?:INSERT|UPDATE|DELETE|REPLACE|CREATE|DROP|ALTER)\b", re.I)
+
+
+@lru_cache(maxsize=2048)
+def translate(sql: str) -> str:
+    """Translate a PostgreSQL-dialect statement to SQLite."""
+    sql = _ANY_RE.sub(r"IN (SELECT value FROM json_each($\1))", sql)
+    sql = _CAST_RE.sub("", sql)
+    sql = _SERIAL_RE.sub("INTEGER PRIMARY KEY AUTOINCREMENT", sql)
+    return _PARAM_RE.sub(r"?\1", sql)
+
+
+@lru_cache(maxsize=2048)
+def _is_read(sql: str) -> bool:
+    words = sql.split(None, 1)
+    return bool(words) and words[0].upper() in ("SELECT", "WITH", "VALUES") \
+        and not _WRITE_RE.search(sql)
+
+
+def _adapt(args) -> list:
+    adapted = []
+    for value in args:
+        if isinstance(value, datetime):
+            value = value.isoformat(" ")
+        elif isinstance(value, date):
+            value = value.isoformat()
+        elif isinstance(value, (list, tuple, set, frozenset)):
+            value = json.dumps(list(value), default=str)
+        adapted.append(value)
+    return adapted
+
+
+def _convert_timestamp(value: bytes):
+    text = value.decode()
+    try:
+        return datetime.fromisoformat(text)
+    except ValueError:
+        return text
+
+
+def _convert_date(value: bytes):
+    text = value.decode()
+    try:
+        return date.fromisoformat(text[:10])
+    except ValueError:
+        return text
+
+
+sqlite3.register_converter("TIMESTAMP", _convert_timestamp)
+sqlite3.register_converter("DATE", _convert_date)
+
+
+# ── PostgreSQL functions ────────────────────────────────────────
+
+def _now() -> str:
+    return datetime.now().isoformat(" ")
+
+
+def _greatest(*values):
+    values = [v for v in values if v is not None]
+    return max(values) if values else None
+
+
+def _least(*values):
+    values = [v for v in values if v is not None]
+    return min(values) if values else None
+
+
+def _date_trunc(unit: str, value):
+    if value is None:
+        return None
+    d = date.fromisoformat(str(value)[:10])
+    unit = unit.lower()
+    if unit == "week":
+        d -= timedelta(days=d.weekday())
+    elif unit == "month":
+        d = d.replace(day=1)
+    elif unit == "year":
+        d = d.replace(month=1, day=1)
+    elif unit != "day":
+        raise ValueError(f"date_trunc: unsupported unit {unit!r}")
+    return d.isoformat()
+
+
+# ── Records and statement execution ─────────────────────────────
+
+class Record:
+    """Read-only row addressable by column name or index (like asyncpg.Record)."""
+
+    __slots__ = ("_values", "_index")
+
+    def __init__(self, values: tuple, index: dict):
+        self._values = values
+        self._index = index
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            return self._values[self._index[key]]
+        return self._values[key]
+
+    def get(self, key, default=None):
+        i = self._index.get(key)
+        return default if i is None else self._values[i]
+
+    def keys(self):
+        return iter(self._index)
+
+    def values(self):
+        return iter(self._values)
+
+    def items(self):
+        return zip(self._index, self._values)
+
+    def __iter__(self):
+        return iter(self._values)
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def __repr__(self) -> str:
+        fields = " ".join(f"{k}={v!r}" for k, v in self.items())
+        return f"<Record {fields}>"
+
+
+def _status(sql: str, cursor, row_count: int) -> str:
+    words = sql.split(None, 2)
+    command = words[0].upper()
+    if command == "INSERT":
+        return f"INSERT 0 {cursor.rowcount}"
+    if command in ("UPDATE", "DELETE"):
+        return f"{command} {cursor.rowcount}"
+    if command in ("SELECT", "WITH", "VALUES"):
+        return f"SELECT {row_count}"
+    return " ".join(w.upper() for w in words[:2])
+
+
+def _execute(conn: sqlite3.Connection, sql: str, args, many: bool = False):
+    """Run one statement; return (records, status)."""
+    m = _ALTER_COLUMN_RE.match(sql)
+    if m:
+        table, action, column, rest = m.groups()
+        exists = any(row[1] == column for row in conn.execute(f"PRAGMA table_info({table})"))
+        if (action.upper() == "ADD") == exists:
+            return [], "ALTER TABLE"
+        sql = f"ALTER TABLE {table} {action} COLUMN {column}{rest}"
+
+    translated = translate(sql)
+    if many:
+        cursor = conn.executemany(translated, [_adapt(a) for a in args])
+        return [], _status(sql, cursor, 0)
+
+    cursor = conn.execute(translated, _adapt(args))
+    rows = cursor.fetchall()
+    records = []
+    if cursor.description:
+        index = {d[0]: i for i, d in enumerate(cursor.description)}
+        records = [Record(row, index) for row in rows]
+    return records, _status(sql, cursor, len(rows))
+
+
+def _open_cursor(conn: sqlite3.Connection, sql: str, args):
+    return conn.execute(translate(sql), _adapt(args))
+
+
+def _fetch_batch(cursor: sqlite3.Cursor, size: int) -> list:
+    rows = cursor.fetchmany(size)
+    if not rows:
+        return []
+    index = {d[0]: i for i, d in enumerate(cursor.description)}
+    return [Record(row, index) for row in rows]
+
+
+def _begin_snapshot(conn: sqlite3.Connection) -> None:
+    conn.execute("BEGIN")
+    # A deferred transaction takes its snapshot at the first read.
+    conn.execute("SELECT 1 FROM sqlite_master LIMIT 1").fetchall()
+
+
+def _end_snapshot(conn: sqlite3.Connection) -> None:
+    try:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+    finally:
+        conn.close()
+
+
+def _resolve(loop, future, result=None, exc=None) -> None:
+    if future is None:
+        return
+
+    def _set():
+        if future.done():
+            return
+        if exc is not None:
+            future.set_exception(exc)
+        else:
+            future.set_result(result)
+
+    try:
+        loop.call_soon_threadsafe(_set)
+    except RuntimeError:
+        pass  # caller's loop is closed
+
+
+# ── Engine: writer thread + read connections ────────────────────
+
+class _Write:
+    __slots__ = ("sql", "args", "many", "loop", "future")
+
+    def __init__(self, sql, args, many, loop, future):
+        self.sql = sql
+        self.args = args
+        self.many = many
+        self.loop = loop
+        self.future = future
+
+
+class _Session:
+    """An explicit transaction that owns the writer until commit/rollback."""
+
+    __slots__ = ("loop", "started", "commands", "closed")
+
+    def __init__(self, loop):
+        self.loop = loop
+        self.started = loop.create_future()
+        self.commands = queue.Queue()
+        self.closed = False
+
+
+class Engine:
+    """One database file: a writer thread and a pool of reader threads."""
+
+    def __init__(self, path: str, read_connections: int, batch_size: int):
+        self.path = path
+        self.batch_size = max(1, batch_size)
+        self._jobs = queue.Queue()
+        self._local = threading.local()
+        self._writer_conn = self._connect(readonly=False)
+        self._readers = ThreadPoolExecutor(
+            max_workers=max(1, read_connections), thread_name_prefix="sqlite-read"
+        )
+        self._writer = threading.Thread(target=self._write_loop, name="sqlite-writer", daemon=True)
+        self._writer.start()
+
+    def _connect(self, readonly: bool) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.path,
+            timeout=_BUSY_TIMEOUT_SEC,
+            detect_types=sqlite3.PARSE_DECLTYPES,
+            isolation_level=None,
+            check_same_thread=False,
+        )
+        if readonly:
+            conn.execute("PRAGMA query_only = ON")
+        else:
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = NORMAL")
+        conn.execute("PRAGMA foreign_keys = ON")
+        conn.create_function("now", 0, _now)
+        conn.create_function("greatest", -1, _greatest, deterministic=True)
+        conn.create_function("least", -1, _least, deterministic=True)
+        conn.create_function("date_trunc", 2, _date_trunc, deterministic=True)
+        return conn
+
+    # Reads
+
+    def _read(self, sql: str, args):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._connect(readonly=True)
+        return _execute(conn, sql, args)
+
+    async def read(self, sql: str, args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._readers, self._read, sql, args)
+
+    def open_reader(self) -> sqlite3.Connection:
+        """A dedicated read-only connection, for snapshots and cursors."""
+        return self._connect(readonly=True)
+
+    async def run_on(self, func, *args):
+        """Run blocking *func* on a reader thread."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._readers, func, *args)
+
+    # Writes
+
+    async def write(self, sql: str, args, many: bool = False):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._jobs.put(_Write(sql, args, many, loop, future))
+        return await future
+
+    async def begin(self) -> _Session:
+        session = _Session(asyncio.get_running_loop())
+        self._jobs.put(session)
+        try:
+            await session.started
+        except asyncio.CancelledError:
+            session.commands.put(("rollback", None, (), False, None))
+            raise
+        return session
+
+    async def session_call(self, session: _Session, kind: str, sql: str = None,
+                           args=(), many: bool = False):
+        if session.closed:
+            raise sqlite3.OperationalError("transaction was rolled back after being idle")
+        future = session.loop.create_future()
+        session.commands.put((kind, sql, args, many, future))
+        return await future
+
+    def _write_loop(self) -> None:
+        conn = self._writer_conn
+        while True:
+            job = self._jobs.get()
+            if job is _STOP:
+                break
+            batch = [job]
+            while len(batch) < self.batch_size:
+                try:
+                    job = self._jobs.get_nowait()
+                except queue.Empty:
+                    break
+                if job is _STOP:
+                    self._jobs.put(_STOP)
+                    break
+                batch.append(job)
+            try:
+                self._run_batch(conn, batch)
+            except Exception:
+                logger.exception("SQLite writer batch failed")
+        conn.close()
+
+    def _run_batch(self, conn: sqlite3.Connection, batch: list) -> None:
+        done = []
+        for job in batch:
+            if isinstance(job, _Session):
+                self._commit(conn, done)
+                done = []
+                self._run_session(conn, job)
+                continue
+            if not conn.in_transaction:
+                conn.execute("BEGIN IMMEDIATE")
+            conn.execute("SAVEPOINT batch_item")
+            try:
+                result = _execute(conn, job.sql, job.args, job.many)
+                conn.execute("RELEASE batch_item")
+                done.append((job, result, None))
+            except Exception as e:
+                conn.execute("ROLLBACK TO batch_item")
+                conn.execute("RELEASE batch_item")
+                done.append((job, None, e))
+        self._commit(conn, done)
+
+    def _commit(self, conn: sqlite3.Connection, done: list) -> None:
+        if conn.in_transaction:
+            try:
+                conn.execute("COMMIT")
+            except Exception as e:
+                conn.execute("ROLLBACK")
+                done = [(job, None, e) for job, _, _ in done]
+        for job, result, exc in done:
+            _resolve(job.loop, job.future, result, exc)
+
+    def _run_session(self, conn: sqlite3.Connection, session: _Session) -> None:
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+        except Exception as e:
+            session.closed = True
+            _resolve(session.loop, session.started, exc=e)
+            return
+        _resolve(session.loop, session.started, session)
+
+        while True:
+            try:
+                kind, sql, args, many, future = session.commands.get(
+                    timeout=_SESSION_IDLE_TIMEOUT_SEC
+                )
+            except queue.Empty:
+                logger.error("SQLite transaction idle for %ss, rolling back", _SESSION_IDLE_TIMEOUT_SEC)
+                session.closed = True
+                conn.execute("ROLLBACK")
+                return
+
+            if kind in ("commit", "rollback"):
+                session.closed = True
+                exc = None
+                try:
+                    conn.execute(kind.upper())
+                except Exception as e:
+                    exc = e
+                    if conn.in_transaction:
+                        conn.execute("ROLLBACK")
+                _resolve(session.loop, future, None, exc)
+                return
+
+            try:
+                _resolve(session.loop, future, _execute(conn, sql, args, many))
+            except Exception as e:
+                _resolve(session.loop, future, exc=e)
+
+    def close(self) -> None:
+        if self._writer.is_alive():
+            self._jobs.put(_STOP)
+            self._writer.join(timeout=10)
+        self._readers.shutdown(wait=False)
+
+
+# ── asyncpg-compatible facade ───────────────────────────────────
+
+class Transaction:
+    def __init__(self, conn: "Connection", readonly: bool = False):
+        self._conn = conn
+        self._readonly = readonly
+        self._savepoint = None
+
+    async def __aenter__(self):
+        conn = self._conn
+        if conn._session is not None or conn._snapshot is not None:
+            conn._depth += 1
+            self._savepoint = f"sp_{conn._depth}"
+            await conn.execute(f"SAVEPOINT {self._savepoint}")
+        elif self._readonly:
+            snapshot = conn._engine.open_reader()
+            try:
+                await conn._engine.run_on(_begin_snapshot, snapshot)
+            except BaseException:
+                snapshot.close()
+                raise
+            conn._snapshot = snapshot
+        else:
+            conn._session = await conn._engine.begin()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        conn = self._conn
+        if self._savepoint is not None:
+            try:
+                if exc_type is not None:
+                    await conn.execute(f"ROLLBACK TO {self._savepoint}")
+                await conn.execute(f"RELEASE {self._savepoint}")
+            finally:
+                conn._depth -= 1
+            return False
+
+        if conn._snapshot is not None:
+            snapshot, conn._snapshot = conn._snapshot, None
+            await conn._engine.run_on(_end_snapshot, snapshot)
+            return False
+
+        session, conn._session = conn._session, None
+        await conn._engine.session_call(session, "commit" if exc_type is None else "rollback")
+        return False
+
+
+class Cursor:
+    """Async iteration over a query, *prefetch* rows at a time."""
+
+    def __init__(self, conn: "Connection", sql: str, args, prefetch: int):
+        self._conn = conn
+        self._sql = sql
+        self._args = args
+        self._prefetch = max(1, prefetch)
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        conn = self._conn
+        if conn._session is not None:
+            # The writer thread owns the transaction; rows arrive in one piece.
+            for record in await conn.fetch(self._sql, *self._args):
+                yield record
+            return
+
+        engine = conn._engine
+        db = conn._snapshot or engine.open_reader()
+        try:
+            cursor = await engine.run_on(_open_cursor, db, self._sql, self._args)
+            try:
+                while True:
+                    records = await engine.run_on(_fetch_batch, cursor, self._prefetch)
+                    if not records:
+                        break
+                    for record in records:
+                        yield record
+            finally:
+                try:
+                    cursor.close()
+                except sqlite3.ProgrammingError:
+                    pass  # iteration abandoned after its snapshot ended
+        finally:
+            if db is not conn._snapshot:
+                db.close()
+
+
+class Connection:
+    dialect = SQLITE
+
+    def __init__(self, engine: Engine):
+        self._engine = engine
+        self._session = None
+        self._snapshot = None
+        self._depth = 0
+
+    async def _run(self, sql: str, args, many: bool = False):
+        if self._snapshot is not None:
+            return await self._engine.run_on(_execute, self._snapshot, sql, args, many)
+        if self._session is not None:
+            return await self._engine.session_call(self._session, "statement", sql, args, many)
+        if not many and _is_read(sql):
+            return await self._engine.read(sql, args)
+        return await self._engine.write(sql, args, many)
+
+    async def execute(self, sql: str, *args) -> str:
+        return (await self._run(sql, args))[1]
+
+    async def executemany(self, sql: str, args) -> None:
+        await self._run(sql, list(args), many=True)
+
+    async def fetch(self, sql: str, *args) -> list:
+        return (await self._run(sql, args))[0]
+
+    async def fetchrow(self, sql: str, *args):
+        rows = (await self._run(sql, args))[0]
+        return rows[0] if rows else None
+
+    async def fetchval(self, sql: str, *args, column: int = 0):
+        row = await self.fetchrow(sql, *args)
+        return row[column] if row is not None else None
+
+    def transaction(self, isolation: str = None, readonly: bool = False,
+                    deferrable: bool = False) -> Transaction:
+        # SQLite transactions are always serializable; isolation is accepted
+        # for asyncpg compatibility.
+        return Transaction(self, readonly=readonly)
+
+    def cursor(self, sql: str, *args, prefetch: int = 50) -> Cursor:
+        return Cursor(self, sql, args, prefetch)
+
+
+class _Acquire:
+    def __init__(self, engine: Engine):
+        self._conn = Connection(engine)
+
+    async def __aenter__(self) -> Connection:
+        return self._conn
+
+    async def __aexit__(self, exc_type, exc, tb):
+        if self._conn._snapshot is not None:
+            snapshot, self._conn._snapshot = self._conn._snapshot, None
+            await self._conn._engine.run_on(_end_snapshot, snapshot)
+        if self._conn._session is not None:
+            session, self._conn._session = self._conn._session, None
+            await self._conn._engine.session_call(session, "rollback")
+        return False
+
+
+class Pool:
+    dialect = SQLITE
+
+    def __init__(self, engine: Engine):
+        self._engine = engine
+        self._closing = False
+
+    def acquire(self) -> _Acquire:
+        return _Acquire(self._engine)
+
+    async def close(self) -> None:
+        # The engine is shared by every pool on this file and lives until exit.
+        self._closing = True
+
+    def is_closing(self) -> bool:
+        return self._closing
+
+
+_engines = {}
+_engines_lock = threading.Lock()
+
+
+def _path_from_url(url: str) -> str:
+    path = url[len("sqlite:///"):] if url.startswith("sqlite:///") else url[len("sqlite:"):]
+    if not path or path == ":memory:":
+        raise ValueError("SQLite backend needs a database file (sqlite:///path/to/file.db)")
+    return os.path.abspath(path)
+
+
+def get_engine(url: str) -> Engine:
+    path = _path_from_url(url)
+    with _engines_lock:
+        engine = _engines.get(path)
+        if engine is None:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            engine = _engines[path] = Engine(path, SQLITE_READ_CONNECTIONS, SQLITE_WRITE_BATCH_SIZE)
+            logger.info(f"SQLite database opened: {path}")
+        return engine
+
+
+async def create_pool(url: str) -> Pool:
+    return Pool(get_engine(url))
+
+
+@atexit.register
+def close_all() -> None:
+    """Stop writer threads after draining queued writes."""
+    with _engines_lock:
+        engines = list(_engines.values())
+        _engines.clear()
+    for engine in engines:
+        engine.close()
@@ -5,8 +5,24 @@ load_dotenv()
 
 TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
 
-# Database URL (PostgreSQL for production, SQLite fallback for local dev)
-DATABASE_URL = os.getenv("DATABASE_URL")
+# Database URL (PostgreSQL for production, SQLite for local dev).
+# sqlite:///path/to.db selects the embedded SQLite; so does setting only
+# SQLITE_PATH (dev).  Neither set -> empty, and startup fails loudly instead
+# of writing to a file that an ephemeral disk loses on the next deploy.
+SQLITE_PATH = os.getenv("SQLITE_PATH", "")
+DATABASE_URL = os.getenv("DATABASE_URL") or (f"sqlite:///{SQLITE_PATH}" if SQLITE_PATH else "")
+# Optional read replica for read-only queries (bot.database @read_only)
+READ_DATABASE_URL = os.getenv("READ_DATABASE_URL", "")
+# Reads of a user who wrote within this window go to the primary (replica lag)
+READ_YOUR_WRITES_SEC = int(os.getenv("READ_YOUR_WRITES_SEC", "10"))
+# After a replica error, reads use the primary for this long
+REPLICA_RETRY_SEC = int(os.getenv("REPLICA_RETRY_SEC", "30"))
+SQLITE_READ_CONNECTIONS = int(os.getenv("SQLITE_READ_CONNECTIONS", "4"))
+SQLITE_WRITE_BATCH_SIZE = int(os.getenv("SQLITE_WRITE_BATCH_SIZE", "64"))
+# Per-query timing (bot/backends/instrumented.py); statements slower than
+# DB_SLOW_QUERY_MS are logged with redacted parameters (0 disables the log)
+DB_METRICS_ENABLED = os.getenv("DB_METRICS_ENABLED", "1") == "1"
+DB_SLOW_QUERY_MS = int(os.getenv("DB_SLOW_QUERY_MS", "200"))
 
 # Default reminder time (UTC)
 DEFAULT_REMINDER_HOUR = 9
@@ -43,3 +59,49 @@ PRONUN_VOSK_MODEL_PATH = os.getenv("PRONUN_VOSK_MODEL_PATH", "")
 # Azure Speech (pronunciation assessment)
 AZURE_SPEECH_KEY = os.getenv("AZURE_SPEECH_KEY", "")
 AZURE_SPEECH_REGION = os.getenv("AZURE_SPEECH_REGION", "")
+
+# Database maintenance (partition upkeep, rollups); interval 0 disables the job
+DB_MAINTENANCE_INTERVAL_SEC = int(os.getenv("DB_MAINTENANCE_INTERVAL_SEC", "3600"))
+# Full months of raw daily_stats rows kept before folding into weekly/monthly rollups
+DAILY_STATS_RAW_MONTHS = int(os.getenv("DAILY_STATS_RAW_MONTHS", "3"))
+# Full months of raw pronunciation attempts kept before compaction into per-item summaries
+PRONUN_RAW_MONTHS = int(os.getenv("PRONUN_RAW_MONTHS", "3"))
+
+# Rate limiting: in-process counters synced to rate_limits every RATE_LIMIT_SYNC_SEC
+RATE_LIMIT_SYNC_SEC = int(os.getenv("RATE_LIMIT_SYNC_SEC", "5"))
+RATE_LIMIT_RETENTION_HOURS = int(os.getenv("RATE_LIMIT_RETENTION_HOURS", "24"))
+AUDIO_RATE_LIMIT_PER_MINUTE = int(os.getenv("AUDIO_RATE_LIMIT_PER_MINUTE", "30"))
+FEEDBACK_RATE_LIMIT_PER_HOUR = int(os.getenv("FEEDBACK_RATE_LIMIT_PER_HOUR", "10"))
+EXPORT_RATE_LIMIT_PER_HOUR = int(os.getenv("EXPORT_RATE_LIMIT_PER_HOUR", "5"))
+# Account reset and delete from the Web App, per user
+ACCOUNT_RATE_LIMIT_PER_HOUR = int(os.getenv("ACCOUNT_RATE_LIMIT_PER_HOUR", "3"))
+# Telegram Web App initData older than this is rejected (bot/webapp_auth.py)
+WEBAPP_AUTH_MAX_AGE_SEC = int(os.getenv("WEBAPP_AUTH_MAX_AGE_SEC", "86400"))
+
+# In-process caches
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "10000"))
+PROFILE_CACHE_SIZE = int(os.getenv("PROFILE_CACHE_SIZE", "10000"))
+PROFILE_CACHE_TTL_SEC = int(os.getenv("PROFILE_CACHE_TTL_SEC", "300"))
+# In-memory SRS review queues of active learners (bot/services/review_queue.py):
+# dropped after N idle seconds; 0 disables them (sessions read the database,
+# answers are written before the reply)
+REVIEW_QUEUE_IDLE_SEC = int(os.getenv("REVIEW_QUEUE_IDLE_SEC", "900"))
+REVIEW_QUEUE_SIZE = int(os.getenv("REVIEW_QUEUE_SIZE", "2000"))
+# Pre-serialized JSON of content-only Web App endpoints (tests, theory, topic
+# lists), one entry per content version, level, language and endpoint
+CONTENT_RESPONSE_CACHE_SIZE = int(os.getenv("CONTENT_RESPONSE_CACHE_SIZE", "1024"))
+
+# Prebuilt content bundle (python -m bot.content_bundle build); empty path ->
+# data/content.bundle. Ignored when missing or older than the JSON files.
+CONTENT_BUNDLE_ENABLED = os.getenv("CONTENT_BUNDLE_ENABLED", "1") == "1"
+CONTENT_BUNDLE_PATH = os.getenv("CONTENT_BUNDLE_PATH", "")
+# Poll data/ for changed JSON files every N seconds and hot-swap the affected
+# levels (bot/content_watcher.py); 0 disables — content changes ship with deploys
+CONTENT_WATCH_SEC = int(os.getenv("CONTENT_WATCH_SEC", "0"))
+# Load each content type of a level on first use instead of at start-up, and
+# optionally load every level in a background thread right after start-up
+CONTENT_LAZY_LOAD = os.getenv("CONTENT_LAZY_LOAD", "0") == "1"
+CONTENT_WARMUP = os.getenv("CONTENT_WARMUP", "0") == "1"
+# Threads reading one content folder; 0 -> one per CPU (up to 4). JSON parsing
+# holds the GIL, so this mostly hides file I/O latency (cold disk, network FS)
+CONTENT_LOAD_WORKERS = int(os.getenv("CONTENT_LOAD_WORKERS", "0"))
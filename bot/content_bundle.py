@@ -0,0 +1,215 @@
+"""
+Prebuilt content bundle: every level in one file, loaded with one read.
+
+    python -m bot.content_bundle build   # validate data/ and write the bundle
+    python -m bot.content_bundle check   # validate only
+
+Without a bundle, start-up globs data/<level>/<type>/*.json and parses
+every file, then builds the per-language views.  The bundle holds
+bot.content_manager's level cache after all of that (raw data, compact
+records and views), pickled separately per level: start-up reads the one
+file, and each level is unpickled the first time it is used.
+
+The bundle records a fingerprint of its inputs: path, size and mtime of
+every level JSON file and the placement test plus a hash of
+content_manager.py (the record classes it pickles).  If anything changed since the build, the bundle is
+ignored and content loads from JSON as before.  `version` is a SHA-256 of
+the JSON files' contents.
+
+The bundle is a pickle: only load files written by this command.
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import pickle
+import sys
+import time
+from pathlib import Path
+
+from bot import content_manager as cm
+from bot.config import CONTENT_BUNDLE_ENABLED, CONTENT_BUNDLE_PATH
+
+logger = logging.getLogger(__name__)
+
+# Bump when the bundle layout changes.
+BUNDLE_FORMAT = 1
+
+# Content type -> (list of items, fields every item must have)
+_SCHEMA = {
+    "vocabulary": ("words", ("de", "ru")),
+    "grammar": ("questions", ("question", "options", "correct")),
+    "phrases": ("phrases", ("de", "ru")),
+    "dialogues": ("dialogue", ("text",)),
+    "culture": ("questions", ("question", "options", "correct")),
+    "exercises": ("tasks", ("type",)),
+}
+
+
+def bundle_path() -> Path:
+    return Path(CONTENT_BUNDLE_PATH) if CONTENT_BUNDLE_PATH else cm.BASE_DATA_DIR / "content.bundle"
+
+
+def _fingerprint(files: list) -> tuple:
+    entries = []
+    for path in files:
+        stat = path.stat()
+        entries.append((path.relative_to(cm.BASE_DATA_DIR).as_posix(), stat.st_size, stat.st_mtime_ns))
+    code = hashlib.sha256(Path(cm.__file__).read_bytes()).hexdigest()
+    return (code, tuple(entries))
+
+
+def _content_hash(files: list) -> str:
+    digest = hashlib.sha256()
+    for path in files:
+        digest.update(path.relative_to(cm.BASE_DATA_DIR).as_posix().encode())
+        digest.update(b"\0")
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+# ── Validation ──────────────────────────────────────────────────
+
+def _check_item(item, where: str, fields: tuple) -> list:
+    if not isinstance(item, dict):
+        return [f"{where}: not an object"]
+    problems = [f"{where}: missing '{field}'" for field in fields if item.get(field) in (None, "")]
+    if "options" in item:
+        options, correct = item["options"], item.get("correct")
+        if not isinstance(options, list) or len(options) < 2:
+            problems.append(f"{where}: 'options' must be a list of at least 2")
+        elif not isinstance(correct, int) or not 0 <= correct < len(options):
+            problems.append(f"{where}: 'correct' {correct!r} is not an index into 'options'")
+    return problems
+
+
+def _check_file(data, kind: str, seen: dict, name: str) -> list:
+    if not isinstance(data, dict):
+        return ["not a JSON object"]
+    item_id = data.get("id")
+    if not isinstance(item_id, str) or not item_id:
+        return ["missing 'id'"]
+    problems = []
+    if item_id in seen:
+        problems.append(f"duplicate id '{item_id}' (also in {seen[item_id]})")
+    seen[item_id] = name
+    if not data.get("name"):
+        problems.append("missing 'name'")
+
+    items_key, fields = _SCHEMA[kind]
+    items = data.get(items_key)
+    if not isinstance(items, list):
+        problems.append(f"'{items_key}' must be a list")
+        return problems
+    for i, item in enumerate(items):
+        problems.extend(_check_item(item, f"{items_key}[{i}]", fields))
+    return problems
+
+
+def validate_content() -> list:
+    """Check every level JSON file; return "path: problem" strings (empty if all is well)."""
+    errors = []
+    for major, sub in cm.AVAILABLE_LEVELS:
+        level_path = cm._get_level_path(major, sub)
+        metadata = level_path / "metadata.json"
+        if metadata.exists():
+            try:
+                json.loads(metadata.read_text(encoding="utf-8"))
+            except ValueError as e:
+                errors.append(f"{metadata.relative_to(cm.BASE_DATA_DIR)}: {e}")
+        for kind in _SCHEMA:
+            seen = {}
+            for path in sorted((level_path / kind).glob("*.json")):
+                name = path.relative_to(cm.BASE_DATA_DIR).as_posix()
+                try:
+                    data = json.loads(path.read_text(encoding="utf-8"))
+                except ValueError as e:
+                    errors.append(f"{name}: {e}")
+                    continue
+                errors.extend(f"{name}: {problem}" for problem in _check_file(data, kind, seen, name))
+    return errors
+
+
+# ── Build and load ──────────────────────────────────────────────
+
+def build_bundle(path: Path = None) -> dict:
+    """Load every level from JSON and write the bundle atomically; return its header."""
+    path = Path(path) if path else bundle_path()
+    files = cm._content_files()
+    fingerprint = _fingerprint(files)
+
+    cm.reload_all_content()
+    levels = {}
+    for level in cm.get_levels_with_content():
+        major, sub = level["major"], level["sub"]
+        cm._load_level(major, sub)
+        level_key = cm._get_level_key(major, sub)
+        levels[level_key] = pickle.dumps(cm._cache[level_key], protocol=pickle.HIGHEST_PROTOCOL)
+
+    header = {
+        "format": BUNDLE_FORMAT,
+        "version": _content_hash(files),
+        "fingerprint": fingerprint,
+        "built_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_bytes(pickle.dumps({**header, "levels": levels}, protocol=pickle.HIGHEST_PROTOCOL))
+    os.replace(tmp, path)
+    return {**header, "path": str(path), "levels": list(levels), "size": path.stat().st_size}
+
+
+def read_bundle(path: Path = None):
+    """Return the bundle if present, readable and up to date with data/, else None."""
+    if not CONTENT_BUNDLE_ENABLED:
+        return None
+    path = Path(path) if path else bundle_path()
+    try:
+        raw = path.read_bytes()
+    except FileNotFoundError:
+        return None
+    try:
+        bundle = pickle.loads(raw)
+    except Exception as e:
+        logger.warning(f"Content bundle {path} is unreadable, loading JSON: {e}")
+        return None
+    if not isinstance(bundle, dict) or bundle.get("format") != BUNDLE_FORMAT:
+        logger.warning(f"Content bundle {path} has an old format, loading JSON")
+        return None
+    if bundle["fingerprint"] != _fingerprint(cm._content_files()):
+        logger.warning(f"Content bundle {path} is older than data/, loading JSON")
+        return None
+    return bundle
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m bot.content_bundle", description="Validate content and build the content bundle"
+    )
+    parser.add_argument("command", choices=("build", "check"))
+    parser.add_argument("--output", help=f"bundle path (default {bundle_path()})")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.WARNING)
+
+    errors = validate_content()
+    for error in errors:
+        print(error, file=sys.stderr)
+    if errors:
+        print(f"{len(errors)} problem(s) in content, bundle not written", file=sys.stderr)
+        return 1
+    if args.command == "check":
+        print("Content OK")
+        return 0
+
+    started = time.perf_counter()
+    info = build_bundle(args.output)
+    print(
+        f"Wrote {info['path']}: {len(info['levels'])} levels, {info['size'] / 1024:.0f} KiB, "
+        f"version {info['version'][:12]} ({time.perf_counter() - started:.2f}s)"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
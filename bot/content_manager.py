@@ -4,21 +4,48 @@ Content Manager - загрузка и управление учебными да
 Этот модуль обеспечивает:
 - Загрузку словаря и грамматических тестов из JSON
 - Кэширование данных для быстрого доступа
+- Готовые неизменяемые представления (слова, фразы, категории, темы)
+  для каждого уровня и языка — геттеры возвращают их без копирования
+- Компактное хранение: слова и фразы — записи со слотами (ContentRecord),
+  повторяющиеся строки (id, названия категорий, уровни) интернированы
+- Быстрый холодный старт: если собран бандл (python -m bot.content_bundle
+  build), все уровни загружаются из него одним чтением вместо JSON файлов
+- Горячую перезагрузку изменённых файлов (apply_content_changes,
+  bot.content_watcher): новый снимок уровня собирается целиком и подменяет
+  старый одним присваиванием
 - Поддержку уровней: A1.1, A1.2, A2.1, A2.2, B1.1, B1.2, B2.1, B2.2, C1.1, C1.2, C2.1, C2.2
+- Текущий уровень в пределах запроса/задачи (contextvars): геттеры без
+  major/sub берут уровень своего запроса, а не последнего вызова set_level
 - Обратную совместимость с существующим API
 """
 
+import contextvars
+import functools
+import hashlib
 import json
 import os
+import pickle
 import random
+import sys
+import threading
+import time
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Optional, List, Dict, Any
 import logging
 
+from bot.config import CONTENT_LOAD_WORKERS
+
 logger = logging.getLogger(__name__)
 
 # Базовый путь к папке с данными
 BASE_DATA_DIR = Path(__file__).parent.parent / "data"
+# Диагностический (вступительный) тест — общий для всех уровней, и параметры
+# его вопросов для адаптивного теста (scripts/calibrate_placement.py)
+DIAGNOSTIC_PATH = BASE_DATA_DIR / "diagnostic" / "placement_test.json"
+DIAGNOSTIC_CALIBRATION_PATH = BASE_DATA_DIR / "diagnostic" / "placement_irt.json"
+_DIAGNOSTIC_FILES = (DIAGNOSTIC_PATH, DIAGNOSTIC_CALIBRATION_PATH)
 
 # Доступные уровни (major_level, sub_level)
 AVAILABLE_LEVELS = [
@@ -30,11 +57,61 @@ AVAILABLE_LEVELS = [
     ("C2", "1"), ("C2", "2"),
 ]
 
-# Текущий выбранный уровень (по умолчанию A1.1)
-_current_level: tuple = ("A1", "1")
+# Уровень по умолчанию для процесса (init_content, set_default_level)
+_default_level: tuple = ("A1", "1")
+# Уровень текущего запроса или задачи asyncio (set_level, use_level);
+# None — уровень по умолчанию. Контекст у каждого потока/задачи свой,
+# поэтому одновременные запросы разных пользователей не мешают друг другу.
+_level_var: contextvars.ContextVar = contextvars.ContextVar("content_level", default=None)
 
 # Кэш для загруженных данных (ключ = level_key)
 _cache: Dict[str, dict] = {}
+# Бандл проверяется один раз за процесс (_load_bundle); уровни из него
+# распаковываются при первом обращении: level_key -> pickle кэша уровня
+_bundle_checked = False
+_bundle_levels: Dict[str, bytes] = {}
+
+# Виды контента = подпапки уровня
+CONTENT_KINDS = ("vocabulary", "grammar", "phrases", "dialogues", "culture", "exercises")
+
+# Растёт при каждой перезагрузке контента (get_content_version)
+_content_version = 0
+
+# Манифест уровней: (версия контента, {(major, sub): запись}); см. _get_manifest
+_manifest: Optional[tuple] = None
+
+# Диагностический тест: (версия контента, индекс по этапам); см. _get_diagnostic
+_diagnostic: Optional[tuple] = None
+
+# Готовые тексты теории: (версия контента, {(уровень, test_id, язык, max_len): текст});
+# см. format_grammar_theory_text
+_theory_texts: Optional[tuple] = None
+
+# Языки интерфейса; любой другой код языка отдаёт русские поля
+VIEW_LANGS = ("ru", "en", "de")
+
+_FIELD_MAP = {
+    "name":        {"en": "name_en",        "de": "name_de"},
+    "description": {"en": "description_en", "de": "description_de"},
+    "ru":          {"en": "en",             "de": "de"},
+    "example_ru":  {"en": "example_en",     "de": "example"},
+    "context":     {"en": "context_en",     "de": "context_de"},
+}
+
+_LIST_MAP = {
+    "distractors": {"en": "distractors_en", "de": "distractors_de"},
+}
+
+# Глобальные индексы по всем загруженным уровням (заполняются при сборке
+# представлений): язык -> {word_id / phrase_id: запись}
+_word_index: Dict[str, Dict[str, dict]] = {lang: {} for lang in VIEW_LANGS}
+_phrase_index: Dict[str, Dict[str, dict]] = {lang: {} for lang in VIEW_LANGS}
+# id тестов, диалогов, тем культуры и наборов упражнений повторяются между
+# уровнями: вид контента -> {id: (level_key, ...)}
+ITEM_KINDS = ("grammar", "dialogues", "culture", "exercises")
+_item_levels: Dict[str, Dict[str, tuple]] = {kind: {} for kind in ITEM_KINDS}
+# Изменения индексов (ленивые представления, пересборка после перезагрузки)
+_index_lock = threading.Lock()
 
 
 def _localized(data: dict, field: str, lang: str = "ru") -> str:
@@ -52,15 +129,7 @@ def _localized(data: dict, field: str, lang: str = "ru") -> str:
     if lang == "ru" or not lang:
         return data.get(field, "")
 
-    FIELD_MAP = {
-        "name":        {"en": "name_en",        "de": "name_de"},
-        "description": {"en": "description_en", "de": "description_de"},
-        "ru":          {"en": "en",             "de": "de"},
-        "example_ru":  {"en": "example_en",     "de": "example"},
-        "context":     {"en": "context_en",     "de": "context_de"},
-    }
-
-    mapping = FIELD_MAP.get(field)
+    mapping = _FIELD_MAP.get(field)
     if not mapping:
         return data.get(field, "")
 
@@ -76,10 +145,7 @@ def _localized_list(data: dict, field: str, lang: str = "ru") -> list:
     if lang == "ru" or not lang:
         return data.get(field, [])
 
-    LIST_MAP = {
-        "distractors": {"en": "distractors_en", "de": "distractors_de"},
-    }
-    mapping = LIST_MAP.get(field)
+    mapping = _LIST_MAP.get(field)
     if not mapping:
         return data.get(field, [])
 
@@ -89,23 +155,30 @@ def _localized_list(data: dict, field: str, lang: str = "ru") -> list:
     return data.get(field, [])
 
 
+def _active_level() -> tuple:
+    """Уровень текущего контекста, иначе уровень по умолчанию."""
+    return _level_var.get() or _default_level
+
+
 def _get_level_key(major: str = None, sub: str = None) -> str:
     """Получить ключ для кэша на основе уровня."""
     if major is None:
-        major, sub = _current_level
+        major, sub = _active_level()
     return f"{major}_{sub}"
 
 
 def _get_level_path(major: str = None, sub: str = None) -> Path:
     """Получить путь к папке уровня."""
     if major is None:
-        major, sub = _current_level
+        major, sub = _active_level()
     return BASE_DATA_DIR / major / sub
 
 
 def _get_level_cache(major: str = None, sub: str = None) -> dict:
     """Получить или создать кэш для уровня."""
     key = _get_level_key(major, sub)
+    if key not in _cache and key in _bundle_levels:
+        _install_bundled_level(key)
     if key not in _cache:
         _cache[key] = {
             "vocabulary": None,
@@ -114,7 +187,10 @@ def _get_level_cache(major: str = None, sub: str = None) -> dict:
             "dialogues": None,
             "culture": None,
             "exercises": None,
-            "metadata": None
+            "metadata": None,
+            "views": {},
+            # имя файла -> id, для перезагрузки отдельных файлов
+            "sources": {kind: {} for kind in CONTENT_KINDS},
         }
     return _cache[key]
 
@@ -123,9 +199,21 @@ def _get_level_cache(major: str = None, sub: str = None) -> dict:
 # Функции управления уровнями
 # ============================================================
 
+def _parse_level(major, sub) -> Optional[tuple]:
+    """(major, sub) в каноническом виде или None, если такого уровня нет."""
+    if not major or sub is None:
+        return None
+    level = (str(major).upper(), str(sub))
+    return level if level in AVAILABLE_LEVELS else None
+
+
 def set_level(major: str, sub: str) -> bool:
     """
-    Установить текущий уровень.
+    Установить текущий уровень для текущего контекста.
+
+    Действует до конца запроса (web_server сбрасывает его в teardown) или
+    задачи asyncio; на другие запросы не влияет. Уровень по умолчанию для
+    процесса — set_default_level.
     
     Args:
         major: Основной уровень (A1, A2, B1, B2, C1, C2)
@@ -134,71 +222,161 @@ def set_level(major: str, sub: str) -> bool:
     Returns:
         True если уровень установлен успешно
     """
-    global _current_level
-    
-    major = major.upper()
-    sub = str(sub)
-    
-    if (major, sub) not in AVAILABLE_LEVELS:
+    level = _parse_level(major, sub)
+    if level is None:
         logger.error(f"Недопустимый уровень: {major}.{sub}")
         return False
     
-    level_path = _get_level_path(major, sub)
+    level_path = _get_level_path(*level)
     if not level_path.exists():
         logger.warning(f"Папка уровня не существует: {level_path}")
         # Не возвращаем False - уровень может быть пустым, но валидным
     
-    _current_level = (major, sub)
-    logger.info(f"Уровень установлен: {major}.{sub}")
+    _level_var.set(level)
+    return True
+
+
+def set_default_level(major: str, sub: str) -> bool:
+    """Установить уровень по умолчанию для процесса (для контекстов без своего уровня)."""
+    global _default_level
+    level = _parse_level(major, sub)
+    if level is None:
+        logger.error(f"Недопустимый уровень: {major}.{sub}")
+        return False
+    _default_level = level
+    logger.info(f"Уровень по умолчанию: {level[0]}.{level[1]}")
     return True
 
 
+def use_level(major: str = None, sub: str = None) -> contextvars.Token:
+    """Начать область уровня (например, запрос): major/sub или уровень по умолчанию.
+
+    Возвращает токен для reset_level(); неизвестный уровень = по умолчанию.
+    """
+    return _level_var.set(_parse_level(major, sub))
+
+
+def reset_level(token: contextvars.Token) -> None:
+    """Закончить область уровня, начатую use_level()."""
+    _level_var.reset(token)
+
+
 def get_current_level() -> tuple:
     """Получить текущий уровень (major, sub)."""
-    return _current_level
+    return _active_level()
 
 
 def get_current_level_str() -> str:
     """Получить текущий уровень в формате строки (например, 'A1.1')."""
-    major, sub = _current_level
+    major, sub = _active_level()
     return f"{major}.{sub}"
 
 
-def get_available_levels() -> List[dict]:
-    """
-    Получить список доступных уровней с информацией о наличии контента.
-    
-    Returns:
-        Список словарей с информацией об уровнях
-    """
-    levels = []
-    content_subdirs = ("vocabulary", "grammar", "phrases", "dialogues", "culture", "exercises")
+def _get_manifest() -> Dict[tuple, dict]:
+    """Манифест уровней для текущей версии контента.
 
+    Один обход data/ на версию: какие виды контента есть у каждого уровня.
+    Счётчики элементов (get_level_counts) добавляются в запись при первом запросе.
+    """
+    global _manifest
+    manifest = _manifest
+    if manifest is not None and manifest[0] == _content_version:
+        return manifest[1]
+
+    version = _content_version
+    kinds_by_level: Dict[tuple, set] = {}
+    for filepath in _content_files():
+        located = _level_of_file(filepath)
+        if located is not None and located[2] in CONTENT_KINDS:
+            kinds_by_level.setdefault(located[:2], set()).add(located[2])
+
+    entries = {}
     for major, sub in AVAILABLE_LEVELS:
-        level_path = _get_level_path(major, sub)
-        has_content = False
-        if level_path.exists():
-            for subdir in content_subdirs:
-                content_dir = level_path / subdir
-                if content_dir.exists() and any(content_dir.glob("*.json")):
-                    has_content = True
-                    break
-        
-        levels.append({
+        kinds = kinds_by_level.get((major, sub), set())
+        entries[(major, sub)] = {
             "major": major,
             "sub": sub,
             "name": f"{major}.{sub}",
             "display_name": f"Уровень {major}.{sub}",
-            "has_content": has_content,
-            "is_current": (major, sub) == _current_level
-        })
+            "has_content": bool(kinds),
+            "kinds": tuple(kind for kind in CONTENT_KINDS if kind in kinds),
+            "counts": None,
+        }
+    _manifest = (version, entries)
+    return entries
+
+
+def _level_info(entry: dict, current: tuple) -> dict:
+    return {
+        "major": entry["major"],
+        "sub": entry["sub"],
+        "name": entry["name"],
+        "display_name": entry["display_name"],
+        "has_content": entry["has_content"],
+        "is_current": (entry["major"], entry["sub"]) == current,
+    }
+
+
+def get_available_levels() -> List[dict]:
+    """
+    Получить список доступных уровней с информацией о наличии контента.
     
-    return levels
+    Returns:
+        Список словарей с информацией об уровнях
+    """
+    current = _active_level()
+    return [_level_info(entry, current) for entry in _get_manifest().values()]
 
 
 def get_levels_with_content() -> List[dict]:
     """Получить только уровни с контентом."""
-    return [level for level in get_available_levels() if level["has_content"]]
+    current = _active_level()
+    return [_level_info(entry, current) for entry in _get_manifest().values() if entry["has_content"]]
+
+
+_COUNT_NAMES = ("words", "phrases", "questions", "dialogues", "topics", "sets")
+
+
+def _count_level(major: str, sub: str, kinds: tuple) -> dict:
+    """Число элементов каждого типа на уровне (по загруженным данным)."""
+    def load(kind):
+        return _load_kind(kind, major, sub) if kind in kinds else {}
+
+    vocabulary, phrases, grammar = load("vocabulary"), load("phrases"), load("grammar")
+    return {
+        "words": sum(len(category.get("words", [])) for category in vocabulary.values()),
+        "phrases": sum(len(category.get("phrases", [])) for category in phrases.values()),
+        "questions": sum(len(test.get("questions", [])) for test in grammar.values()),
+        "dialogues": len(load("dialogues")),
+        "topics": len(load("culture")),
+        "sets": len(load("exercises")),
+    }
+
+
+def get_level_counts(major: str = None, sub: str = None) -> dict:
+    """Счётчики уровня: words, phrases, questions, dialogues, topics (культура), sets (упражнения).
+
+    Считаются один раз на версию контента; у уровня без контента все нули.
+    """
+    if major is None:
+        major, sub = _active_level()
+    entry = _get_manifest().get((major, sub))
+    if entry is None:
+        return dict.fromkeys(_COUNT_NAMES, 0)
+    counts = entry["counts"]
+    if counts is None:
+        counts = entry["counts"] = _count_level(major, sub, entry["kinds"])
+    return dict(counts)
+
+
+def get_total_counts(major: str = None) -> dict:
+    """Сумма счётчиков get_level_counts по уровням с контентом (только блока *major*, если задан)."""
+    totals = dict.fromkeys(_COUNT_NAMES, 0)
+    for (level_major, sub), entry in _get_manifest().items():
+        if entry["has_content"] and major in (None, level_major):
+            for name, value in get_level_counts(level_major, sub).items():
+                totals[name] += value
+    return totals
 
 
 # ============================================================
@@ -218,6 +396,29 @@ def _load_json(filepath: Path) -> dict:
         return {}
 
 
+def _content_files() -> list:
+    """Все JSON файлы уровней (metadata.json и файлы контента) и диагностический тест, отсортированные."""
+    files = []
+    for major, sub in AVAILABLE_LEVELS:
+        level_path = _get_level_path(major, sub)
+        if level_path.exists():
+            files.extend(level_path.rglob("*.json"))
+    files.extend(path for path in _DIAGNOSTIC_FILES if path.exists())
+    return sorted(files)
+
+
+def _read_content_file(kind: str, filepath: Path) -> Optional[dict]:
+    """Прочитать один файл контента; None если он пустой, битый или без id."""
+    data = _load_json(filepath)
+    if not data or "id" not in data:
+        return None
+    if kind == "vocabulary":
+        return _compact_category(data, "words", WordEntry)
+    if kind == "phrases":
+        return _compact_category(data, "phrases", PhraseEntry)
+    return data
+
+
 def get_metadata(major: str = None, sub: str = None) -> dict:
     """Получить метаданные уровня."""
     cache = _get_level_cache(major, sub)
@@ -227,206 +428,637 @@ def get_metadata(major: str = None, sub: str = None) -> dict:
     return cache["metadata"] or {}
 
 
-def _load_all_vocabulary(major: str = None, sub: str = None) -> dict:
-    """Загрузить все категории словаря для уровня."""
+# вид контента -> (чья папка не найдена, что загружено) для логов
+_KIND_LABELS = {
+    "vocabulary": ("словаря", "категорий словаря"),
+    "grammar": ("грамматики", "грамматических тем"),
+    "phrases": ("phrases", "категорий phrases"),
+    "dialogues": ("dialogues", "диалогов"),
+    "culture": ("culture", "тем культуры"),
+    "exercises": ("exercises", "наборов упражнений"),
+}
+
+# Файлы одной папки читаются и разбираются параллельно (1 — по очереди)
+LOAD_WORKERS = CONTENT_LOAD_WORKERS or min(4, os.cpu_count() or 1)
+_load_pool: Optional[ThreadPoolExecutor] = None
+# Загрузка видов контента и построение представлений (по одному за раз,
+# чтобы фоновый прогрев и запросы не грузили одно и то же дважды)
+_content_lock = threading.RLock()
+# level_key -> {вид контента или "views": секунды}
+_load_times: Dict[str, Dict[str, float]] = {}
+
+
+def _parse_files(kind: str, files: list) -> list:
+    """Прочитать файлы одного вида; порядок результатов = порядок files."""
+    global _load_pool
+    if len(files) < 2 or LOAD_WORKERS < 2:
+        return [_read_content_file(kind, f) for f in files]
+    if _load_pool is None:
+        _load_pool = ThreadPoolExecutor(LOAD_WORKERS, thread_name_prefix="content-load")
+    return list(_load_pool.map(functools.partial(_read_content_file, kind), files))
+
+
+def _load_kind(kind: str, major: str = None, sub: str = None) -> dict:
+    """Загрузить все файлы вида контента для уровня (при первом обращении).
+
+    Данные собираются отдельно и появляются в кэше целиком.
+    """
     cache = _get_level_cache(major, sub)
-    
-    if cache["vocabulary"] is not None:
-        return cache["vocabulary"]
+    if cache[kind] is not None:
+        return cache[kind]
+
+    with _content_lock:
+        if cache[kind] is not None:
+            return cache[kind]
+        level_key = _get_level_key(major, sub)
+        started = time.perf_counter()
+        items, sources = {}, {}
+        kind_dir = _get_level_path(major, sub) / kind
+        if not kind_dir.exists():
+            logger.warning(f"Папка {_KIND_LABELS[kind][0]} не найдена: {kind_dir}")
+        else:
+            files = list(kind_dir.glob("*.json"))
+            for json_file, data in zip(files, _parse_files(kind, files)):
+                if data:
+                    items[data["id"]] = data
+                    sources[json_file.name] = data["id"]
+        cache["sources"][kind] = sources
+        cache[kind] = items
+        _load_times.setdefault(level_key, {})[kind] = time.perf_counter() - started
 
-    cache["vocabulary"] = {}
-    vocab_dir = _get_level_path(major, sub) / "vocabulary"
-    if not vocab_dir.exists():
-        logger.warning(f"Папка словаря не найдена: {vocab_dir}")
-        return {}
-    
-    for json_file in vocab_dir.glob("*.json"):
-        try:
-            data = _load_json(json_file)
-            if data and "id" in data:
-                cache["vocabulary"][data["id"]] = data
-        except Exception as e:
-            logger.error(f"Ошибка загрузки {json_file}: {e}")
-    
-    logger.info(f"Загружено {len(cache['vocabulary'])} категорий словаря для уровня {_get_level_key(major, sub)}")
-    return cache["vocabulary"]
+    logger.info(f"Загружено {len(items)} {_KIND_LABELS[kind][1]} для уровня {level_key}")
+    return items
+
+
+def _load_all_vocabulary(major: str = None, sub: str = None) -> dict:
+    """Загрузить все категории словаря для уровня."""
+    return _load_kind("vocabulary", major, sub)
 
 
 def _load_all_grammar(major: str = None, sub: str = None) -> dict:
     """Загрузить все грамматические тесты для уровня."""
-    cache = _get_level_cache(major, sub)
-    
-    if cache["grammar"] is not None:
-        return cache["grammar"]
-
-    cache["grammar"] = {}
-    grammar_dir = _get_level_path(major, sub) / "grammar"
-    if not grammar_dir.exists():
-        logger.warning(f"Папка грамматики не найдена: {grammar_dir}")
-        return {}
-    
-    for json_file in grammar_dir.glob("*.json"):
-        try:
-            data = _load_json(json_file)
-            if data and "id" in data:
-                cache["grammar"][data["id"]] = data
-        except Exception as e:
-            logger.error(f"Ошибка загрузки {json_file}: {e}")
-    
-    logger.info(f"Загружено {len(cache['grammar'])} грамматических тем для уровня {_get_level_key(major, sub)}")
-    return cache["grammar"]
+    return _load_kind("grammar", major, sub)
 
 
 def _load_all_phrases(major: str = None, sub: str = None) -> dict:
     """Загрузить все категории фраз для уровня."""
-    cache = _get_level_cache(major, sub)
-    
-    if cache["phrases"] is not None:
-        return cache["phrases"]
-
-    cache["phrases"] = {}
-    phrases_dir = _get_level_path(major, sub) / "phrases"
-    if not phrases_dir.exists():
-        logger.warning(f"Папка phrases не найдена: {phrases_dir}")
-        return {}
-    
-    for json_file in phrases_dir.glob("*.json"):
-        try:
-            data = _load_json(json_file)
-            if data and "id" in data:
-                cache["phrases"][data["id"]] = data
-        except Exception as e:
-            logger.error(f"Ошибка загрузки {json_file}: {e}")
-    
-    logger.info(f"Загружено {len(cache['phrases'])} категорий phrases для уровня {_get_level_key(major, sub)}")
-    return cache["phrases"]
+    return _load_kind("phrases", major, sub)
 
 
 def _load_all_dialogues(major: str = None, sub: str = None) -> dict:
     """Загрузить все диалоги для уровня."""
-    cache = _get_level_cache(major, sub)
-    
-    if cache["dialogues"] is not None:
-        return cache["dialogues"]
-
-    cache["dialogues"] = {}
-    dialogues_dir = _get_level_path(major, sub) / "dialogues"
-    if not dialogues_dir.exists():
-        logger.warning(f"Папка dialogues не найдена: {dialogues_dir}")
-        return {}
-    
-    for json_file in dialogues_dir.glob("*.json"):
-        try:
-            data = _load_json(json_file)
-            if data and "id" in data:
-                cache["dialogues"][data["id"]] = data
-        except Exception as e:
-            logger.error(f"Ошибка загрузки {json_file}: {e}")
-    
-    logger.info(f"Загружено {len(cache['dialogues'])} диалогов для уровня {_get_level_key(major, sub)}")
-    return cache["dialogues"]
+    return _load_kind("dialogues", major, sub)
 
 
 def _load_all_culture(major: str = None, sub: str = None) -> dict:
     """Загрузить все темы культуры для уровня."""
-    cache = _get_level_cache(major, sub)
+    return _load_kind("culture", major, sub)
 
-    if cache["culture"] is not None:
-        return cache["culture"]
 
-    cache["culture"] = {}
-    culture_dir = _get_level_path(major, sub) / "culture"
-    if not culture_dir.exists():
-        logger.warning(f"Папка culture не найдена: {culture_dir}")
-        return {}
+def _load_all_exercises(major: str = None, sub: str = None) -> dict:
+    """Загрузить все наборы упражнений для уровня."""
+    return _load_kind("exercises", major, sub)
 
-    for json_file in culture_dir.glob("*.json"):
-        try:
-            data = _load_json(json_file)
-            if data and "id" in data:
-                cache["culture"][data["id"]] = data
-        except Exception as e:
-            logger.error(f"Ошибка загрузки {json_file}: {e}")
 
-    logger.info(f"Загружено {len(cache['culture'])} тем культуры для уровня {_get_level_key(major, sub)}")
-    return cache["culture"]
+def get_load_times() -> Dict[str, Dict[str, float]]:
+    """Время загрузки по уровням, мс: {level_key: {вид контента или "views": мс}}."""
+    return {
+        level_key: {part: round(seconds * 1000, 1) for part, seconds in parts.items()}
+        for level_key, parts in _load_times.items()
+    }
 
 
-def _load_all_exercises(major: str = None, sub: str = None) -> dict:
-    """Загрузить все наборы упражнений для уровня."""
+# ============================================================
+# Предвычисленные представления уровня
+# ============================================================
+
+class ContentRecord:
+    """Неизменяемая запись со слотами; читается как dict (w["ru"], w.get(...)).
+
+    Вдвое-втрое меньше dict с теми же полями. Отсутствующие в JSON поля не
+    заполняются и ведут себя как отсутствующие ключи. Для JSON-ответов —
+    to_dict() (web_server регистрирует это в JSON-провайдере Flask).
+    """
+
+    __slots__ = ()
+    _fields = frozenset()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._fields = frozenset(cls.__slots__)
+        # Запись слотов в обход __setattr__ (для распаковки из pickle)
+        cls._setters = tuple(cls.__dict__[name].__set__ for name in cls.__slots__)
+
+    def __init__(self, **fields):
+        for name, value in fields.items():
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise TypeError("content records are read-only; copy with dict(record)")
+
+    __delattr__ = __setattr__
+
+    def __getitem__(self, key):
+        if key in self._fields:
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                pass
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        if key in self._fields:
+            return getattr(self, key, default)
+        return default
+
+    def __contains__(self, key) -> bool:
+        return key in self._fields and hasattr(self, key)
+
+    def keys(self) -> list:
+        return [name for name in self.__slots__ if hasattr(self, name)]
+
+    def values(self) -> list:
+        return [getattr(self, name) for name in self.keys()]
+
+    def items(self) -> list:
+        return [(name, getattr(self, name)) for name in self.keys()]
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self) -> int:
+        return len(self.keys())
+
+    def to_dict(self) -> dict:
+        return dict(self.items())
+
+    def __eq__(self, other):
+        if isinstance(other, ContentRecord):
+            return type(self) is type(other) and self.items() == other.items()
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+    def __reduce__(self):
+        return (_rebuild_record, (type(self), tuple(getattr(self, name, _Unset) for name in self.__slots__)))
+
+
+class _Unset:
+    """Незаполненный слот в pickle записи (класс сериализуется ссылкой)."""
+
+
+def _rebuild_record(cls, values: tuple):
+    record = object.__new__(cls)
+    for setter, value in zip(cls._setters, values):
+        if value is not _Unset:
+            setter(record, value)
+    return record
+
+
+Mapping.register(ContentRecord)
+
+
+class WordEntry(ContentRecord):
+    """Слово из JSON-файла словаря (все языки)."""
+    __slots__ = ("de", "ru", "en", "example", "example_ru", "example_en", "category")
+
+
+class PhraseEntry(ContentRecord):
+    """Фраза из JSON-файла phrases (все языки)."""
+    __slots__ = ("de", "ru", "en", "context", "context_en", "context_de",
+                 "example", "example_ru", "example_en")
+
+
+class WordRecord(ContentRecord):
+    """Слово в представлении уровня для одного языка."""
+    __slots__ = ("de", "ru", "example", "example_ru",
+                 "category_id", "category_name", "word_id", "level")
+
+
+class PhraseRecord(ContentRecord):
+    """Фраза в представлении уровня для одного языка."""
+    __slots__ = ("de", "ru", "context", "example", "example_ru",
+                 "category_id", "category_name", "phrase_id", "level")
+
+
+# Короткие строки, которые повторяются между уровнями и языками
+_INTERNED_FIELDS = frozenset(("de", "ru", "en", "category"))
+
+
+def _intern(value):
+    return sys.intern(value) if type(value) is str else value
+
+
+def _compact_entries(items: list, entry_cls) -> tuple:
+    """JSON-словари слов/фраз -> кортеж записей со слотами.
+
+    Записи с полями, которых нет в entry_cls, остаются словарями.
+    """
+    fields = frozenset(entry_cls.__slots__)
+    compact = []
+    for item in items:
+        if not isinstance(item, dict) or not fields.issuperset(item):
+            compact.append(item)
+            continue
+        compact.append(entry_cls(**{
+            key: _intern(value) if key in _INTERNED_FIELDS else value
+            for key, value in item.items()
+        }))
+    return tuple(compact)
+
+
+def _compact_category(data: dict, items_key: str, entry_cls) -> dict:
+    """Интернировать id/названия категории и сжать её слова или фразы."""
+    for key in ("id", "name", "name_en", "name_de", "level"):
+        if key in data:
+            data[key] = _intern(data[key])
+    data[items_key] = _compact_entries(data.get(items_key, []), entry_cls)
+    return data
+
+
+class FrozenDict(dict):
+    """dict только для чтения: записи представлений общие для всех вызовов.
+
+    Сериализуется в JSON как обычный dict; для изменений — dict(record).
+    """
+
+    __slots__ = ()
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("content records are read-only; copy with dict(record)")
+
+    __setitem__ = __delitem__ = __ior__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+
+    def __reduce__(self):
+        return (FrozenDict, (dict(self),))
+
+
+# Поле представления -> вид контента, из которого оно строится
+_VIEW_FIELDS = {
+    "words": "vocabulary", "words_by_category": "vocabulary", "categories": "vocabulary",
+    "phrases": "phrases", "phrases_by_category": "phrases", "phrase_categories": "phrases",
+    "tests": "grammar",
+    "dialogue_topics": "dialogues",
+    "culture_topics": "culture",
+    "exercise_sets": "exercises", "exercise_set_by_id": "exercises",
+}
+
+
+class _LevelView:
+    """Списки одного уровня на одном языке, собранные один раз.
+
+    Поля строятся группами по виду контента при первом обращении (вместе с
+    загрузкой этого вида), так что, например, слова не тянут за собой диалоги.
+    """
+
+    __slots__ = (*_VIEW_FIELDS, "level_key", "cache", "lang", "built")
+
+    def __init__(self, level_key: str, cache: dict, lang: str):
+        self.level_key = sys.intern(level_key)
+        self.cache = cache
+        self.lang = lang
+        self.built = set()
+
+    def __getattr__(self, name):
+        kind = _VIEW_FIELDS.get(name)
+        if kind is None:
+            raise AttributeError(name)
+        self.build(kind)
+        return object.__getattribute__(self, name)
+
+    def build(self, kind: str) -> None:
+        """Построить поля вида *kind* (и загрузить его при необходимости)."""
+        if kind in self.built:
+            return
+        with _content_lock:
+            if kind in self.built:
+                return
+            items = self.cache[kind]
+            if items is None:
+                items = _load_kind(kind, *self.level_key.split("_"))
+            _VIEW_BUILDERS[kind](self, items)
+            self.built.add(kind)
+            # Представления старого снимка (после горячей перезагрузки) не индексируются
+            if _cache.get(self.level_key) is self.cache:
+                with _index_lock:
+                    _add_section_to_indexes(
+                        (_word_index, _phrase_index, _item_levels), self.level_key, self.lang, self, kind
+                    )
+
+    def build_all(self) -> None:
+        for kind in CONTENT_KINDS:
+            self.build(kind)
+
+
+def _view_lang(lang: str) -> str:
+    return lang if lang in VIEW_LANGS else "ru"
+
+
+def _build_vocabulary_view(view: _LevelView, vocabulary: dict) -> None:
+    level_key, lang = view.level_key, view.lang
+    words_by_category = {}
+    categories = []
+    for category_id, category in vocabulary.items():
+        category_name = _intern(_localized(category, "name", lang))
+        words = category.get("words", [])
+        words_by_category[category_id] = tuple(
+            WordRecord(
+                de=word.get("de", ""),
+                ru=_localized(word, "ru", lang),
+                example=word.get("example", ""),
+                example_ru=_localized(word, "example_ru", lang),
+                category_id=category_id,
+                category_name=category_name,
+                # один объект строки на все языковые представления
+                word_id=sys.intern(f"{level_key}_{category_id}_{word.get('de', '')}"),
+                level=level_key,
+            )
+            for word in words
+        )
+        categories.append(FrozenDict(
+            id=category_id,
+            name=category_name,
+            name_de=category.get("name_de", ""),
+            description=_localized(category, "description", lang),
+            count=len(words),
+            level=level_key,
+        ))
+    view.words_by_category = words_by_category
+    view.words = tuple(w for words in words_by_category.values() for w in words)
+    view.categories = tuple(categories)
+
+
+def _build_phrases_view(view: _LevelView, phrases_data: dict) -> None:
+    level_key, lang = view.level_key, view.lang
+    phrases_by_category = {}
+    phrase_categories = []
+    for category_id, category in phrases_data.items():
+        category_name = _intern(_localized(category, "name", lang))
+        phrases = category.get("phrases", [])
+        phrases_by_category[category_id] = tuple(
+            PhraseRecord(
+                de=phrase.get("de", ""),
+                ru=_localized(phrase, "ru", lang),
+                context=_localized(phrase, "context", lang),
+                example=phrase.get("example", ""),
+                example_ru=_localized(phrase, "example_ru", lang),
+                category_id=category_id,
+                category_name=category_name,
+                phrase_id=sys.intern(f"{level_key}_{category_id}_{phrase.get('de', '')}"),
+                level=level_key,
+            )
+            for phrase in phrases
+        )
+        phrase_categories.append(FrozenDict(
+            id=category_id,
+            name=category_name,
+            name_de=category.get("name_de", ""),
+            description=_localized(category, "description", lang),
+            count=len(phrases),
+            level=level_key,
+        ))
+    view.phrases_by_category = phrases_by_category
+    view.phrase_categories = tuple(phrase_categories)
+    # Плоский список без дубликатов по phrase_id
+    unique = {}
+    for phrases in phrases_by_category.values():
+        for phrase in phrases:
+            unique.setdefault(phrase["phrase_id"], phrase)
+    view.phrases = tuple(unique.values())
+
+
+def _build_grammar_view(view: _LevelView, grammar: dict) -> None:
+    level_key, lang = view.level_key, view.lang
+    view.tests = tuple(
+        FrozenDict(
+            id=test_id,
+            name=_localized(test, "name", lang),
+            name_de=test.get("name_de", ""),
+            description=_localized(test, "description", lang),
+            questions_count=len(test.get("questions", [])),
+            level=level_key,
+        )
+        for test_id, test in grammar.items()
+    )
+
+
+def _build_dialogues_view(view: _LevelView, dialogues: dict) -> None:
+    level_key, lang = view.level_key, view.lang
+    view.dialogue_topics = tuple(
+        FrozenDict(
+            id=topic_id,
+            name=_localized(topic, "name", lang),
+            name_de=topic.get("name_de", ""),
+            description=_localized(topic, "description", lang),
+            dialogue_length=len(topic.get("dialogue", [])),
+            level=level_key,
+        )
+        for topic_id, topic in dialogues.items()
+    )
+
+
+def _build_culture_view(view: _LevelView, culture: dict) -> None:
+    level_key, lang = view.level_key, view.lang
+    view.culture_topics = tuple(
+        FrozenDict(
+            id=topic_id,
+            name=_localized(topic, "name", lang),
+            name_de=topic.get("name_de", ""),
+            description=_localized(topic, "description", lang),
+            level=level_key,
+        )
+        for topic_id, topic in culture.items()
+    )
+
+
+def _build_exercises_view(view: _LevelView, exercises: dict) -> None:
+    level_key, lang = view.level_key, view.lang
+    view.exercise_sets = tuple(
+        FrozenDict(
+            id=set_id,
+            name=_localized(data, "name", lang),
+            name_de=data.get("name_de", ""),
+            description=_localized(data, "description", lang),
+            tasks_count=len(data.get("tasks", [])),
+            level=level_key,
+        )
+        for set_id, data in exercises.items()
+    )
+    view.exercise_set_by_id = {
+        set_id: FrozenDict(
+            id=data.get("id"),
+            name=_localized(data, "name", lang),
+            name_de=data.get("name_de", ""),
+            description=_localized(data, "description", lang),
+            level=data.get("level", ""),
+            linked_to=tuple(data.get("linked_to", [])),
+        )
+        for set_id, data in exercises.items()
+    }
+
+
+_VIEW_BUILDERS = {
+    "vocabulary": _build_vocabulary_view,
+    "phrases": _build_phrases_view,
+    "grammar": _build_grammar_view,
+    "dialogues": _build_dialogues_view,
+    "culture": _build_culture_view,
+    "exercises": _build_exercises_view,
+}
+
+
+def _build_view(level_key: str, cache: dict, lang: str = "ru", kinds=CONTENT_KINDS) -> _LevelView:
+    """Представление уровня для языка *lang* по кэшу уровня; сразу строятся *kinds*."""
+    view = _LevelView(level_key, cache, lang)
+    for kind in kinds:
+        view.build(kind)
+    return view
+
+
+def _get_view(major: str = None, sub: str = None, lang: str = "ru") -> _LevelView:
+    """Представление уровня для языка; поля строятся при первом обращении."""
+    lang = _view_lang(lang)
     cache = _get_level_cache(major, sub)
+    view = cache["views"].get(lang)
+    if view is None:
+        view = cache["views"].setdefault(lang, _LevelView(_get_level_key(major, sub), cache, lang))
+    return view
+
+
+def _index_view(level_key: str, lang: str, view: _LevelView) -> None:
+    """Добавить построенные поля представления в глобальные индексы."""
+    with _index_lock:
+        _add_to_indexes((_word_index, _phrase_index, _item_levels), level_key, lang, view)
+
+
+def _add_to_indexes(indexes: tuple, level_key: str, lang: str, view: _LevelView) -> None:
+    for kind in tuple(view.built):
+        _add_section_to_indexes(indexes, level_key, lang, view, kind)
+
+
+# Вид контента -> поле представления со списком элементов (для _item_levels)
+_ITEM_FIELDS = {"grammar": "tests", "dialogues": "dialogue_topics", "culture": "culture_topics", "exercises": "exercise_sets"}
+
+
+def _add_section_to_indexes(indexes: tuple, level_key: str, lang: str, view: _LevelView, kind: str) -> None:
+    word_index, phrase_index, item_levels = indexes
+    if kind == "vocabulary":
+        words = word_index[lang]
+        for word in view.words:
+            words.setdefault(word["word_id"], word)
+        return
+    if kind == "phrases":
+        phrases = phrase_index[lang]
+        for phrase in view.phrases:
+            phrases.setdefault(phrase["phrase_id"], phrase)
+        return
+
+    levels = item_levels[kind]
+    for item in getattr(view, _ITEM_FIELDS[kind]):
+        present = levels.get(item["id"], ())
+        if level_key not in present:
+            levels[item["id"]] = present + (level_key,)
+
+
+def _unindex_level(level_key: str) -> None:
+    """Убрать уровень из глобальных индексов (перед перезагрузкой)."""
+    with _index_lock:
+        _remove_from_indexes(level_key)
+
+
+def _remove_from_indexes(level_key: str) -> None:
+    for index in (*_word_index.values(), *_phrase_index.values()):
+        for item_id in [i for i, record in index.items() if record["level"] == level_key]:
+            del index[item_id]
+    for levels in _item_levels.values():
+        for item_id, present in list(levels.items()):
+            if level_key in present:
+                rest = tuple(k for k in present if k != level_key)
+                if rest:
+                    levels[item_id] = rest
+                else:
+                    del levels[item_id]
+
+
+def _clear_indexes() -> None:
+    with _index_lock:
+        for index in (*_word_index.values(), *_phrase_index.values(), *_item_levels.values()):
+            index.clear()
+
+
+def _reindex() -> None:
+    """Пересобрать глобальные индексы по всем представлениям и подменить их целиком."""
+    global _word_index, _phrase_index, _item_levels
+    with _index_lock:
+        indexes = (
+            {lang: {} for lang in VIEW_LANGS},
+            {lang: {} for lang in VIEW_LANGS},
+            {kind: {} for kind in ITEM_KINDS},
+        )
+        for level_key, level_cache in list(_cache.items()):
+            for lang, view in list(level_cache["views"].items()):
+                _add_to_indexes(indexes, level_key, lang, view)
+        _word_index, _phrase_index, _item_levels = indexes
+
+
+def _ensure_level_indexed(item_id: str, lang: str, kind: str) -> bool:
+    """Загрузить вид *kind* уровня из префикса id ("A1_1_...") для языка; True если загружен сейчас."""
+    parts = item_id.split("_", 2)
+    if len(parts) < 3 or (parts[0], parts[1]) not in AVAILABLE_LEVELS:
+        return False
+    view = _get_view(parts[0], parts[1], lang)
+    if kind in view.built:
+        return False
+    view.build(kind)
+    return True
 
-    if cache["exercises"] is not None:
-        return cache["exercises"]
 
-    cache["exercises"] = {}
-    exercises_dir = _get_level_path(major, sub) / "exercises"
-    if not exercises_dir.exists():
-        logger.warning(f"Папка exercises не найдена: {exercises_dir}")
-        return {}
+def _lookup_ids(indexes: Dict[str, Dict[str, dict]], item_ids: list, lang: str, kind: str) -> list:
+    """Записи по id в порядке item_ids, без повторов; неизвестные id пропускаются."""
+    lang = _view_lang(lang)
+    index = indexes[lang]
+    result = []
+    for item_id in dict.fromkeys(item_ids):
+        record = index.get(item_id)
+        if record is None and _ensure_level_indexed(item_id, lang, kind):
+            record = index.get(item_id)
+        if record is not None:
+            result.append(record)
+    return result
 
-    for json_file in exercises_dir.glob("*.json"):
-        try:
-            data = _load_json(json_file)
-            if data and "id" in data:
-                cache["exercises"][data["id"]] = data
-        except Exception as e:
-            logger.error(f"Ошибка загрузки {json_file}: {e}")
 
-    logger.info(f"Загружено {len(cache['exercises'])} наборов упражнений для уровня {_get_level_key(major, sub)}")
-    return cache["exercises"]
+def get_item_levels(kind: str, item_id: str) -> tuple:
+    """Уровни (level_key), где есть тест/диалог/тема/набор с этим id.
+
+    kind: "grammar", "dialogues", "culture" или "exercises".
+    Учитываются только загруженные уровни и виды контента (init_all_levels
+    и warm_up_content загружают всё).
+    """
+    return _item_levels[kind].get(item_id, ())
+
+
+def _build_views(major: str = None, sub: str = None) -> None:
+    """Построить представления уровня для всех языков (при загрузке)."""
+    for lang in VIEW_LANGS:
+        _get_view(major, sub, lang).build_all()
 
 
 # ============================================================
 # API совместимый с vocabulary.py (использует текущий уровень)
 # ============================================================
 
-def get_all_words(major: str = None, sub: str = None, lang: str = "ru") -> list:
+def get_all_words(major: str = None, sub: str = None, lang: str = "ru") -> tuple:
     """Получить все слова как плоский список."""
-    vocabulary = _load_all_vocabulary(major, sub)
-    all_words = []
+    return _get_view(major, sub, lang).words
 
-    level_key = _get_level_key(major, sub)
 
-    for category_id, category in vocabulary.items():
-        for word in category.get("words", []):
-            all_words.append({
-                "de": word.get("de", ""),
-                "ru": _localized(word, "ru", lang),
-                "example": word.get("example", ""),
-                "example_ru": _localized(word, "example_ru", lang),
-                "category_id": category_id,
-                "category_name": _localized(category, "name", lang),
-                "word_id": f"{level_key}_{category_id}_{word.get('de', '')}",
-                "level": level_key
-            })
-
-    return all_words
-
-
-def get_words_by_category(category_id: str, major: str = None, sub: str = None, lang: str = "ru") -> list:
+def get_words_by_category(category_id: str, major: str = None, sub: str = None, lang: str = "ru") -> tuple:
     """Получить слова из определённой категории."""
-    vocabulary = _load_all_vocabulary(major, sub)
-
-    if category_id not in vocabulary:
-        return []
-
-    category = vocabulary[category_id]
-    level_key = _get_level_key(major, sub)
-
-    return [
-        {
-            "de": word.get("de", ""),
-            "ru": _localized(word, "ru", lang),
-            "example": word.get("example", ""),
-            "example_ru": _localized(word, "example_ru", lang),
-            "category_id": category_id,
-            "category_name": _localized(category, "name", lang),
-            "word_id": f"{level_key}_{category_id}_{word.get('de', '')}",
-            "level": level_key
-        }
-        for word in category.get("words", [])
-    ]
+    return _get_view(major, sub, lang).words_by_category.get(category_id, ())
 
 
 def get_category_distractors(category_id: str, major: str = None, sub: str = None, lang: str = "ru") -> list:
@@ -440,44 +1072,18 @@ def get_category_distractors(category_id: str, major: str = None, sub: str = Non
     return _localized_list(category, "distractors", lang)
 
 
-def get_categories(major: str = None, sub: str = None, lang: str = "ru") -> list:
+def get_categories(major: str = None, sub: str = None, lang: str = "ru") -> tuple:
     """Получить список всех категорий."""
-    vocabulary = _load_all_vocabulary(major, sub)
-    level_key = _get_level_key(major, sub)
-
-    return [
-        {
-            "id": cat_id,
-            "name": _localized(cat, "name", lang),
-            "name_de": cat.get("name_de", ""),
-            "description": _localized(cat, "description", lang),
-            "count": len(cat.get("words", [])),
-            "level": level_key
-        }
-        for cat_id, cat in vocabulary.items()
-    ]
+    return _get_view(major, sub, lang).categories
 
 
 # ============================================================
 # API совместимый с grammar.py
 # ============================================================
 
-def get_all_tests(major: str = None, sub: str = None, lang: str = "ru") -> list:
+def get_all_tests(major: str = None, sub: str = None, lang: str = "ru") -> tuple:
     """Получить список всех тестов."""
-    grammar = _load_all_grammar(major, sub)
-    level_key = _get_level_key(major, sub)
-
-    return [
-        {
-            "id": test_id,
-            "name": _localized(test, "name", lang),
-            "name_de": test.get("name_de", ""),
-            "description": _localized(test, "description", lang),
-            "questions_count": len(test.get("questions", [])),
-            "level": level_key
-        }
-        for test_id, test in grammar.items()
-    ]
+    return _get_view(major, sub, lang).tests
 
 
 def get_test(test_id: str, major: str = None, sub: str = None) -> Optional[dict]:
@@ -505,7 +1111,28 @@ def get_grammar_theory(test_id: str, major: str = None, sub: str = None) -> Opti
 def format_grammar_theory_text(
     test_id: str, major: str = None, sub: str = None, lang: str = "ru", max_len: int = 4000
 ) -> Optional[str]:
-    """Собрать текст теории по теме теста для отправки пользователю (plain text)."""
+    """Текст теории по теме теста для отправки пользователю (plain text).
+
+    Собирается один раз на версию контента, уровень и язык; дальше отдаётся
+    из кэша (бот и /api/tests/<id>/questions).  Кэшируются только найденные
+    тексты на языках VIEW_LANGS — чужие id и коды языков не раздувают кэш.
+    """
+    global _theory_texts
+    version = _content_version
+    texts = _theory_texts
+    if texts is None or texts[0] != version:
+        texts = _theory_texts = (version, {})
+    key = (_get_level_key(major, sub), test_id, lang, max_len)
+    text = texts[1].get(key)
+    if text is None:
+        text = _render_grammar_theory_text(test_id, major, sub, lang, max_len)
+        if text is not None and lang in VIEW_LANGS:
+            texts[1][key] = text
+    return text
+
+
+def _render_grammar_theory_text(test_id: str, major: str, sub: str, lang: str, max_len: int) -> Optional[str]:
+    """Собрать текст теории из блоков темы для языка *lang*."""
     theory = get_grammar_theory(test_id, major, sub)
     if not theory or not isinstance(theory, dict):
         return None
@@ -582,70 +1209,23 @@ def get_grammar_stats(major: str = None, sub: str = None) -> dict:
 # API для Phrases
 # ============================================================
 
-def get_phrases_categories(major: str = None, sub: str = None, lang: str = "ru") -> list:
+def get_phrases_categories(major: str = None, sub: str = None, lang: str = "ru") -> tuple:
     """Получить список всех категорий phrases."""
-    phrases = _load_all_phrases(major, sub)
-    level_key = _get_level_key(major, sub)
+    return _get_view(major, sub, lang).phrase_categories
 
-    return [
-        {
-            "id": cat_id,
-            "name": _localized(cat, "name", lang),
-            "name_de": cat.get("name_de", ""),
-            "description": _localized(cat, "description", lang),
-            "count": len(cat.get("phrases", [])),
-            "level": level_key
-        }
-        for cat_id, cat in phrases.items()
-    ]
 
-
-def get_phrases_by_category(category_id: str, major: str = None, sub: str = None, lang: str = "ru") -> list:
+def get_phrases_by_category(category_id: str, major: str = None, sub: str = None, lang: str = "ru") -> tuple:
     """Получить phrases из определённой категории."""
-    phrases = _load_all_phrases(major, sub)
-
-    if category_id not in phrases:
-        return []
-
-    category = phrases[category_id]
-    level_key = _get_level_key(major, sub)
-
-    return [
-        {
-            "de": phrase.get("de", ""),
-            "ru": _localized(phrase, "ru", lang),
-            "context": _localized(phrase, "context", lang),
-            "example": phrase.get("example", ""),
-            "example_ru": _localized(phrase, "example_ru", lang),
-            "category_id": category_id,
-            "category_name": _localized(category, "name", lang),
-            "phrase_id": f"{level_key}_{category_id}_{phrase.get('de', '')}",
-            "level": level_key
-        }
-        for phrase in category.get("phrases", [])
-    ]
+    return _get_view(major, sub, lang).phrases_by_category.get(category_id, ())
 
 
 # ============================================================
 # API для Dialogues
 # ============================================================
 
-def get_dialogue_topics(major: str = None, sub: str = None, lang: str = "ru") -> list:
+def get_dialogue_topics(major: str = None, sub: str = None, lang: str = "ru") -> tuple:
     """Получить список всех тем dialogues."""
-    dialogues = _load_all_dialogues(major, sub)
-    level_key = _get_level_key(major, sub)
-
-    return [
-        {
-            "id": topic_id,
-            "name": _localized(topic, "name", lang),
-            "name_de": topic.get("name_de", ""),
-            "description": _localized(topic, "description", lang),
-            "dialogue_length": len(topic.get("dialogue", [])),
-            "level": level_key
-        }
-        for topic_id, topic in dialogues.items()
-    ]
+    return _get_view(major, sub, lang).dialogue_topics
 
 
 def get_dialogue(topic_id: str, major: str = None, sub: str = None) -> Optional[dict]:
@@ -666,21 +1246,9 @@ def get_dialogue_exercises(topic_id: str, major: str = None, sub: str = None) ->
 # API для Culture
 # ============================================================
 
-def get_culture_topics(major: str = None, sub: str = None, lang: str = "ru") -> list:
+def get_culture_topics(major: str = None, sub: str = None, lang: str = "ru") -> tuple:
     """Получить список всех тем культуры."""
-    culture = _load_all_culture(major, sub)
-    level_key = _get_level_key(major, sub)
-
-    return [
-        {
-            "id": topic_id,
-            "name": _localized(topic, "name", lang),
-            "name_de": topic.get("name_de", ""),
-            "description": _localized(topic, "description", lang),
-            "level": level_key
-        }
-        for topic_id, topic in culture.items()
-    ]
+    return _get_view(major, sub, lang).culture_topics
 
 
 def get_culture_topic(topic_id: str, major: str = None, sub: str = None) -> Optional[dict]:
@@ -693,38 +1261,14 @@ def get_culture_topic(topic_id: str, major: str = None, sub: str = None) -> Opti
 # API для Exercises
 # ============================================================
 
-def get_exercise_sets(major: str = None, sub: str = None, lang: str = "ru") -> list:
+def get_exercise_sets(major: str = None, sub: str = None, lang: str = "ru") -> tuple:
     """Получить список всех наборов упражнений."""
-    exercises = _load_all_exercises(major, sub)
-    level_key = _get_level_key(major, sub)
-
-    return [
-        {
-            "id": set_id,
-            "name": _localized(data, "name", lang),
-            "name_de": data.get("name_de", ""),
-            "description": _localized(data, "description", lang),
-            "tasks_count": len(data.get("tasks", [])),
-            "level": level_key
-        }
-        for set_id, data in exercises.items()
-    ]
+    return _get_view(major, sub, lang).exercise_sets
 
 
 def get_exercise_set(set_id: str, major: str = None, sub: str = None, lang: str = "ru") -> Optional[dict]:
     """Получить один набор упражнений (метаданные, без tasks)."""
-    exercises = _load_all_exercises(major, sub)
-    data = exercises.get(set_id)
-    if not data:
-        return None
-    return {
-        "id": data.get("id"),
-        "name": _localized(data, "name", lang),
-        "name_de": data.get("name_de", ""),
-        "description": _localized(data, "description", lang),
-        "level": data.get("level", ""),
-        "linked_to": data.get("linked_to", []),
-    }
+    return _get_view(major, sub, lang).exercise_set_by_id.get(set_id)
 
 
 def get_exercise_tasks(set_id: str, major: str = None, sub: str = None) -> list:
@@ -740,29 +1284,76 @@ def get_exercise_tasks(set_id: str, major: str = None, sub: str = None) -> list:
 # Diagnostic test
 # ============================================================
 
+def _diagnostic_question_id(question: dict) -> str:
+    """id вопроса: из файла или по тексту вопроса (не меняется при перестановке вопросов)."""
+    if question.get("id"):
+        return str(question["id"])
+    return hashlib.sha1(question.get("question", "").encode("utf-8")).hexdigest()[:12]
+
+
+def _build_diagnostic() -> dict:
+    """Прочитать placement_test.json и разложить вопросы по этапам.
+
+    Каждый вопрос получает "id" и, если вопрос откалиброван, "irt"
+    ({"a", "b", "n"} из placement_irt.json).
+    """
+    data = _load_json(DIAGNOSTIC_PATH) or {}
+    calibration = (_load_json(DIAGNOSTIC_CALIBRATION_PATH) if DIAGNOSTIC_CALIBRATION_PATH.exists() else {}) or {}
+    questions = []
+    for question in data.get("questions", []):
+        record = dict(question, id=_diagnostic_question_id(question))
+        if record["id"] in calibration.get("items", {}):
+            record["irt"] = FrozenDict(calibration["items"][record["id"]])
+        questions.append(FrozenDict(record))
+    questions = tuple(questions)
+    by_stage: Dict[str, list] = {}
+    for question in questions:
+        by_stage.setdefault(question.get("stage_id"), []).append(question)
+    return {
+        "test": FrozenDict(data),
+        "stages": tuple(FrozenDict(stage) for stage in data.get("stages", [])),
+        "questions": questions,
+        "by_stage": {stage_id: tuple(items) for stage_id, items in by_stage.items()},
+    }
+
+
+def _get_diagnostic() -> dict:
+    """Индекс диагностического теста для текущей версии контента.
+
+    Файл читается один раз на версию; изменение файла (content_watcher,
+    apply_content_changes) поднимает версию.
+    """
+    global _diagnostic
+    diagnostic = _diagnostic
+    if diagnostic is not None and diagnostic[0] == _content_version:
+        return diagnostic[1]
+    version = _content_version
+    index = _build_diagnostic()
+    _diagnostic = (version, index)
+    return index
+
+
 def get_diagnostic_test() -> dict:
-    """Load full diagnostic placement test payload."""
-    filepath = BASE_DATA_DIR / "diagnostic" / "placement_test.json"
-    return _load_json(filepath) or {}
+    """Load full diagnostic placement test payload (read-only)."""
+    return _get_diagnostic()["test"]
 
 
 def get_diagnostic_stages() -> list:
     """Return diagnostic stages metadata (ordered)."""
-    return get_diagnostic_test().get("stages", [])
+    return list(_get_diagnostic()["stages"])
 
 
 def get_diagnostic_questions(stage_id: str = None, limit: int = None, shuffle: bool = False) -> list:
-    """Load diagnostic questions; optionally filter by stage."""
-    questions = get_diagnostic_test().get("questions", [])
-    if stage_id:
-        questions = [q for q in questions if q.get("stage_id") == stage_id]
+    """Load diagnostic questions; optionally filter by stage.
 
-    result = list(questions)
+    With shuffle and limit only `limit` questions are sampled.
+    """
+    diagnostic = _get_diagnostic()
+    questions = diagnostic["by_stage"].get(stage_id, ()) if stage_id else diagnostic["questions"]
+    count = limit if isinstance(limit, int) and 0 < limit < len(questions) else len(questions)
     if shuffle:
-        random.shuffle(result)
-    if isinstance(limit, int) and limit > 0:
-        return result[:limit]
-    return result
+        return random.sample(questions, count)
+    return list(questions[:count])
 
 
 def recommend_diagnostic_level(stage_results: Dict[str, Dict[str, Any]]) -> dict:
@@ -835,164 +1426,238 @@ def get_words_by_ids(word_ids: list, lang: str = "ru") -> list:
 
     word_id format: "{major}_{sub}_{category_id}_{de_word}"
     e.g.  "A1_1_food_das Brot"
+
+    Поиск по глобальному индексу: время зависит от len(word_ids), а не от
+    размера словаря. Порядок word_ids сохраняется (больше ошибок — раньше).
     """
     if not word_ids:
         return []
+    return _lookup_ids(_word_index, word_ids, lang, "vocabulary")
 
-    word_id_set = set(word_ids)
-
-    # Determine which levels are needed and ensure their vocabulary is loaded
-    needed_level_keys = set()
-    for wid in word_id_set:
-        parts = wid.split("_", 2)  # ["A1", "1", "food_das Brot"]
-        if len(parts) >= 2:
-            needed_level_keys.add(f"{parts[0]}_{parts[1]}")
 
-    for level_key in needed_level_keys:
-        parts = level_key.split("_", 1)
-        if len(parts) == 2:
-            major, sub = parts
-            _load_all_vocabulary(major, sub)  # no-op if already cached
-
-    result = []
-    for level_key, cache_data in _cache.items():
-        if level_key not in needed_level_keys:
-            continue
-        if cache_data.get("vocabulary") is None:
-            continue
-        for category_id, category in cache_data["vocabulary"].items():
-            for word in category.get("words", []):
-                wid = f"{level_key}_{category_id}_{word.get('de', '')}"
-                if wid in word_id_set:
-                    result.append({
-                        "de": word.get("de", ""),
-                        "ru": _localized(word, "ru", lang),
-                        "example": word.get("example", ""),
-                        "example_ru": _localized(word, "example_ru", lang),
-                        "category_id": category_id,
-                        "category_name": _localized(category, "name", lang),
-                        "word_id": wid,
-                        "level": level_key
-                    })
-
-    # Preserve order from word_ids (most errors first)
-    order = {wid: i for i, wid in enumerate(word_ids)}
-    result.sort(key=lambda w: order.get(w["word_id"], 999))
-    return result
-
-
-def get_all_phrases_flat(major: str = None, sub: str = None, lang: str = "ru") -> list:
+def get_all_phrases_flat(major: str = None, sub: str = None, lang: str = "ru") -> tuple:
     """Получить все фразы как плоский список (без дубликатов по phrase_id)."""
-    phrases = _load_all_phrases(major, sub)
-    level_key = _get_level_key(major, sub)
-    seen = set()
-    result = []
-    for category_id, category in phrases.items():
-        for phrase in category.get("phrases", []):
-            pid = f"{level_key}_{category_id}_{phrase.get('de', '')}"
-            if pid in seen:
-                continue
-            seen.add(pid)
-            result.append({
-                "de": phrase.get("de", ""),
-                "ru": _localized(phrase, "ru", lang),
-                "context": _localized(phrase, "context", lang),
-                "example": phrase.get("example", ""),
-                "example_ru": _localized(phrase, "example_ru", lang),
-                "category_id": category_id,
-                "category_name": _localized(category, "name", lang),
-                "phrase_id": pid,
-                "level": level_key
-            })
-    return result
+    return _get_view(major, sub, lang).phrases
 
 
 def get_phrases_by_ids(phrase_ids: list, lang: str = "ru") -> list:
     """Найти фразы по phrase_id во всех уровнях с контентом.
 
     phrase_id format: "{major}_{sub}_{category_id}_{de_phrase}"
+    Поиск по глобальному индексу, как в get_words_by_ids.
     """
     if not phrase_ids:
         return []
+    return _lookup_ids(_phrase_index, phrase_ids, lang, "phrases")
 
-    phrase_id_set = set(phrase_ids)
 
-    # Ensure needed levels have their phrases loaded
-    needed_level_keys = set()
-    for pid in phrase_id_set:
-        parts = pid.split("_", 2)
-        if len(parts) >= 2:
-            needed_level_keys.add(f"{parts[0]}_{parts[1]}")
+# ============================================================
+# Управление кэшем и инициализация
+# ============================================================
 
-    for level_key in needed_level_keys:
-        parts = level_key.split("_", 1)
-        if len(parts) == 2:
-            major, sub = parts
-            _load_all_phrases(major, sub)  # no-op if already cached
+def get_content_version() -> int:
+    """Номер версии контента: растёт при каждой перезагрузке (ключ для кэшей ответов)."""
+    return _content_version
 
-    result = []
-    for level_key, cache_data in _cache.items():
-        if level_key not in needed_level_keys:
-            continue
-        if cache_data.get("phrases") is None:
-            continue
-        for category_id, category in cache_data["phrases"].items():
-            for phrase in category.get("phrases", []):
-                pid = f"{level_key}_{category_id}_{phrase.get('de', '')}"
-                if pid in phrase_id_set:
-                    result.append({
-                        "de": phrase.get("de", ""),
-                        "ru": _localized(phrase, "ru", lang),
-                        "context": _localized(phrase, "context", lang),
-                        "example": phrase.get("example", ""),
-                        "example_ru": _localized(phrase, "example_ru", lang),
-                        "category_id": category_id,
-                        "category_name": _localized(category, "name", lang),
-                        "phrase_id": pid,
-                        "level": level_key
-                    })
-
-    order = {pid: i for i, pid in enumerate(phrase_ids)}
-    result.sort(key=lambda p: order.get(p["phrase_id"], 999))
-    return result
 
+def _bump_content_version() -> None:
+    global _content_version
+    _content_version += 1
 
-# ============================================================
-# Управление кэшем и инициализация
-# ============================================================
 
 def reload_content(major: str = None, sub: str = None):
     """Перезагрузить данные для уровня (очистить кэш)."""
+    _bump_content_version()
     if major is None:
         # Очистить весь кэш
         global _cache
         _cache = {}
+        _bundle_levels.clear()
+        _clear_indexes()
         logger.info("Весь кэш контента очищен")
     else:
         # Очистить только для конкретного уровня
         key = _get_level_key(major, sub)
+        _bundle_levels.pop(key, None)
         if key in _cache:
             del _cache[key]
+            _unindex_level(key)
             logger.info(f"Кэш контента для уровня {key} очищен")
 
 
 def reload_all_content():
     """Перезагрузить все данные (очистить весь кэш)."""
     global _cache
+    _bump_content_version()
     _cache = {}
+    _bundle_levels.clear()
+    _clear_indexes()
     logger.info("Весь кэш контента очищен")
 
 
-def init_content(major: str = None, sub: str = None):
-    """Инициализировать загрузку контента при старте."""
+def _level_of_file(filepath: Path) -> Optional[tuple]:
+    """(major, sub, вид) для файла data/<major>/<sub>/<вид>/x.json; вид "metadata" для metadata.json."""
+    try:
+        parts = filepath.relative_to(BASE_DATA_DIR).parts
+    except ValueError:
+        return None
+    if len(parts) == 3 and parts[2] == "metadata.json":
+        return parts[0], parts[1], "metadata"
+    if len(parts) == 4 and parts[2] in CONTENT_KINDS and parts[3].endswith(".json"):
+        return parts[0], parts[1], parts[2]
+    return None
+
+
+def _apply_file(items: dict, sources: dict, kind: str, filepath: Path) -> None:
+    """Отразить в копиях items/sources изменение одного файла."""
+    old_id = sources.get(filepath.name)
+    if not filepath.exists():
+        sources.pop(filepath.name, None)
+        if old_id is not None:
+            items.pop(old_id, None)
+        return
+    data = _read_content_file(kind, filepath)
+    if data is None:
+        # Файл сохранён не полностью или с ошибкой — оставляем прежнюю версию
+        logger.warning(f"Файл {filepath} не загружен, оставлена прежняя версия")
+        return
+    if old_id is not None and old_id != data["id"]:
+        items.pop(old_id, None)
+    items[data["id"]] = data
+    sources[filepath.name] = data["id"]
+
+
+def _snapshot_level(level_key: str, old: dict, changes: Dict[str, list]) -> dict:
+    """Новый кэш уровня: старый + перечитанные файлы, с заново построенными представлениями.
+
+    Старый кэш не меняется; неизменённые виды контента и записи общие.
+    """
+    new = dict(old)
+    new["sources"] = dict(old["sources"])
+    for kind, files in changes.items():
+        if kind == "metadata":
+            new["metadata"] = _load_json(files[-1]) if files[-1].exists() else {}
+            continue
+        if old[kind] is None:
+            continue  # ещё не загружался — прочитается целиком при обращении
+        items = new[kind] = dict(old[kind])
+        sources = new["sources"][kind] = dict(old["sources"][kind])
+        for filepath in files:
+            _apply_file(items, sources, kind, filepath)
+    new["views"] = {
+        lang: _build_view(level_key, new, lang, kinds=tuple(view.built)) for lang, view in old["views"].items()
+    }
+    return new
+
+
+def apply_content_changes(files: list) -> list:
+    """Перечитать изменённые/добавленные/удалённые JSON файлы уровней.
+
+    Для каждого затронутого загруженного уровня новый снимок (данные и
+    представления) собирается вне _cache и подменяет старый одним
+    присваиванием: читатели видят либо старый уровень, либо новый целиком.
+    Незагруженные уровни не трогаются (прочитаются при первом обращении).
+    Изменённый диагностический тест перечитается при следующем обращении.
+    Возвращает ключи обновлённых уровней.
+    """
+    by_level: Dict[tuple, Dict[str, list]] = {}
+    diagnostic_changed = any(Path(filepath) in _DIAGNOSTIC_FILES for filepath in files)
+    for filepath in files:
+        located = _level_of_file(Path(filepath))
+        if located is not None:
+            major, sub, kind = located
+            by_level.setdefault((major, sub), {}).setdefault(kind, []).append(Path(filepath))
+
+    updated = []
+    for (major, sub), changes in by_level.items():
+        level_key = _get_level_key(major, sub)
+        # Бандл собран до изменения — уровень прочитается из JSON
+        _bundle_levels.pop(level_key, None)
+        old = _cache.get(level_key)
+        if old is None:
+            continue
+        _cache[level_key] = _snapshot_level(level_key, old, changes)
+        updated.append(level_key)
+        logger.info(f"Уровень {level_key} обновлён: {', '.join(f.name for fs in changes.values() for f in fs)}")
+
+    if updated:
+        _reindex()
+    if by_level or diagnostic_changed:
+        # и при изменениях в незагруженных уровнях: меняется манифест уровней
+        _bump_content_version()
+    if diagnostic_changed:
+        logger.info("Диагностический тест обновлён")
+    return updated
+
+
+def _load_level_data(major: str = None, sub: str = None) -> dict:
+    """Загрузить все данные уровня (без представлений); вернуть кэш уровня."""
+    get_metadata(major, sub)
+    _load_all_vocabulary(major, sub)
+    _load_all_grammar(major, sub)
+    _load_all_phrases(major, sub)
+    _load_all_dialogues(major, sub)
+    _load_all_culture(major, sub)
+    _load_all_exercises(major, sub)
+    return _get_level_cache(major, sub)
+
+
+def _load_level(major: str = None, sub: str = None) -> float:
+    """Загрузить все данные уровня и построить его представления; вернуть время, с."""
+    started = time.perf_counter()
+    _load_level_data(major, sub)
+    views_started = time.perf_counter()
+    _build_views(major, sub)
+    finished = time.perf_counter()
+    _load_times.setdefault(_get_level_key(major, sub), {})["views"] = finished - views_started
+    return finished - started
+
+
+def _load_bundle() -> bool:
+    """Один раз при старте: прочитать бандл, если он есть и актуален.
+
+    Уровни распаковываются из него при первом обращении (_get_level_cache)
+    вместо чтения JSON; уже загруженные уровни не заменяются. После
+    reload_content данные снова читаются из JSON.
+    """
+    global _bundle_checked
+    if _bundle_checked:
+        return False
+    _bundle_checked = True
+
+    from bot.content_bundle import read_bundle
+
+    bundle = read_bundle()
+    if bundle is None:
+        return False
+    _bundle_levels.update((key, data) for key, data in bundle["levels"].items() if key not in _cache)
+    logger.info(f"Бандл контента {bundle['version'][:12]}: уровни {', '.join(bundle['levels'])}")
+    return True
+
+
+def _install_bundled_level(level_key: str) -> None:
+    level_cache = _cache[level_key] = pickle.loads(_bundle_levels.pop(level_key))
+    for lang, view in level_cache["views"].items():
+        _index_view(level_key, lang, view)
+
+
+def init_content(major: str = None, sub: str = None, lazy: bool = False):
+    """Инициализировать загрузку контента при старте (major/sub — уровень по умолчанию).
+
+    lazy=True ничего не загружает заранее: каждый вид контента уровня
+    читается при первом обращении (см. также warm_up_content).
+    """
     if major is not None:
-        set_level(major, sub)
+        set_default_level(major, sub)
     
     level_str = get_current_level_str()
+    _load_bundle()
+    if lazy:
+        logger.info(f"Контент загружается по требованию (уровень по умолчанию {level_str})")
+        return
+
     logger.info(f"Инициализация контента для уровня {level_str}...")
-    
-    _load_all_vocabulary()
-    _load_all_grammar()
+    _load_level()
     phrases = _load_all_phrases()
     dialogues = _load_all_dialogues()
     culture = _load_all_culture()
@@ -1012,15 +1677,38 @@ def init_all_levels():
     """Инициализировать контент для всех уровней с данными."""
     logger.info("Инициализация контента для всех уровней...")
     
+    _load_bundle()
     levels_with_content = get_levels_with_content()
     for level in levels_with_content:
         major, sub = level["major"], level["sub"]
         logger.info(f"Загрузка уровня {major}.{sub}...")
-        _load_all_vocabulary(major, sub)
-        _load_all_grammar(major, sub)
-        _load_all_phrases(major, sub)
-        _load_all_dialogues(major, sub)
-        _load_all_culture(major, sub)
-        _load_all_exercises(major, sub)
+        _log_level_time(major, sub, _load_level(major, sub))
     
     logger.info(f"Загружено {len(levels_with_content)} уровней с контентом")
+
+
+def _log_level_time(major: str, sub: str, seconds: float) -> None:
+    parts = get_load_times().get(_get_level_key(major, sub), {})
+    details = ", ".join(f"{part} {ms:.0f}" for part, ms in parts.items())
+    logger.info(f"Уровень {major}.{sub} загружен за {seconds * 1000:.0f} мс ({details})")
+
+
+def warm_up_content() -> threading.Thread:
+    """Загрузить все уровни с контентом в фоновом потоке (после init_content(lazy=True)).
+
+    Запросы не ждут прогрева: нужный им вид контента загрузится сразу при
+    обращении, а уже загруженное прогрев пропустит.
+    """
+    def run():
+        started = time.perf_counter()
+        levels = get_levels_with_content()
+        for level in levels:
+            try:
+                _log_level_time(level["major"], level["sub"], _load_level(level["major"], level["sub"]))
+            except Exception:
+                logger.exception(f"Ошибка прогрева уровня {level['name']}")
+        logger.info(f"Прогрев контента: {len(levels)} уровней за {time.perf_counter() - started:.1f} с")
+
+    thread = threading.Thread(target=run, name="content-warmup", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,76 @@
+"""
+Hot reload of content files.
+
+A daemon thread stats every level JSON file each CONTENT_WATCH_SEC seconds
+and hands the changed, added and removed paths to
+`content_manager.apply_content_changes`, which re-parses only those files
+and swaps in a complete new snapshot of each affected level.  Rebuilding
+happens on the watcher thread, never inside a request.
+
+Polling is used instead of inotify: it needs no extra dependency, works on
+every platform and costs a few hundred stat() calls per tick.
+"""
+
+import logging
+import threading
+
+from bot import content_manager as cm
+from bot.config import CONTENT_WATCH_SEC
+
+logger = logging.getLogger(__name__)
+
+_watcher = None
+
+
+def _scan() -> dict:
+    stats = {}
+    for path in cm._content_files():
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            continue
+        stats[path] = (stat.st_mtime_ns, stat.st_size)
+    return stats
+
+
+class ContentWatcher:
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._stats = _scan()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="content-watcher", daemon=True)
+
+    def poll(self) -> list:
+        """Apply changes since the previous poll; return the updated level keys."""
+        stats = _scan()
+        changed = [path for path, stat in stats.items() if self._stats.get(path) != stat]
+        changed.extend(path for path in self._stats if path not in stats)
+        self._stats = stats
+        if not changed:
+            return []
+        return cm.apply_content_changes(changed)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.poll()
+            except Exception:
+                logger.exception("Content watcher poll failed")
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+
+def start_content_watcher():
+    """Start the watcher once per process; returns it, or None when disabled."""
+    global _watcher
+    if CONTENT_WATCH_SEC <= 0:
+        return None
+    if _watcher is None:
+        _watcher = ContentWatcher(CONTENT_WATCH_SEC)
+        _watcher.start()
+        logger.info(f"Watching content files every {CONTENT_WATCH_SEC}s")
+    return _watcher
@@ -1,11 +1,31 @@
-import asyncpg
 import os
-import ssl
+import re
 import threading
 import asyncio
+import contextvars
+import functools
+import inspect
 import logging
-from datetime import datetime, timedelta
-from bot.config import DATABASE_URL
+import sys
+import time
+from datetime import date, datetime, timedelta
+from bot.config import (
+    DATABASE_URL,
+    READ_DATABASE_URL,
+    READ_YOUR_WRITES_SEC,
+    REPLICA_RETRY_SEC,
+    DAILY_STATS_RAW_MONTHS,
+    PRONUN_RAW_MONTHS,
+    RATE_LIMIT_RETENTION_HOURS,
+    USER_CACHE_SIZE,
+    PROFILE_CACHE_SIZE,
+    PROFILE_CACHE_TTL_SEC,
+    DB_METRICS_ENABLED,
+)
+from bot.backends import POSTGRES, create_pool, get_dialect
+from bot.backends.instrumented import InstrumentedPool, query_context
+from bot import metrics
+from bot.cache import LRUCache
 
 logger = logging.getLogger(__name__)
 
@@ -13,17 +33,43 @@ logger = logging.getLogger(__name__)
 # Each thread (gunicorn worker) gets its own pool
 _local = threading.local()
 
-
-def get_ssl_context():
-    """Create SSL context for Supabase/cloud PostgreSQL connections."""
-    ctx = ssl.create_default_context()
-    ctx.check_hostname = False
-    ctx.verify_mode = ssl.CERT_NONE  # Supabase uses self-signed certs
-    return ctx
+_PRIMARY = "primary"
+_REPLICA = "replica"
+_route = contextvars.ContextVar("db_route", default=None)
+# Users who wrote recently; their reads stay on the primary.
+_recent_writers = LRUCache(USER_CACHE_SIZE, ttl=READ_YOUR_WRITES_SEC)
+_replica_down_until = 0.0
+_routing_stats = {"replica_reads": 0, "primary_reads": 0, "replica_fallbacks": 0}
+
+# Ids of users known to exist in `users`.  Rows are only deleted by
+# bot.account.delete_account, which calls forget_user(); other processes
+# notice a deleted user only after a restart or eviction.
+_known_users = LRUCache(USER_CACHE_SIZE)
+
+# Per-user profile (settings, level, language, premium) loaded by one query.
+# Setters below write the updated row through; changes made elsewhere (e.g.
+# premium granted by hand) show up after PROFILE_CACHE_TTL_SEC.
+_profiles = LRUCache(PROFILE_CACHE_SIZE, ttl=PROFILE_CACHE_TTL_SEC)
+
+_PROFILE_COLUMNS = (
+    "reminder_enabled, reminder_hour, reminder_minute, "
+    "major_level, sub_level, diagnostic_completed, ui_language, is_premium"
+)
+
+_DEFAULT_PROFILE = {
+    "reminder_enabled": 1,
+    "reminder_hour": 9,
+    "reminder_minute": 0,
+    "major_level": "A1",
+    "sub_level": "1",
+    "diagnostic_completed": 0,
+    "ui_language": "ru",
+    "is_premium": 0,
+}
 
 
-async def get_pool():
-    """Get or create connection pool for current thread and event loop."""
+async def _get_pool_for(role: str, url: str):
+    """Get or create the *role* pool for current thread and event loop."""
     # Get current event loop
     try:
         current_loop = asyncio.get_running_loop()
@@ -35,7 +81,7 @@ async def get_pool():
         _local.pools = {}
     
     # Use loop id as key (or thread id if no loop)
-    pool_key = id(current_loop) if current_loop else threading.get_ident()
+    pool_key = (role, id(current_loop) if current_loop else threading.get_ident())
     
     # Check if pool exists and is valid
     if pool_key in _local.pools:
@@ -49,24 +95,192 @@ async def get_pool():
         # Pool is invalid, remove it
         del _local.pools[pool_key]
     
-    # Create new pool
+    # Create new pool (PostgreSQL or embedded SQLite, see bot/backends)
+    pool = await create_pool(url)
+    if DB_METRICS_ENABLED:
+        pool = InstrumentedPool(pool, role)
+    _local.pools[pool_key] = pool
+    return pool
+
+
+async def get_pool():
+    """Get or create connection pool for current thread and event loop.
+
+    Inside a @read_only function this is the read replica pool.
+    """
+    if _route.get() == _REPLICA:
+        return await _get_pool_for(_REPLICA, READ_DATABASE_URL)
     if not DATABASE_URL:
         raise ValueError("DATABASE_URL is not set! Please configure database connection.")
-    
-    # Determine if we need SSL (for cloud databases like Supabase, Neon, etc.)
-    use_ssl = 'supabase' in DATABASE_URL or 'neon' in DATABASE_URL or 'render' in DATABASE_URL
-    
-    pool = await asyncpg.create_pool(
-        DATABASE_URL,
-        min_size=1,
-        max_size=5,  # Reduced for free tier limits
-        command_timeout=60,
-        ssl=get_ssl_context() if use_ssl else None,
-        # For PgBouncer/Supabase pooler - disable prepared statements
-        statement_cache_size=0 if 'pooler.supabase' in DATABASE_URL else 100
+    return await _get_pool_for(_PRIMARY, DATABASE_URL)
+
+
+# ── Read/write routing ──────────────────────────────────────────
+# Functions below are tagged @read_only or @read_write.  With
+# READ_DATABASE_URL set, read-only functions query the replica unless
+#   * they run inside a read-write function,
+#   * their user wrote within READ_YOUR_WRITES_SEC (replica lag),
+#   * the replica failed within the last REPLICA_RETRY_SEC.
+# A replica query that fails with a connection or recovery error is retried
+# once on the primary; any other error is the function's own and is raised.
+
+def _user_id_getter(func):
+    params = list(inspect.signature(func).parameters)
+    index = params.index("user_id") if "user_id" in params else None
+
+    def get(args, kwargs):
+        if "user_id" in kwargs:
+            return kwargs["user_id"]
+        if index is not None and index < len(args):
+            return args[index]
+        return None
+    return get
+
+
+def _caller_of(frame) -> str:
+    """module.function of the first frame outside this module."""
+    while frame is not None and frame.f_globals.get("__name__") == __name__:
+        frame = frame.f_back
+    if frame is None:
+        return "-"
+    return f"{frame.f_globals.get('__name__', '?')}.{frame.f_code.co_name}"
+
+
+async def _labelled(context: tuple, body, args, kwargs):
+    token = query_context.set(context)
+    try:
+        return await body(*args, **kwargs)
+    finally:
+        query_context.reset(token)
+
+
+def _traced(func, body):
+    """Label the statements of *body* with func's name and its caller.
+
+    The caller is taken at call time, while the stack is still there:
+    coroutines handed to run_bot_async() start on another thread without
+    it.  Nested database calls keep the caller of the outermost one.
+    """
+    if not DB_METRICS_ENABLED:
+        return functools.wraps(func)(body)
+    name = func.__name__
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        current = query_context.get()
+        caller = current[1] if current[0] != "-" else _caller_of(sys._getframe(1))
+        return _labelled((name, caller), body, args, kwargs)
+
+    return wrapper
+
+
+@functools.lru_cache(maxsize=None)
+def _replica_errors() -> tuple:
+    """Errors that mean the replica is unreachable or unusable, not a bug in the query."""
+    errors = (OSError, asyncio.TimeoutError)
+    try:
+        import asyncpg
+    except ImportError:
+        return errors
+    return errors + (
+        asyncpg.PostgresConnectionError,  # SQLSTATE class 08
+        asyncpg.InterfaceError,           # connection closed under the query
+        asyncpg.CannotConnectNowError,    # replica starting up
+        asyncpg.TooManyConnectionsError,
+        asyncpg.SerializationError,       # canceled by a conflict with recovery
     )
-    _local.pools[pool_key] = pool
-    return pool
+
+
+# Cleared by a read-write function that turned out to write nothing (see
+# _nothing_written); only functions that wrote pin their user to the primary
+_wrote = contextvars.ContextVar("db_wrote", default=None)
+
+
+def _nothing_written() -> None:
+    """Called inside a read-write function that did not change anything."""
+    state = _wrote.get()
+    if state is not None:
+        state[0] = False
+
+
+def read_only(func):
+    """Route the queries of *func* to the read replica when possible."""
+    get_user_id = _user_id_getter(func)
+
+    async def run(*args, **kwargs):
+        global _replica_down_until
+        route = _route.get()
+        if route is not None or not READ_DATABASE_URL:
+            return await func(*args, **kwargs)
+
+        user_id = get_user_id(args, kwargs)
+        if time.monotonic() < _replica_down_until or (
+            user_id is not None and user_id in _recent_writers
+        ):
+            _routing_stats["primary_reads"] += 1
+            return await func(*args, **kwargs)
+
+        token = _route.set(_REPLICA)
+        try:
+            result = await func(*args, **kwargs)
+            _routing_stats["replica_reads"] += 1
+            return result
+        except _replica_errors() as e:
+            _replica_down_until = time.monotonic() + REPLICA_RETRY_SEC
+            _routing_stats["replica_fallbacks"] += 1
+            logger.warning(f"Replica read {func.__name__} failed, using primary: {e}")
+        finally:
+            _route.reset(token)
+
+        token = _route.set(_PRIMARY)
+        try:
+            return await func(*args, **kwargs)
+        finally:
+            _route.reset(token)
+
+    return _traced(func, run)
+
+
+def read_write(func):
+    """Run *func* on the primary and open its user's read-your-writes window."""
+    get_user_id = _user_id_getter(func)
+
+    async def run(*args, **kwargs):
+        token = _route.set(_PRIMARY)
+        wrote = [True]
+        wrote_token = _wrote.set(wrote)
+        try:
+            result = await func(*args, **kwargs)
+        finally:
+            _wrote.reset(wrote_token)
+            _route.reset(token)
+        # Only a successful write opens the window: failed calls and calls
+        # that wrote nothing leave the user on the replica
+        if READ_DATABASE_URL and wrote[0]:
+            user_id = get_user_id(args, kwargs)
+            if user_id is not None:
+                _recent_writers.set(user_id, True)
+        return result
+
+    return _traced(func, run)
+
+
+def get_db_routing_stats() -> dict:
+    """Return replica/primary read counters."""
+    return dict(_routing_stats, replica_configured=bool(READ_DATABASE_URL))
+
+
+def _cache_gauges() -> list:
+    gauges = []
+    for cache, stats in (("known_users", _known_users.stats()), ("profiles", _profiles.stats())):
+        for key in ("size", "hits", "misses"):
+            gauges.append((f"cache_{key}", f"In-process cache {key}", {"cache": cache}, stats[key]))
+    for key, value in _routing_stats.items():
+        gauges.append(("db_routed_reads", "Reads by routing decision", {"route": key}, value))
+    return gauges
+
+
+metrics.register_gauges(_cache_gauges)
 
 
 async def close_pool():
@@ -88,6 +302,7 @@ async def init_db():
     await run_migrations(pool)
 
 
+@read_write
 async def get_or_create_user(user_id: int, username: str = None, first_name: str = None):
     """Get existing user or create new one."""
     pool = await get_pool()
@@ -98,27 +313,120 @@ async def get_or_create_user(user_id: int, username: str = None, first_name: str
         )
 
         if not user:
-            await conn.execute(
-                "INSERT INTO users (user_id, username, first_name) VALUES ($1, $2, $3)",
-                user_id, username, first_name
-            )
             user = await conn.fetchrow(
-                "SELECT * FROM users WHERE user_id = $1", user_id
+                """
+                INSERT INTO users (user_id, username, first_name) VALUES ($1, $2, $3)
+                ON CONFLICT (user_id) DO NOTHING
+                RETURNING *
+                """,
+                user_id, username, first_name
             )
+            if user is None:
+                _nothing_written()
+                user = await conn.fetchrow(
+                    "SELECT * FROM users WHERE user_id = $1", user_id
+                )
+        else:
+            _nothing_written()
 
+        _known_users.set(user_id, True)
         return user
 
 
-async def get_user_premium(user_id: int) -> bool:
-    """Return True if the user has premium status."""
+def is_known_user(user_id: int) -> bool:
+    """Return True if *user_id* is cached as existing (no DB access)."""
+    return user_id in _known_users
+
+
+@read_write
+async def ensure_user(user_id: int) -> None:
+    """Make sure a users row exists; free for users already seen by this process."""
+    if user_id in _known_users:
+        _nothing_written()
+        return
+    pool = await get_pool()
+    async with pool.acquire() as conn:
+        status = await conn.execute(
+            "INSERT INTO users (user_id) VALUES ($1) ON CONFLICT (user_id) DO NOTHING",
+            user_id
+        )
+    if status.split()[-1] == "0":
+        _nothing_written()
+    _known_users.set(user_id, True)
+
+
+def get_user_cache_stats() -> dict:
+    """Return size and hit/miss counters of the known-user cache."""
+    return _known_users.stats()
+
+
+def _cache_profile(user_id: int, row) -> dict:
+    profile = dict(_DEFAULT_PROFILE)
+    if row:
+        profile.update({k: v for k, v in dict(row).items() if v is not None})
+    _profiles.set(user_id, profile)
+    return profile
+
+
+def peek_user_profile(user_id: int):
+    """Return a copy of the cached profile, or None (no DB access)."""
+    profile = _profiles.get(user_id)
+    return dict(profile) if profile is not None else None
+
+
+@read_only
+async def get_user_profile(user_id: int) -> dict:
+    """Return settings, level, language and premium flag of a user.
+
+    Served from the profile cache: at most one query per user per TTL.
+    Unknown users get the defaults.
+    """
+    profile = _profiles.get(user_id)
+    if profile is None:
+        pool = await get_pool()
+        async with pool.acquire() as conn:
+            row = await conn.fetchrow(
+                f"SELECT {_PROFILE_COLUMNS} FROM users WHERE user_id = $1", user_id
+            )
+        profile = _cache_profile(user_id, row)
+    return dict(profile)
+
+
+@read_write
+async def _update_profile(user_id: int, assignments: str, *args) -> None:
+    """UPDATE users and write the resulting profile through to the cache."""
+    await ensure_user(user_id)
     pool = await get_pool()
     async with pool.acquire() as conn:
-        val = await conn.fetchval(
-            "SELECT is_premium FROM users WHERE user_id = $1", user_id
+        row = await conn.fetchrow(
+            f"UPDATE users SET {assignments} WHERE user_id = ${len(args) + 1} "
+            f"RETURNING {_PROFILE_COLUMNS}",
+            *args, user_id
         )
-        return bool(val)
+    if row is None:
+        _profiles.pop(user_id)
+    else:
+        _cache_profile(user_id, row)
+
+
+def get_profile_cache_stats() -> dict:
+    """Return size and hit/miss counters of the profile cache."""
+    return _profiles.stats()
+
+
+def forget_user(user_id: int) -> None:
+    """Drop a deleted user from the known-user and profile caches."""
+    _known_users.pop(user_id)
+    _profiles.pop(user_id)
+
 
+async def get_user_premium(user_id: int) -> bool:
+    """Return True if the user has premium status."""
+    profile = await get_user_profile(user_id)
+    return bool(profile["is_premium"])
 
+
+@read_only
 async def get_all_user_ids() -> list:
     """Return all user IDs stored in the database."""
     pool = await get_pool()
@@ -134,9 +442,10 @@ def _srs_interval(streak: int) -> timedelta:
     return intervals.get(streak, timedelta(days=30))
 
 
+@read_write
 async def update_word_progress(user_id: int, word_id: str, is_correct: bool):
     """Update user's progress for a specific word (atomic upsert with SRS)."""
-    await get_or_create_user(user_id, None, None)
+    await ensure_user(user_id)
     pool = await get_pool()
     now = datetime.now()
 
@@ -179,6 +488,7 @@ async def update_word_progress(user_id: int, word_id: str, is_correct: bool):
             )
 
 
+@read_only
 async def get_user_stats(user_id: int) -> dict:
     """Get user's learning statistics."""
     pool = await get_pool()
@@ -238,6 +548,7 @@ async def get_user_stats(user_id: int) -> dict:
         }
 
 
+@read_only
 async def get_detailed_user_progress(user_id: int) -> dict:
     """Get all progress data for a user across all content types."""
     pool = await get_pool()
@@ -285,10 +596,11 @@ async def get_detailed_user_progress(user_id: int) -> dict:
     }
 
 
+@read_write
 async def save_grammar_result(user_id: int, test_id: str, score: int, total: int):
     """Save grammar test result."""
     # Ensure user exists in database
-    await get_or_create_user(user_id, None, None)
+    await ensure_user(user_id)
     
     pool = await get_pool()
 
@@ -299,15 +611,16 @@ async def save_grammar_result(user_id: int, test_id: str, score: int, total: int
         )
 
 
+@read_write
 async def update_daily_stats(user_id: int, words: int = 0, tests: int = 0, correct: int = 0, total: int = 0):
     """Update daily statistics for user."""
     import logging
     logger = logging.getLogger(__name__)
     
     # Ensure user exists in database
-    await get_or_create_user(user_id, None, None)
+    await ensure_user(user_id)
     
-    today = datetime.now().strftime("%Y-%m-%d")
+    today = date.today()
     pool = await get_pool()
 
     try:
@@ -328,6 +641,205 @@ async def update_daily_stats(user_id: int, words: int = 0, tests: int = 0, corre
         raise
 
 
+# ============================================================
+# History tables: monthly partitions, rollups and compaction
+# ============================================================
+
+_PARTITION_RE = re.compile(r"_y(\d{4})m(\d{2})$")
+
+
+def _month_start(d: date) -> date:
+    return d.replace(day=1)
+
+
+def _add_months(d: date, months: int) -> date:
+    """Shift a first-of-month date by *months* (may be negative)."""
+    index = d.year * 12 + d.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _retention_cutoff(months: int) -> date:
+    """First day of the oldest month still kept raw when retaining *months* full months."""
+    return _add_months(_month_start(date.today()), -months)
+
+
+def _raw_stats_cutoff() -> date:
+    """First day kept as raw daily_stats rows; older days live in rollups only."""
+    return _retention_cutoff(DAILY_STATS_RAW_MONTHS)
+
+
+async def ensure_monthly_partitions(conn, table: str, months_ahead: int = 2):
+    """Create monthly range partitions of *table* for this month and *months_ahead* more.
+
+    Partitions are named ``{table}_yYYYYmMM``.  If the DEFAULT partition
+    already holds rows for a month, Postgres refuses to create it; those rows
+    stay in the default partition and the failure is only logged.
+    SQLite tables are not partitioned; nothing to do there.
+    """
+    if get_dialect(conn) != POSTGRES:
+        return
+    import asyncpg
+
+    start = _month_start(date.today())
+    for offset in range(months_ahead + 1):
+        lo = _add_months(start, offset)
+        hi = _add_months(lo, 1)
+        try:
+            await conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {table}_y{lo.year}m{lo.month:02d} PARTITION OF {table} "
+                f"FOR VALUES FROM ('{lo}') TO ('{hi}')"
+            )
+        except asyncpg.PostgresError as e:
+            logger.warning(f"Could not create partition of {table} for {lo:%Y-%m}: {e}")
+
+
+async def _drop_partitions_before(conn, table: str, cutoff: date) -> list:
+    """Drop monthly partitions of *table* that end on or before *cutoff*."""
+    if get_dialect(conn) != POSTGRES:
+        return []
+    rows = await conn.fetch(
+        """SELECT c.relname FROM pg_inherits i
+           JOIN pg_class c ON c.oid = i.inhrelid
+           WHERE i.inhparent = $1::regclass""",
+        table,
+    )
+    dropped = []
+    for row in rows:
+        m = _PARTITION_RE.search(row["relname"])
+        if not m:
+            continue
+        month = date(int(m.group(1)), int(m.group(2)), 1)
+        if _add_months(month, 1) <= cutoff:
+            await conn.execute(f"DROP TABLE {row['relname']}")
+            dropped.append(row["relname"])
+    return dropped
+
+
+async def _try_xact_lock(conn, name: str) -> bool:
+    """Take a transaction-scoped advisory lock named *name* without waiting.
+
+    On SQLite the open transaction already holds the single writer.
+    """
+    if get_dialect(conn) != POSTGRES:
+        return True
+    return await conn.fetchval("SELECT pg_try_advisory_xact_lock(hashtext($1))", name)
+
+
+@read_write
+async def rollup_daily_stats() -> int:
+    """Fold daily_stats rows older than the raw retention into weekly and monthly rollups.
+
+    Runs in one transaction guarded by an advisory lock, so concurrent
+    workers never fold the same days twice.  Whole monthly partitions are
+    dropped instead of deleted row by row.  Returns the number of days folded.
+    """
+    cutoff = _raw_stats_cutoff()
+    pool = await get_pool()
+
+    async with pool.acquire() as conn:
+        await ensure_monthly_partitions(conn, "daily_stats")
+
+        async with conn.transaction():
+            if not await _try_xact_lock(conn, "daily_stats_rollup"):
+                return 0
+
+            folded = await conn.fetchval(
+                "SELECT COUNT(*) FROM daily_stats WHERE date < $1", cutoff
+            )
+            if not folded:
+                return 0
+
+            for period in ("week", "month"):
+                await conn.execute(
+                    """INSERT INTO daily_stats_rollup
+                           (user_id, period, period_start, days_active, words_learned,
+                            tests_completed, correct_answers, total_answers)
+                       SELECT user_id, $2, date_trunc($2, date)::date, COUNT(*),
+                              SUM(words_learned), SUM(tests_completed),
+                              SUM(correct_answers), SUM(total_answers)
+                       FROM daily_stats
+                       WHERE date < $1
+                       GROUP BY user_id, date_trunc($2, date)::date
+                       ON CONFLICT (user_id, period, period_start) DO UPDATE
+                       SET days_active     = daily_stats_rollup.days_active + EXCLUDED.days_active,
+                           words_learned   = daily_stats_rollup.words_learned + EXCLUDED.words_learned,
+                           tests_completed = daily_stats_rollup.tests_completed + EXCLUDED.tests_completed,
+                           correct_answers = daily_stats_rollup.correct_answers + EXCLUDED.correct_answers,
+                           total_answers   = daily_stats_rollup.total_answers + EXCLUDED.total_answers""",
+                    cutoff, period
+                )
+
+            dropped = await _drop_partitions_before(conn, "daily_stats", cutoff)
+            # Rows that landed in the default partition
+            await conn.execute("DELETE FROM daily_stats WHERE date < $1", cutoff)
+
+    logger.info(f"daily_stats rollup: folded {folded} days before {cutoff}, dropped {dropped}")
+    return folded
+
+
+def _pick_stats_granularity(start: date, end: date) -> str:
+    span = (end - start).days
+    if start < _raw_stats_cutoff() or span > 31:
+        return "week" if span <= 183 else "month"
+    return "day"
+
+
+@read_only
+async def get_daily_stats_range(user_id: int, start: date, end: date, granularity: str = None) -> list:
+    """Return activity totals between *start* and *end* (inclusive).
+
+    *granularity* is 'day', 'week' or 'month'; when omitted it is chosen from
+    the span of the range.  Days older than the raw retention only exist in
+    rollups, so a 'day' request reaching them is served per week.  Rollup
+    periods overlapping the range boundary are included whole.
+    """
+    if granularity is None:
+        granularity = _pick_stats_granularity(start, end)
+    elif granularity == "day" and start < _raw_stats_cutoff():
+        granularity = "week"
+    if granularity not in ("day", "week", "month"):
+        raise ValueError(f"Unknown granularity: {granularity}")
+
+    pool = await get_pool()
+    async with pool.acquire() as conn:
+        if granularity == "day":
+            rows = await conn.fetch(
+                """SELECT date AS period_start, 1 AS days_active, words_learned,
+                          tests_completed, correct_answers, total_answers
+                   FROM daily_stats
+                   WHERE user_id = $1 AND date BETWEEN $2 AND $3
+                   ORDER BY date""",
+                user_id, start, end
+            )
+        else:
+            rows = await conn.fetch(
+                """SELECT period_start,
+                          SUM(days_active)::int AS days_active,
+                          SUM(words_learned)::int AS words_learned,
+                          SUM(tests_completed)::int AS tests_completed,
+                          SUM(correct_answers)::int AS correct_answers,
+                          SUM(total_answers)::int AS total_answers
+                   FROM (
+                       SELECT date_trunc($4, date)::date AS period_start, 1 AS days_active,
+                              words_learned, tests_completed, correct_answers, total_answers
+                       FROM daily_stats
+                       WHERE user_id = $1 AND date BETWEEN $2 AND $3
+                       UNION ALL
+                       SELECT period_start, days_active,
+                              words_learned, tests_completed, correct_answers, total_answers
+                       FROM daily_stats_rollup
+                       WHERE user_id = $1 AND period = $4
+                         AND period_start BETWEEN date_trunc($4, $2::date)::date AND $3
+                   ) s
+                   GROUP BY period_start
+                   ORDER BY period_start""",
+                user_id, start, end, granularity
+            )
+
+    return [{**dict(r), "granularity": granularity} for r in rows]
+
+
+@read_only
 async def get_users_for_reminder(hour: int, minute: int) -> list:
     """Get users who should receive reminder at given time."""
     pool = await get_pool()
@@ -341,23 +853,20 @@ async def get_users_for_reminder(hour: int, minute: int) -> list:
         return [u["user_id"] for u in users]
 
 
+@read_write
 async def set_reminder(user_id: int, enabled: bool, hour: int = 9, minute: int = 0):
     """Set reminder settings for user."""
-    # Ensure user exists in database
-    await get_or_create_user(user_id, None, None)
-    
-    pool = await get_pool()
-
-    async with pool.acquire() as conn:
-        await conn.execute(
-            "UPDATE users SET reminder_enabled = $1, reminder_hour = $2, reminder_minute = $3 WHERE user_id = $4",
-            1 if enabled else 0, hour, minute, user_id
-        )
+    await _update_profile(
+        user_id,
+        "reminder_enabled = $1, reminder_hour = $2, reminder_minute = $3",
+        1 if enabled else 0, hour, minute
+    )
 
 
+@read_write
 async def save_phrase_progress(user_id: int, phrase_id: str, category_id: str, is_correct: bool):
     """Save phrase progress for user (atomic upsert with SRS)."""
-    await get_or_create_user(user_id, None, None)
+    await ensure_user(user_id)
     pool = await get_pool()
     now = datetime.now()
 
@@ -400,9 +909,10 @@ async def save_phrase_progress(user_id: int, phrase_id: str, category_id: str, i
             )
 
 
+@read_write
 async def save_dialogue_progress(user_id: int, dialogue_id: str, exercises_completed: int, exercises_correct: int):
     """Save dialogue progress for user (atomic upsert)."""
-    await get_or_create_user(user_id, None, None)
+    await ensure_user(user_id)
     pool = await get_pool()
     now = datetime.now()
 
@@ -419,6 +929,7 @@ async def save_dialogue_progress(user_id: int, dialogue_id: str, exercises_compl
         )
 
 
+@read_write
 async def save_culture_progress(
     user_id: int,
     topic_id: str,
@@ -430,7 +941,7 @@ async def save_culture_progress(
     quiz_total: int = 0,
 ):
     """Save or update culture topic progress for user (upsert by user_id, topic_id, major, sub)."""
-    await get_or_create_user(user_id, None, None)
+    await ensure_user(user_id)
     pool = await get_pool()
     now = datetime.now()
     viewed = viewed_at or now
@@ -462,6 +973,7 @@ async def save_culture_progress(
             )
 
 
+@read_write
 async def save_exercise_set_progress(
     user_id: int,
     set_id: str,
@@ -471,7 +983,7 @@ async def save_exercise_set_progress(
     tasks_correct: int,
 ):
     """Save or update exercise set progress for user (upsert by user_id, set_id, major, sub)."""
-    await get_or_create_user(user_id, None, None)
+    await ensure_user(user_id)
     pool = await get_pool()
     now = datetime.now()
 
@@ -497,6 +1009,7 @@ async def save_exercise_set_progress(
             )
 
 
+@read_write
 async def save_pronunciation_progress(
     user_id: int,
     item_type: str,
@@ -509,7 +1022,7 @@ async def save_pronunciation_progress(
     confidence: float = 0.0,
 ):
     """Save pronunciation check result for user."""
-    await get_or_create_user(user_id, None, None)
+    await ensure_user(user_id)
     pool = await get_pool()
     async with pool.acquire() as conn:
         await conn.execute(
@@ -528,25 +1041,48 @@ async def save_pronunciation_progress(
         )
 
 
+PRONUN_VERDICT_EXCELLENT = "Отлично"
+PRONUN_VERDICT_GOOD = "Хорошо"
+PRONUN_VERDICT_RETRY = "Повторить"
+
+
+@read_only
 async def get_pronunciation_stats(user_id: int) -> dict:
-    """Get aggregate pronunciation statistics for user."""
+    """Get aggregate pronunciation statistics for user.
+
+    Combines compacted history from pronunciation_summary with the raw
+    attempts still kept in the recent partitions of pronunciation_progress.
+    """
     pool = await get_pool()
     async with pool.acquire() as conn:
         overall = await conn.fetchrow(
-            """SELECT
-                   COUNT(*) AS attempts,
-                   COALESCE(AVG(score), 0) AS avg_score,
-                   COALESCE(MAX(score), 0) AS best_score
-               FROM pronunciation_progress
-               WHERE user_id = $1""",
-            user_id,
-        )
-        verdict_rows = await conn.fetch(
-            """SELECT verdict, COUNT(*) AS count
-               FROM pronunciation_progress
-               WHERE user_id = $1
-               GROUP BY verdict""",
-            user_id,
+            """WITH raw AS (
+                   SELECT COUNT(*) AS attempts,
+                          COALESCE(SUM(score), 0) AS score_sum,
+                          COALESCE(MAX(score), 0) AS best_score,
+                          COUNT(*) FILTER (WHERE verdict = $2) AS excellent,
+                          COUNT(*) FILTER (WHERE verdict = $3) AS good,
+                          COUNT(*) FILTER (WHERE verdict = $4) AS retry
+                   FROM pronunciation_progress
+                   WHERE user_id = $1
+               ), agg AS (
+                   SELECT COALESCE(SUM(attempts), 0) AS attempts,
+                          COALESCE(SUM(score_sum), 0) AS score_sum,
+                          COALESCE(MAX(best_score), 0) AS best_score,
+                          COALESCE(SUM(excellent), 0) AS excellent,
+                          COALESCE(SUM(good), 0) AS good,
+                          COALESCE(SUM(retry), 0) AS retry
+                   FROM pronunciation_summary
+                   WHERE user_id = $1
+               )
+               SELECT raw.attempts + agg.attempts AS attempts,
+                      raw.score_sum + agg.score_sum AS score_sum,
+                      GREATEST(raw.best_score, agg.best_score) AS best_score,
+                      raw.excellent + agg.excellent AS excellent,
+                      raw.good + agg.good AS good,
+                      raw.retry + agg.retry AS retry
+               FROM raw, agg""",
+            user_id, PRONUN_VERDICT_EXCELLENT, PRONUN_VERDICT_GOOD, PRONUN_VERDICT_RETRY,
         )
         recent_rows = await conn.fetch(
             """SELECT item_type, item_id, score, verdict, created_at
@@ -557,67 +1093,162 @@ async def get_pronunciation_stats(user_id: int) -> dict:
             user_id,
         )
 
-    verdicts = {row["verdict"]: row["count"] for row in verdict_rows}
+    attempts = int(overall["attempts"] or 0)
     return {
-        "attempts": overall["attempts"] or 0,
-        "avg_score": float(overall["avg_score"] or 0),
+        "attempts": attempts,
+        "avg_score": float(overall["score_sum"] or 0) / attempts if attempts else 0.0,
         "best_score": overall["best_score"] or 0,
-        "excellent": verdicts.get("Отлично", 0),
-        "good": verdicts.get("Хорошо", 0),
-        "retry": verdicts.get("Повторить", 0),
+        "excellent": int(overall["excellent"] or 0),
+        "good": int(overall["good"] or 0),
+        "retry": int(overall["retry"] or 0),
         "recent": [dict(r) for r in recent_rows],
     }
 
 
-async def consume_rate_limit(
-    user_id: int,
-    action: str,
-    limit: int,
-    window_seconds: int = 3600,
-) -> dict:
-    """Atomically consume one quota unit in DB-backed fixed window."""
-    if limit <= 0:
-        return {"allowed": True, "count": 1, "remaining": 0, "retry_after": 0}
+@read_write
+async def compact_pronunciation_progress() -> int:
+    """Fold pronunciation attempts older than PRONUN_RAW_MONTHS into pronunciation_summary.
 
-    now = datetime.now()
-    epoch = int(now.timestamp())
-    window_start_epoch = epoch - (epoch % window_seconds)
-    window_end_epoch = window_start_epoch + window_seconds
-    window_start = datetime.fromtimestamp(window_start_epoch)
+    Per (user, item) the summary keeps attempts, score sum (for the mean),
+    best and last score, last verdict and verdict counts.  Old monthly
+    partitions are dropped afterwards.  Returns the number of attempts folded.
+    """
+    cutoff = datetime.combine(_retention_cutoff(PRONUN_RAW_MONTHS), datetime.min.time())
+    pool = await get_pool()
+
+    async with pool.acquire() as conn:
+        await ensure_monthly_partitions(conn, "pronunciation_progress")
+
+        async with conn.transaction():
+            if not await _try_xact_lock(conn, "pronunciation_compaction"):
+                return 0
+
+            folded = await conn.fetchval(
+                "SELECT COUNT(*) FROM pronunciation_progress WHERE created_at < $1", cutoff
+            )
+            if not folded:
+                return 0
+
+            await conn.execute(
+                """INSERT INTO pronunciation_summary
+                       (user_id, item_type, item_key, attempts, score_sum, best_score,
+                        last_score, last_verdict, last_attempt_at, excellent, good, retry)
+                   SELECT user_id, item_type, item_key,
+                          COUNT(*), SUM(score), MAX(score),
+                          MAX(latest_score), MAX(latest_verdict), MAX(created_at),
+                          COUNT(*) FILTER (WHERE verdict = $2),
+                          COUNT(*) FILTER (WHERE verdict = $3),
+                          COUNT(*) FILTER (WHERE verdict = $4)
+                   FROM (
+                       SELECT user_id, item_type, COALESCE(item_id, '') AS item_key,
+                              score, verdict, created_at,
+                              FIRST_VALUE(score) OVER latest AS latest_score,
+                              FIRST_VALUE(verdict) OVER latest AS latest_verdict
+                       FROM pronunciation_progress
+                       WHERE created_at < $1
+                       WINDOW latest AS (PARTITION BY user_id, item_type, COALESCE(item_id, '')
+                                         ORDER BY created_at DESC, id DESC)
+                   ) attempts
+                   GROUP BY user_id, item_type, item_key
+                   ON CONFLICT (user_id, item_type, item_key) DO UPDATE
+                   SET attempts        = pronunciation_summary.attempts + EXCLUDED.attempts,
+                       score_sum       = pronunciation_summary.score_sum + EXCLUDED.score_sum,
+                       best_score      = GREATEST(pronunciation_summary.best_score, EXCLUDED.best_score),
+                       last_score      = CASE WHEN EXCLUDED.last_attempt_at >= pronunciation_summary.last_attempt_at
+                                              THEN EXCLUDED.last_score ELSE pronunciation_summary.last_score END,
+                       last_verdict    = CASE WHEN EXCLUDED.last_attempt_at >= pronunciation_summary.last_attempt_at
+                                              THEN EXCLUDED.last_verdict ELSE pronunciation_summary.last_verdict END,
+                       last_attempt_at = GREATEST(pronunciation_summary.last_attempt_at, EXCLUDED.last_attempt_at),
+                       excellent       = pronunciation_summary.excellent + EXCLUDED.excellent,
+                       good            = pronunciation_summary.good + EXCLUDED.good,
+                       retry           = pronunciation_summary.retry + EXCLUDED.retry""",
+                cutoff, PRONUN_VERDICT_EXCELLENT, PRONUN_VERDICT_GOOD, PRONUN_VERDICT_RETRY,
+            )
+
+            dropped = await _drop_partitions_before(conn, "pronunciation_progress", cutoff.date())
+            await conn.execute("DELETE FROM pronunciation_progress WHERE created_at < $1", cutoff)
+
+    logger.info(f"pronunciation compaction: folded {folded} attempts before {cutoff:%Y-%m-%d}, dropped {dropped}")
+    return folded
+
+
+@read_write
+async def sync_rate_limit_counts(entries: list) -> list:
+    """Add locally counted hits to rate_limits and return global counts.
+
+    *entries* are (user_id, action, window_start, delta) tuples as produced by
+    bot.ratelimit; rows with delta 0 are only read.  Returns
+    (user_id, action, window_start, request_count) tuples.
+    """
+    writes = [e for e in entries if e[3] > 0]
+    reads = [e for e in entries if e[3] <= 0]
+    result = []
 
     pool = await get_pool()
     async with pool.acquire() as conn:
-        row = await conn.fetchrow(
-            """
-            INSERT INTO rate_limits (user_id, action, window_start, request_count)
-            VALUES ($1, $2, $3, 1)
-            ON CONFLICT (user_id, action, window_start) DO UPDATE
-            SET request_count = rate_limits.request_count + 1
-            RETURNING request_count
-            """,
-            user_id,
-            action,
-            window_start,
-        )
+        if get_dialect(conn) != POSTGRES:
+            # No array parameters: one statement per window inside a single commit.
+            async with conn.transaction():
+                for user_id, action, window_start, delta in entries:
+                    if delta > 0:
+                        row = await conn.fetchrow(
+                            """
+                            INSERT INTO rate_limits (user_id, action, window_start, request_count)
+                            VALUES ($1, $2, $3, $4)
+                            ON CONFLICT (user_id, action, window_start) DO UPDATE
+                            SET request_count = rate_limits.request_count + EXCLUDED.request_count
+                            RETURNING user_id, action, window_start, request_count
+                            """,
+                            user_id, action, window_start, delta,
+                        )
+                    else:
+                        row = await conn.fetchrow(
+                            """
+                            SELECT user_id, action, window_start, request_count FROM rate_limits
+                            WHERE user_id = $1 AND action = $2 AND window_start = $3
+                            """,
+                            user_id, action, window_start,
+                        )
+                    if row:
+                        result.append(tuple(row))
+            return result
+
+        if writes:
+            rows = await conn.fetch(
+                """
+                INSERT INTO rate_limits (user_id, action, window_start, request_count)
+                SELECT * FROM unnest($1::bigint[], $2::text[], $3::timestamp[], $4::int[])
+                ON CONFLICT (user_id, action, window_start) DO UPDATE
+                SET request_count = rate_limits.request_count + EXCLUDED.request_count
+                RETURNING user_id, action, window_start, request_count
+                """,
+                [e[0] for e in writes], [e[1] for e in writes],
+                [e[2] for e in writes], [e[3] for e in writes],
+            )
+            result.extend(tuple(r) for r in rows)
+        if reads:
+            rows = await conn.fetch(
+                """
+                SELECT r.user_id, r.action, r.window_start, r.request_count
+                FROM rate_limits r
+                JOIN unnest($1::bigint[], $2::text[], $3::timestamp[])
+                    AS k(user_id, action, window_start)
+                    USING (user_id, action, window_start)
+                """,
+                [e[0] for e in reads], [e[1] for e in reads], [e[2] for e in reads],
+            )
+            result.extend(tuple(r) for r in rows)
+    return result
 
-        # Lightweight cleanup to keep table compact.
-        cleanup_before = datetime.fromtimestamp(window_start_epoch - window_seconds * 24)
-        await conn.execute(
-            "DELETE FROM rate_limits WHERE action = $1 AND window_start < $2",
-            action,
-            cleanup_before,
-        )
 
-    count = int(row["request_count"]) if row else 1
-    allowed = count <= limit
-    retry_after = max(1, window_end_epoch - epoch) if not allowed else 0
-    remaining = max(0, limit - count)
-    return {
-        "allowed": allowed,
-        "count": count,
-        "remaining": remaining,
-        "retry_after": retry_after,
-    }
+@read_write
+async def cleanup_rate_limits() -> int:
+    """Delete rate limit windows older than RATE_LIMIT_RETENTION_HOURS."""
+    cutoff = datetime.now() - timedelta(hours=RATE_LIMIT_RETENTION_HOURS)
+    pool = await get_pool()
+    async with pool.acquire() as conn:
+        status = await conn.execute("DELETE FROM rate_limits WHERE window_start < $1", cutoff)
+    return int(status.split()[-1])
 
 
 # Feedback status codes:
@@ -640,10 +1271,11 @@ FEEDBACK_STATUS_LABELS = {
 MAX_FEEDBACK_LENGTH = 1000
 
 
+@read_write
 async def save_feedback(user_id: int, text: str) -> int:
     """Save user feedback/suggestion. Returns the feedback id."""
     # Ensure user exists in database
-    await get_or_create_user(user_id, None, None)
+    await ensure_user(user_id)
     
     pool = await get_pool()
     now = datetime.now()
@@ -658,6 +1290,7 @@ async def save_feedback(user_id: int, text: str) -> int:
         return result["id"]
 
 
+@read_only
 async def get_user_feedback(user_id: int, limit: int = 10) -> list:
     """Get user's feedback/suggestions ordered by date (newest first)."""
     pool = await get_pool()
@@ -674,6 +1307,7 @@ async def get_user_feedback(user_id: int, limit: int = 10) -> list:
         return [dict(row) for row in rows]
 
 
+@read_only
 async def get_feedback_count(user_id: int) -> int:
     """Get total count of user's feedback."""
     pool = await get_pool()
@@ -686,6 +1320,7 @@ async def get_feedback_count(user_id: int) -> int:
         return result["count"]
 
 
+@read_only
 async def get_priority_word_ids(user_id: int, word_ids: list) -> list:
     """Get word_ids from the given list that have errors, sorted by priority (most errors first)."""
     if not word_ids:
@@ -702,6 +1337,7 @@ async def get_priority_word_ids(user_id: int, word_ids: list) -> list:
         return [row["word_id"] for row in rows]
 
 
+@read_only
 async def get_all_error_word_ids(user_id: int) -> list:
     """Get all word_ids with errors for the user, sorted by priority."""
     pool = await get_pool()
@@ -716,6 +1352,7 @@ async def get_all_error_word_ids(user_id: int) -> list:
         return [row["word_id"] for row in rows]
 
 
+@read_only
 async def get_priority_phrase_ids(user_id: int, phrase_ids: list) -> list:
     """Get phrase_ids from the given list that have errors, sorted by priority."""
     if not phrase_ids:
@@ -732,6 +1369,7 @@ async def get_priority_phrase_ids(user_id: int, phrase_ids: list) -> list:
         return [row["phrase_id"] for row in rows]
 
 
+@read_only
 async def get_all_error_phrase_ids(user_id: int) -> list:
     """Get all phrase_ids with errors for the user, sorted by priority."""
     pool = await get_pool()
@@ -746,6 +1384,7 @@ async def get_all_error_phrase_ids(user_id: int) -> list:
         return [row["phrase_id"] for row in rows]
 
 
+@read_only
 async def get_due_word_ids(user_id: int, word_ids: list, limit: int = 10) -> list:
     """Get word_ids due for SRS review (next_review_at <= NOW), most overdue first."""
     if not word_ids:
@@ -763,6 +1402,7 @@ async def get_due_word_ids(user_id: int, word_ids: list, limit: int = 10) -> lis
         return [row["word_id"] for row in rows]
 
 
+@read_only
 async def get_due_phrase_ids(user_id: int, phrase_ids: list, limit: int = 10) -> list:
     """Get phrase_ids due for SRS review (next_review_at <= NOW), most overdue first."""
     if not phrase_ids:
@@ -780,6 +1420,7 @@ async def get_due_phrase_ids(user_id: int, phrase_ids: list, limit: int = 10) ->
         return [row["phrase_id"] for row in rows]
 
 
+@read_only
 async def get_reviewed_word_ids(user_id: int, word_ids: list) -> set:
     """Get the set of word_ids the user has already reviewed at least once."""
     if not word_ids:
@@ -793,6 +1434,7 @@ async def get_reviewed_word_ids(user_id: int, word_ids: list) -> set:
         return {row["word_id"] for row in rows}
 
 
+@read_only
 async def get_reviewed_phrase_ids(user_id: int, phrase_ids: list) -> set:
     """Get the set of phrase_ids the user has already reviewed at least once."""
     if not phrase_ids:
@@ -806,10 +1448,55 @@ async def get_reviewed_phrase_ids(user_id: int, phrase_ids: list) -> set:
         return {row["phrase_id"] for row in rows}
 
 
+# Above this many ids a progress-state query reads all of the user's rows
+# and filters them here: a scope that large (a whole level) is most of them
+# anyway, and a huge ANY($n) array costs more than the extra rows.
+_STATE_ID_FILTER_LIMIT = 1000
+
+
+async def _progress_states(table: str, id_column: str, user_id: int, item_ids) -> list:
+    if item_ids is not None and not item_ids:
+        return []
+    columns = f"""{id_column} AS item_id, wrong_count, last_wrong_at, next_review_at, srs_streak,
+                  (next_review_at IS NOT NULL AND next_review_at <= $2) AS due"""
+    pool = await get_pool()
+    async with pool.acquire() as conn:
+        if item_ids is None or len(item_ids) > _STATE_ID_FILTER_LIMIT:
+            rows = await conn.fetch(
+                f"SELECT {columns} FROM {table} WHERE user_id = $1",
+                user_id, datetime.now()
+            )
+            if item_ids is None:
+                return [dict(row) for row in rows]
+            wanted = set(item_ids)
+            return [dict(row) for row in rows if row["item_id"] in wanted]
+        rows = await conn.fetch(
+            f"SELECT {columns} FROM {table} WHERE user_id = $1 AND {id_column} = ANY($3)",
+            user_id, datetime.now(), item_ids
+        )
+        return [dict(row) for row in rows]
+
+
+@read_only
+async def get_word_progress_states(user_id: int, word_ids: list = None) -> list:
+    """SRS state of the reviewed words among word_ids (all of them if None), in one query.
+
+    Rows: item_id, wrong_count, last_wrong_at, next_review_at, srs_streak, due.
+    """
+    return await _progress_states("progress", "word_id", user_id, word_ids)
+
+
+@read_only
+async def get_phrase_progress_states(user_id: int, phrase_ids: list = None) -> list:
+    """Same as get_word_progress_states for phrases."""
+    return await _progress_states("phrases_progress", "phrase_id", user_id, phrase_ids)
+
+
 # ============================================================
 # Streak and Achievements
 # ============================================================
 
+@read_write
 async def update_user_activity(user_id: int) -> int:
     """Update last_active_date and streak. Returns new streak value."""
     pool = await get_pool()
@@ -842,6 +1529,7 @@ async def update_user_activity(user_id: int) -> int:
     return new_streak
 
 
+@read_write
 async def check_and_notify_achievements(user_id: int, bot, chat_id: int):
     """Check for new achievements and send notification if any unlocked."""
     from bot.achievements import check_achievements, ACHIEVEMENT_MAP
@@ -859,6 +1547,7 @@ async def check_and_notify_achievements(user_id: int, bot, chat_id: int):
     return new_achievements
 
 
+@read_only
 async def get_user_streak(user_id: int) -> int:
     """Get current streak for user."""
     pool = await get_pool()
@@ -878,6 +1567,7 @@ async def get_user_streak(user_id: int) -> int:
         return 0
 
 
+@read_only
 async def get_user_achievements(user_id: int) -> list:
     """Get list of achievement IDs for user."""
     import json
@@ -894,89 +1584,78 @@ async def get_user_achievements(user_id: int) -> list:
             return []
 
 
+@read_write
+async def save_placement_answers(user_id: int, attempt: str, answers: list) -> bool:
+    """Log one finished placement test: [(question id, correct), ...].
+
+    A test is logged once: returns False and writes nothing if the user's
+    attempt is already in placement_responses.
+    """
+    pool = await get_pool()
+    async with pool.acquire() as conn:
+        logged = await conn.fetchval(
+            "SELECT 1 FROM placement_responses WHERE user_id = $1 AND attempt = $2 LIMIT 1",
+            user_id, attempt
+        )
+    if logged or not answers:
+        _nothing_written()
+        return False
+    await ensure_user(user_id)
+    async with pool.acquire() as conn:
+        await conn.executemany(
+            """INSERT INTO placement_responses (user_id, attempt, item_id, correct, created_at)
+               VALUES ($1, $2, $3, $4, $5)""",
+            [(user_id, attempt, item_id, 1 if correct else 0, datetime.now()) for item_id, correct in answers]
+        )
+    return True
+
+
+@read_only
+async def get_placement_answers(since: datetime = None) -> list:
+    """All logged placement answers (optionally since a time): [(attempt, question id, correct), ...]."""
+    pool = await get_pool()
+    async with pool.acquire() as conn:
+        rows = await conn.fetch(
+            """SELECT attempt, item_id, correct FROM placement_responses
+               WHERE $1::timestamp IS NULL OR created_at >= $1
+               ORDER BY id""",
+            since
+        )
+    return [(row["attempt"], row["item_id"], bool(row["correct"])) for row in rows]
+
+
 # ============================================================
 # Settings: user preferences
 # ============================================================
 
 async def get_user_settings(user_id: int) -> dict:
     """Get user settings (level, reminders)."""
-    pool = await get_pool()
-    async with pool.acquire() as conn:
-        row = await conn.fetchrow(
-            """SELECT reminder_enabled, reminder_hour, reminder_minute,
-                      major_level, sub_level, diagnostic_completed
-               FROM users WHERE user_id = $1""",
-            user_id
-        )
-        if not row:
-            return {
-                "reminder_enabled": 1,
-                "reminder_hour": 9,
-                "reminder_minute": 0,
-                "major_level": "A1",
-                "sub_level": "1",
-            }
-        return dict(row)
+    profile = await get_user_profile(user_id)
+    return {
+        key: profile[key]
+        for key in ("reminder_enabled", "reminder_hour", "reminder_minute",
+                    "major_level", "sub_level", "diagnostic_completed")
+    }
 
 
 async def set_user_level(user_id: int, major: str, sub: str):
     """Persist user's chosen level."""
-    await get_or_create_user(user_id, None, None)
-    pool = await get_pool()
-    async with pool.acquire() as conn:
-        await conn.execute(
-            "UPDATE users SET major_level = $1, sub_level = $2 WHERE user_id = $3",
-            major, sub, user_id
-        )
+    await _update_profile(user_id, "major_level = $1, sub_level = $2", major, sub)
 
 
 async def set_diagnostic_completed(user_id: int, completed: bool = True):
     """Persist onboarding diagnostic completion status."""
-    await get_or_create_user(user_id, None, None)
-    pool = await get_pool()
-    async with pool.acquire() as conn:
-        await conn.execute(
-            "UPDATE users SET diagnostic_completed = $1 WHERE user_id = $2",
-            1 if completed else 0, user_id
-        )
+    await _update_profile(user_id, "diagnostic_completed = $1", 1 if completed else 0)
 
 
 async def get_user_language(user_id: int) -> str:
     """Get user's UI language preference."""
-    pool = await get_pool()
-    async with pool.acquire() as conn:
-        val = await conn.fetchval(
-            "SELECT ui_language FROM users WHERE user_id = $1", user_id
-        )
-        return val or "ru"
+    profile = await get_user_profile(user_id)
+    return profile["ui_language"] or "ru"
 
 
 async def set_user_language(user_id: int, language: str):
     """Persist user's UI language preference."""
     if language not in ("ru", "en", "de"):
         language = "ru"
-    await get_or_create_user(user_id, None, None)
-    pool = await get_pool()
-    async with pool.acquire() as conn:
-        await conn.execute(
-            "UPDATE users SET ui_language = $1 WHERE user_id = $2",
-            language, user_id
-        )
-
-
-async def reset_user_progress(user_id: int):
-    """Delete ALL learning progress for user (irreversible)."""
-    pool = await get_pool()
-    async with pool.acquire() as conn:
-        await conn.execute("DELETE FROM progress WHERE user_id = $1", user_id)
-        await conn.execute("DELETE FROM phrases_progress WHERE user_id = $1", user_id)
-        await conn.execute("DELETE FROM grammar_results WHERE user_id = $1", user_id)
-        await conn.execute("DELETE FROM daily_stats WHERE user_id = $1", user_id)
-        await conn.execute("DELETE FROM dialogues_progress WHERE user_id = $1", user_id)
-        await conn.execute("DELETE FROM culture_progress WHERE user_id = $1", user_id)
-        await conn.execute("DELETE FROM exercises_progress WHERE user_id = $1", user_id)
-        # Reset streak and achievements
-        await conn.execute(
-            "UPDATE users SET current_streak = 0, last_active_date = NULL, achievements = '[]' WHERE user_id = $1",
-            user_id
-        )
+    await _update_profile(user_id, "ui_language = $1", language)
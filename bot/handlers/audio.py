@@ -8,6 +8,9 @@ from gtts import gTTS
 from telegram import Update
 from telegram.ext import ContextTypes
 
+from bot.config import AUDIO_RATE_LIMIT_PER_MINUTE
+from bot.ratelimit import rate_limited_handler
+
 logger = logging.getLogger(__name__)
 
 # Prefer /tmp on Render (ephemeral but fast); fall back to local dir
@@ -76,6 +79,7 @@ async def send_word_audio(update: Update, context: ContextTypes.DEFAULT_TYPE, te
         return None
 
 
+@rate_limited_handler("audio", limit=AUDIO_RATE_LIMIT_PER_MINUTE, window_seconds=60)
 async def audio_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle /audio command to pronounce any German text."""
     if not context.args:
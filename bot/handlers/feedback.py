@@ -16,6 +16,8 @@ from bot.database import (
     FEEDBACK_STATUS_LABELS,
     MAX_FEEDBACK_LENGTH
 )
+from bot.config import FEEDBACK_RATE_LIMIT_PER_HOUR
+from bot.ratelimit import rate_limited_handler
 
 logger = logging.getLogger(__name__)
 
@@ -110,6 +112,7 @@ async def start_new_feedback(update: Update, context: ContextTypes.DEFAULT_TYPE)
     return WAITING_FOR_FEEDBACK
 
 
+@rate_limited_handler("feedback", limit=FEEDBACK_RATE_LIMIT_PER_HOUR, window_seconds=3600)
 async def receive_feedback(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle received feedback text."""
     user_id = update.effective_user.id
@@ -9,12 +9,13 @@ from bot.content_manager import (
     get_words_by_ids
 )
 from bot.database import (
-    update_word_progress, update_daily_stats,
-    get_priority_word_ids, get_all_error_word_ids,
-    get_due_word_ids, get_reviewed_word_ids, update_user_activity,
+    update_daily_stats,
+    get_all_error_word_ids, update_user_activity,
     check_and_notify_achievements
 )
 from bot.handlers.audio import send_word_audio
+from bot.services.review_queue import flush_answers, record_answer
+from bot.services.session_planner import plan_session
 
 logger = logging.getLogger(__name__)
 
@@ -22,7 +23,6 @@ logger = logging.getLogger(__name__)
 FC_LEVEL_SELECT, FC_CATEGORY_SELECT, FC_LEARNING, FC_ANSWER = range(4)
 
 SESSION_SIZE = 10
-MAX_ERROR_WORDS = 5
 
 
 def _get_fc_level(context) -> tuple:
@@ -31,11 +31,10 @@ def _get_fc_level(context) -> tuple:
 
 
 async def _build_session_words(user_id: int, words: list) -> list:
-    """Build a session of up to SESSION_SIZE words using SRS priority.
+    """Build a session of up to SESSION_SIZE words with the shared SRS planner.
 
-    1. Words due for SRS review (next_review_at <= NOW) — highest priority
-    2. New words the user has never seen — fill remaining slots
-    3. Random words — if still not enough
+    Due words first, then words with mistakes, new words and random ones
+    (see bot.services.session_planner).
     """
     if not words:
         return []
@@ -43,33 +42,7 @@ async def _build_session_words(user_id: int, words: list) -> list:
     # Track user activity for streak
     await update_user_activity(user_id)
 
-    word_ids = [w["word_id"] for w in words]
-    word_map = {w["word_id"]: w for w in words}
-
-    # 1. SRS due words (most overdue first)
-    due_ids = await get_due_word_ids(user_id, word_ids, limit=SESSION_SIZE)
-    session_ids = list(due_ids)
-
-    # 2. New words (never reviewed)
-    if len(session_ids) < SESSION_SIZE:
-        reviewed = await get_reviewed_word_ids(user_id, word_ids)
-        new_ids = [wid for wid in word_ids if wid not in reviewed]
-        random.shuffle(new_ids)
-        for wid in new_ids:
-            if len(session_ids) >= SESSION_SIZE:
-                break
-            if wid not in session_ids:
-                session_ids.append(wid)
-
-    # 3. Fill with random words if still not enough
-    if len(session_ids) < SESSION_SIZE:
-        remaining = [wid for wid in word_ids if wid not in set(session_ids)]
-        random.shuffle(remaining)
-        session_ids.extend(remaining[:SESSION_SIZE - len(session_ids)])
-
-    session = [word_map[wid] for wid in session_ids if wid in word_map]
-    random.shuffle(session)
-    return session
+    return await plan_session(user_id, "word", words, SESSION_SIZE)
 
 
 async def flashcards_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -461,7 +434,7 @@ async def handle_answer(update: Update, context: ContextTypes.DEFAULT_TYPE):
         context.user_data["fc_wrong"] = context.user_data.get("fc_wrong", 0) + 1
         result_text = f"Неправильно! Правильный ответ: {word['ru']}"
 
-    await update_word_progress(user_id, word.get("word_id", ""), is_correct)
+    await record_answer(user_id, "word", word.get("word_id", ""), is_correct)
 
     context.user_data["fc_index"] = context.user_data.get("fc_index", 0) + 1
 
@@ -536,8 +509,9 @@ async def finish_session(update: Update, context: ContextTypes.DEFAULT_TYPE):
         f"Используйте /flashcards чтобы продолжить изучение."
     )
 
-    # Check achievements after session ends (progress already saved)
+    # Check achievements after session ends (once the answers are saved)
     try:
+        await flush_answers()
         await check_and_notify_achievements(user_id, context.bot, query.message.chat_id)
     except Exception as e:
         logger.error(f"Achievement check failed: {e}", exc_info=True)
@@ -556,6 +530,7 @@ async def done_session(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     try:
         user_id = update.effective_user.id
+        await flush_answers()
         await check_and_notify_achievements(user_id, context.bot, query.message.chat_id)
     except Exception as e:
         logger.error(f"Achievement check failed: {e}", exc_info=True)
@@ -9,11 +9,12 @@ from bot.content_manager import (
     get_phrases_by_ids
 )
 from bot.database import (
-    save_phrase_progress, update_daily_stats,
-    get_priority_phrase_ids, get_all_error_phrase_ids,
-    get_due_phrase_ids, get_reviewed_phrase_ids, update_user_activity,
+    update_daily_stats,
+    get_all_error_phrase_ids, update_user_activity,
     check_and_notify_achievements
 )
+from bot.services.review_queue import flush_answers, record_answer
+from bot.services.session_planner import plan_session
 
 logger = logging.getLogger(__name__)
 
@@ -21,7 +22,6 @@ logger = logging.getLogger(__name__)
 PF_LEVEL_SELECT, PF_CATEGORY_SELECT, PF_LEARNING, PF_ANSWER = range(10, 14)
 
 SESSION_SIZE = 10
-MAX_ERROR_PHRASES = 5
 
 
 def _get_pf_level(context) -> tuple:
@@ -30,11 +30,10 @@ def _get_pf_level(context) -> tuple:
 
 
 async def _build_session_phrases(user_id: int, phrases: list) -> list:
-    """Build a session of up to SESSION_SIZE phrases using SRS priority.
+    """Build a session of up to SESSION_SIZE phrases with the shared SRS planner.
 
-    1. Phrases due for SRS review (next_review_at <= NOW)
-    2. New phrases the user has never seen
-    3. Random phrases if still not enough
+    Due phrases first, then phrases with mistakes, new phrases and random ones
+    (see bot.services.session_planner).
     """
     if not phrases:
         return []
@@ -42,33 +41,7 @@ async def _build_session_phrases(user_id: int, phrases: list) -> list:
     # Track user activity for streak
     await update_user_activity(user_id)
 
-    phrase_ids = [p["phrase_id"] for p in phrases]
-    phrase_map = {p["phrase_id"]: p for p in phrases}
-
-    # 1. SRS due phrases
-    due_ids = await get_due_phrase_ids(user_id, phrase_ids, limit=SESSION_SIZE)
-    session_ids = list(due_ids)
-
-    # 2. New phrases (never reviewed)
-    if len(session_ids) < SESSION_SIZE:
-        reviewed = await get_reviewed_phrase_ids(user_id, phrase_ids)
-        new_ids = [pid for pid in phrase_ids if pid not in reviewed]
-        random.shuffle(new_ids)
-        for pid in new_ids:
-            if len(session_ids) >= SESSION_SIZE:
-                break
-            if pid not in session_ids:
-                session_ids.append(pid)
-
-    # 3. Fill with random
-    if len(session_ids) < SESSION_SIZE:
-        remaining = [pid for pid in phrase_ids if pid not in set(session_ids)]
-        random.shuffle(remaining)
-        session_ids.extend(remaining[:SESSION_SIZE - len(session_ids)])
-
-    session = [phrase_map[pid] for pid in session_ids if pid in phrase_map]
-    random.shuffle(session)
-    return session
+    return await plan_session(user_id, "phrase", phrases, SESSION_SIZE)
 
 
 async def phrases_flashcards_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -381,11 +354,11 @@ async def pf_handle_answer(update: Update, context: ContextTypes.DEFAULT_TYPE):
         context.user_data["pf_wrong"] = context.user_data.get("pf_wrong", 0) + 1
         result_text = f"Неправильно! Правильный ответ: {phrase['ru']}"
 
-    await save_phrase_progress(
-        user_id,
+    await record_answer(
+        user_id, "phrase",
         phrase.get("phrase_id", ""),
-        phrase.get("category_id", ""),
-        is_correct
+        is_correct,
+        category_id=phrase.get("category_id", "")
     )
 
     context.user_data["pf_index"] = context.user_data.get("pf_index", 0) + 1
@@ -470,7 +443,9 @@ async def pf_finish_session(update: Update, context: ContextTypes.DEFAULT_TYPE):
         f"Используйте /phrases чтобы продолжить."
     )
 
+    # Check achievements after session ends (once the answers are saved)
     try:
+        await flush_answers()
         await check_and_notify_achievements(user_id, context.bot, query.message.chat_id)
     except Exception as e:
         logger.error(f"Achievement check failed: {e}", exc_info=True)
@@ -489,6 +464,7 @@ async def pf_done_session(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     try:
         user_id = update.effective_user.id
+        await flush_answers()
         await check_and_notify_achievements(user_id, context.bot, query.message.chat_id)
     except Exception as e:
         logger.error(f"Achievement check failed: {e}", exc_info=True)
@@ -1,26 +1,23 @@
+from datetime import date, timedelta
+
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes
 
-from bot.database import get_user_stats, get_user_streak, get_user_achievements, get_user_settings
-from bot.content_manager import get_all_words, get_levels_with_content
+from bot.database import (
+    get_user_stats, get_user_streak, get_user_achievements, get_user_settings, get_daily_stats_range
+)
+from bot.content_manager import get_levels_with_content, get_total_counts
 from bot.achievements import get_achievement_display
 
 
 def _get_total_vocab() -> int:
     """Count total vocabulary across all levels with content."""
-    total = 0
-    for level in get_levels_with_content():
-        total += len(get_all_words(level["major"], level["sub"]))
-    return total
+    return get_total_counts()["words"]
 
 
 def _get_total_vocab_for_major(major: str) -> int:
     """Count total vocabulary for a major CEFR block (e.g. A1)."""
-    total = 0
-    for level in get_levels_with_content():
-        if level["major"] == major:
-            total += len(get_all_words(level["major"], level["sub"]))
-    return total
+    return get_total_counts(major)["words"]
 
 
 def _progress_bar(percentage: float, length: int = 10) -> str:
@@ -29,8 +26,33 @@ def _progress_bar(percentage: float, length: int = 10) -> str:
     return "█" * filled + "░" * empty
 
 
+# Weeks of activity shown in /progress (this week included)
+ACTIVITY_WEEKS = 6
+
+
+async def _get_weekly_activity(user_id: int) -> list:
+    """Activity of the last ACTIVITY_WEEKS weeks, oldest first, one dict per week (empty weeks too)."""
+    today = date.today()
+    first = today - timedelta(days=today.weekday(), weeks=ACTIVITY_WEEKS - 1)
+    rows = await get_daily_stats_range(user_id, first, today, granularity="week")
+    by_week = {row["period_start"]: row for row in rows}
+    weeks = [first + timedelta(weeks=i) for i in range(ACTIVITY_WEEKS)]
+    return [by_week.get(week, {"period_start": week, "days_active": 0, "total_answers": 0}) for week in weeks]
+
+
+def _build_activity_block(activity: list) -> str:
+    if not activity or not any(week["days_active"] for week in activity):
+        return ""
+    lines = [
+        f"   {week['period_start']:%d.%m}: {_progress_bar(week['days_active'] / 7 * 100, 7)} "
+        f"{week['days_active']} дн., ответов: {week['total_answers']}"
+        for week in activity
+    ]
+    return "📅 Активность по неделям:\n" + "\n".join(lines) + "\n\n"
+
+
 def _build_stats_text(stats: dict, total_vocab: int, suffix: str = "",
-                      streak: int = 0, achievements: list = None) -> str:
+                      streak: int = 0, achievements: list = None, activity: list = None) -> str:
     words_pct = (stats["total_words"] / total_vocab * 100) if total_vocab > 0 else 0
     mastered_pct = (stats["mastered_words"] / total_vocab * 100) if total_vocab > 0 else 0
 
@@ -86,6 +108,7 @@ def _build_stats_text(stats: dict, total_vocab: int, suffix: str = "",
         f"   Тестов пройдено: {stats['tests_completed']}\n"
         f"   Баллы: {stats['grammar_score']} из {stats['grammar_total']}\n"
         f"   Точность: {grammar_accuracy:.0f}%\n\n"
+        f"{_build_activity_block(activity)}"
         f"{motivation}"
         f"{ach_block}"
         f"{suffix}"
@@ -119,6 +142,7 @@ async def show_progress(update: Update, context: ContextTypes.DEFAULT_TYPE):
     total_vocab = _get_total_vocab()
     streak = await get_user_streak(user_id)
     achievements = await get_user_achievements(user_id)
+    activity = await _get_weekly_activity(user_id)
 
     has_word_errors = stats.get("words_with_errors", 0) > 0
     has_phrase_errors = stats.get("phrases_with_errors", 0) > 0
@@ -137,7 +161,8 @@ async def show_progress(update: Update, context: ContextTypes.DEFAULT_TYPE):
             "Можно перейти на уровень A2.1."
         )
 
-    text = _build_stats_text(stats, total_vocab, suffix=suffix, streak=streak, achievements=achievements)
+    text = _build_stats_text(stats, total_vocab, suffix=suffix, streak=streak, achievements=achievements,
+                             activity=activity)
 
     await update.message.reply_text(
         text,
@@ -156,6 +181,7 @@ async def progress_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
         total_vocab = _get_total_vocab()
         streak = await get_user_streak(user_id)
         achievements = await get_user_achievements(user_id)
+        activity = await _get_weekly_activity(user_id)
 
         has_word_errors = stats.get("words_with_errors", 0) > 0
         has_phrase_errors = stats.get("phrases_with_errors", 0) > 0
@@ -173,7 +199,8 @@ async def progress_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 "Можно перейти на уровень A2.1."
             )
 
-        text = _build_stats_text(stats, total_vocab, suffix=suffix, streak=streak, achievements=achievements)
+        text = _build_stats_text(stats, total_vocab, suffix=suffix, streak=streak, achievements=achievements,
+                             activity=activity)
 
         await query.edit_message_text(
             text,
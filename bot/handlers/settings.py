@@ -9,9 +9,9 @@ import logging
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes
 
+from bot.account import reset_account
 from bot.database import (
-    get_user_settings, set_user_level, set_reminder,
-    reset_user_progress, get_feedback_count
+    get_user_settings, set_user_level, set_reminder, get_feedback_count
 )
 from bot.content_manager import get_levels_with_content
 
@@ -170,7 +170,8 @@ async def _show_reset_confirm(query, context, user_id: int):
         "• Прогресс по словам и фразам\n"
         "• Результаты грамматических тестов\n"
         "• Дневную статистику\n"
-        "• Прогресс по диалогам, культуре, упражнениям\n\n"
+        "• Прогресс по диалогам, культуре, упражнениям\n"
+        "• Историю произношения\n\n"
         "Отменить сброс будет невозможно!",
         reply_markup=InlineKeyboardMarkup([
             [InlineKeyboardButton("❌ Да, сбросить всё", callback_data="set_reset_yes")],
@@ -182,7 +183,7 @@ async def _show_reset_confirm(query, context, user_id: int):
 async def _handle_reset(query, context, user_id: int):
     """Execute progress reset."""
     try:
-        await reset_user_progress(user_id)
+        await reset_account(user_id)
         await query.edit_message_text(
             "✅ Прогресс полностью сброшен.\n\n"
             "Вы можете начать изучение заново!",
@@ -2,11 +2,13 @@ import asyncio
 import logging
 from telegram.ext import Application, CommandHandler, MessageHandler, filters
 
-from bot.config import TELEGRAM_BOT_TOKEN
+from bot.config import TELEGRAM_BOT_TOKEN, CONTENT_LAZY_LOAD, CONTENT_WARMUP
 from bot.database import init_db
-from bot.content_manager import init_content
+from bot.content_manager import init_content, warm_up_content
+from bot.content_watcher import start_content_watcher
 from bot.handlers.common import start, redirect_commands_to_webapp
 from bot.handlers.reminders import setup_reminder_job
+from bot.maintenance import setup_maintenance_jobs
 from bot.handlers.admin import broadcast_command, send_command
 from bot.monitoring import init_sentry, telegram_error_handler_factory
 
@@ -24,7 +26,10 @@ def main():
 
     init_sentry()
     asyncio.run(init_db())
-    init_content()
+    init_content(lazy=CONTENT_LAZY_LOAD)
+    if CONTENT_WARMUP:
+        warm_up_content()
+    start_content_watcher()
 
     application = Application.builder().token(TELEGRAM_BOT_TOKEN).build()
 
@@ -34,6 +39,7 @@ def main():
     application.add_handler(MessageHandler(filters.COMMAND, redirect_commands_to_webapp))
 
     setup_reminder_job(application)
+    setup_maintenance_jobs(application)
     application.add_error_handler(telegram_error_handler_factory())
 
     logger.info("Starting bot (Web App entry only)...")
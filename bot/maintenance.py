@@ -0,0 +1,93 @@
+"""
+Periodic database maintenance: partition upkeep, rollups, compaction and
+rate limit synchronisation.
+
+Each task is an async callable without arguments.  Tasks run either on the
+python-telegram-bot job queue (`python -m bot.main`, see
+`setup_maintenance_jobs`) or on the web server's persistent event loop
+(`start_maintenance`).  Tasks must be safe to run concurrently from several
+workers; they guard themselves with advisory locks where needed.
+"""
+
+import asyncio
+import logging
+import time
+
+from bot.config import DB_MAINTENANCE_INTERVAL_SEC, RATE_LIMIT_SYNC_SEC
+
+logger = logging.getLogger(__name__)
+
+_FIRST_RUN_DELAY_SEC = 30
+# Tasks running more often than this start after one interval, not the fixed delay.
+_QUIET_INTERVAL_SEC = 60
+
+
+def get_maintenance_tasks() -> list:
+    """Return (name, coroutine function, interval seconds) for enabled tasks."""
+    from bot.database import (
+        cleanup_rate_limits,
+        compact_pronunciation_progress,
+        rollup_daily_stats,
+    )
+    from bot.ratelimit import sync_rate_limits
+
+    tasks = [
+        ("rate_limit_sync", sync_rate_limits, RATE_LIMIT_SYNC_SEC),
+        ("rate_limit_cleanup", cleanup_rate_limits, DB_MAINTENANCE_INTERVAL_SEC),
+        ("daily_stats_rollup", rollup_daily_stats, DB_MAINTENANCE_INTERVAL_SEC),
+        ("pronunciation_compaction", compact_pronunciation_progress, DB_MAINTENANCE_INTERVAL_SEC),
+    ]
+    return [t for t in tasks if t[2] > 0]
+
+
+async def run_task(name: str, func) -> None:
+    """Run one maintenance task, logging instead of raising on failure."""
+    started = time.monotonic()
+    try:
+        result = await func()
+        logger.log(logging.INFO if result else logging.DEBUG,
+                   "Maintenance task %s finished in %.0f ms (result=%s)",
+                   name, (time.monotonic() - started) * 1000, result)
+    except Exception as e:
+        logger.error("Maintenance task %s failed: %s", name, e, exc_info=True)
+
+
+def setup_maintenance_jobs(application):
+    """Schedule every maintenance task on the bot's job queue."""
+    job_queue = application.job_queue
+
+    for name, func, interval in get_maintenance_tasks():
+        async def _job(context, name=name, func=func):
+            await run_task(name, func)
+
+        job_queue.run_repeating(_job, interval=interval, first=_first_delay(interval),
+                                name=f"maintenance:{name}")
+
+
+def _first_delay(interval: int) -> int:
+    return interval if interval < _QUIET_INTERVAL_SEC else _FIRST_RUN_DELAY_SEC
+
+
+async def _maintenance_loop(tasks: list) -> None:
+    tick = max(1, min(60, min(interval for _, _, interval in tasks)))
+    next_run = {name: time.monotonic() + _first_delay(interval) for name, _, interval in tasks}
+    while True:
+        await asyncio.sleep(tick)
+        for name, func, interval in tasks:
+            if time.monotonic() >= next_run[name]:
+                next_run[name] = time.monotonic() + interval
+                await run_task(name, func)
+
+
+def start_maintenance(loop: asyncio.AbstractEventLoop):
+    """Run maintenance tasks forever on *loop* (web server mode).
+
+    Returns the concurrent future of the loop task, or None when all tasks
+    are disabled.
+    """
+    tasks = get_maintenance_tasks()
+    if not tasks:
+        logger.info("Database maintenance disabled.")
+        return None
+    logger.info("Database maintenance scheduled: %s", ", ".join(name for name, _, _ in tasks))
+    return asyncio.run_coroutine_threadsafe(_maintenance_loop(tasks), loop)
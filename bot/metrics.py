@@ -0,0 +1,128 @@
+"""
+In-process metrics in the Prometheus text format.
+
+Histograms and counters are plain dicts guarded by one lock; recording a
+sample is a bisect and two additions.  `render()` turns the registry into
+the exposition format for the /metrics endpoint, and gauges are computed
+on demand by callbacks registered with `register_gauges()`.
+"""
+
+import bisect
+import threading
+
+# Seconds; covers cached SQLite reads up to stuck network queries.
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_lock = threading.Lock()
+_metrics = {}
+_gauge_callbacks = []
+
+
+class Histogram:
+    """Cumulative-bucket histogram with one series per label tuple."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, doc: str, labels: tuple, buckets: tuple = DEFAULT_BUCKETS):
+        self.name = name
+        self.doc = doc
+        self.labels = labels
+        self.buckets = tuple(buckets)
+        self._series = {}
+
+    def observe(self, value: float, *label_values) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with _lock:
+            series = self._series.get(label_values)
+            if series is None:
+                # per-bucket counts (+Inf last), sum
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def _lines(self) -> list:
+        lines = []
+        for label_values, (counts, total) in self._series.items():
+            base = _labels(self.labels, label_values)
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'{self.name}_bucket{{{base}{"," if base else ""}le="{le}"}} {cumulative}')
+            lines.append(f"{_series(self.name + '_sum', base)} {total:.6f}")
+            lines.append(f"{_series(self.name + '_count', base)} {cumulative}")
+        return lines
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, doc: str, labels: tuple):
+        self.name = name
+        self.doc = doc
+        self.labels = labels
+        self._series = {}
+
+    def inc(self, *label_values, amount: float = 1) -> None:
+        with _lock:
+            self._series[label_values] = self._series.get(label_values, 0) + amount
+
+    def _lines(self) -> list:
+        return [
+            f"{_series(self.name, _labels(self.labels, values))} {count}"
+            for values, count in self._series.items()
+        ]
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: tuple, values: tuple) -> str:
+    return ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+
+
+def _series(name: str, labels: str) -> str:
+    return f"{name}{{{labels}}}" if labels else name
+
+
+def histogram(name: str, doc: str, labels: tuple = (), buckets: tuple = DEFAULT_BUCKETS) -> Histogram:
+    """Return the histogram *name*, creating it on first use."""
+    with _lock:
+        metric = _metrics.get(name)
+        if metric is None:
+            metric = _metrics[name] = Histogram(name, doc, labels, buckets)
+        return metric
+
+
+def counter(name: str, doc: str, labels: tuple = ()) -> Counter:
+    """Return the counter *name*, creating it on first use."""
+    with _lock:
+        metric = _metrics.get(name)
+        if metric is None:
+            metric = _metrics[name] = Counter(name, doc, labels)
+        return metric
+
+
+def register_gauges(callback) -> None:
+    """Add a callback returning [(name, doc, {labels}, value), ...] at render time."""
+    _gauge_callbacks.append(callback)
+
+
+def render() -> str:
+    """Return all metrics in the Prometheus text exposition format."""
+    out = []
+    with _lock:
+        for metric in _metrics.values():
+            out.append(f"# HELP {metric.name} {metric.doc}")
+            out.append(f"# TYPE {metric.name} {metric.kind}")
+            out.extend(metric._lines())
+
+    gauges = {}
+    for callback in _gauge_callbacks:
+        for name, doc, labels, value in callback():
+            gauge = gauges.setdefault(name, [f"# HELP {name} {doc}", f"# TYPE {name} gauge"])
+            gauge.append(f"{_series(name, _labels(tuple(labels), tuple(labels.values())))} {float(value)}")
+    for lines in gauges.values():
+        out.extend(lines)
+    return "\n".join(out) + "\n"
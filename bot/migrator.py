@@ -1,11 +1,14 @@
 """
-Lightweight database migration runner for asyncpg.
+Lightweight database migration runner (asyncpg or the SQLite backend).
 
 Keeps a `schema_migrations` table with applied version numbers.
 Migration modules live in the `migrations/` package and follow the naming
 convention `NNNN_description.py`.  Each module exposes:
 
     async def upgrade(conn: asyncpg.Connection) -> None: ...
+
+Migrations use PostgreSQL syntax; see bot/backends/sqlite.py for what is
+translated.  Use `bot.backends.get_dialect(conn)` for Postgres-only steps.
 """
 
 import importlib
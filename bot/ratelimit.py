@@ -0,0 +1,276 @@
+"""
+Rate limiting with an in-process fast path.
+
+Every process keeps a sliding-window counter per (key, action): the count of
+the current fixed window plus the previous window's count weighted by how
+much of it still overlaps the sliding window.  Checks never touch the
+database.  Local increments are pushed to the shared `rate_limits` table in
+the background (`sync_rate_limits`, run by bot/maintenance.py), which returns
+the global counts so several instances converge within one sync interval.
+Expired rows are purged by the maintenance job, not on the request path.
+
+Limits are declared with decorators:
+
+    @app.route('/api/audio/<text>')
+    @rate_limited("audio", limit=AUDIO_RATE_LIMIT_PER_MINUTE, window_seconds=60)
+    def api_audio(text): ...
+
+    @rate_limited_handler("feedback", limit=FEEDBACK_RATE_LIMIT_PER_HOUR)
+    async def receive_feedback(update, context): ...
+
+Views that validate their input first call check_rate_limit() after the
+validation instead, so malformed requests do not use up the quota.
+
+Requests without a Telegram user id are keyed by client IP (mapped to a
+negative id, so it never collides with a Telegram user): the last
+X-Forwarded-For address, appended by our proxy, not the client-supplied ones.
+"""
+
+import functools
+import logging
+import threading
+import time
+import zlib
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMIT_MESSAGE = "Слишком много запросов. Повторите через {retry_after} сек."
+
+
+class _Window:
+    __slots__ = ("seconds", "start", "synced", "inflight", "pending", "previous")
+
+    def __init__(self, seconds: int, start: int):
+        self.seconds = seconds
+        self.start = start
+        self.synced = 0      # global count last reported by the database
+        self.inflight = 0    # local hits currently being written
+        self.pending = 0     # local hits not yet written
+        self.previous = 0    # count of the window before `start`
+
+    def current(self) -> int:
+        return self.synced + self.inflight + self.pending
+
+
+class RateLimiter:
+    """Thread-safe sliding-window limiter with deferred database writes."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._windows = {}
+        # (key, action, window_start) -> hits of already rolled-over windows
+        self._unflushed = {}
+
+    def _roll(self, key: int, action: str, window: _Window, start: int) -> None:
+        # In-flight hits are already being written by sync_rate_limits.
+        if window.pending:
+            flush_key = (key, action, window.start)
+            self._unflushed[flush_key] = self._unflushed.get(flush_key, 0) + window.pending
+        window.previous = window.current() if start - window.start == window.seconds else 0
+        window.start = start
+        window.synced = window.inflight = window.pending = 0
+
+    def hit(self, key: int, action: str, limit: int, window_seconds: int = 3600,
+            now: float = None) -> dict:
+        """Consume one unit of *action* quota for *key* if available."""
+        if limit <= 0:
+            return {"allowed": True, "count": 1, "remaining": 0, "retry_after": 0}
+
+        now = time.time() if now is None else now
+        epoch = int(now)
+        start = epoch - (epoch % window_seconds)
+
+        with self._lock:
+            window = self._windows.get((key, action))
+            if window is None or window.seconds != window_seconds:
+                window = self._windows[(key, action)] = _Window(window_seconds, start)
+            elif window.start != start:
+                self._roll(key, action, window, start)
+
+            overlap = 1.0 - (now - start) / window_seconds
+            estimated = window.current() + window.previous * overlap
+            allowed = estimated < limit
+            if allowed:
+                window.pending += 1
+                estimated += 1
+
+        count = int(estimated)
+        if allowed:
+            retry_after = 0
+        elif window.previous and window.current() < limit:
+            # Blocked only by the tail of the previous window.
+            excess = estimated - limit + 1
+            retry_after = max(1, int(excess / window.previous * window_seconds))
+        else:
+            retry_after = max(1, start + window_seconds - epoch)
+        return {
+            "allowed": allowed,
+            "count": count,
+            "remaining": max(0, limit - count),
+            "retry_after": retry_after,
+        }
+
+    def take_pending(self, now: float = None) -> list:
+        """Move local hits to in-flight state and return them for writing.
+
+        Returns (key, action, window_start datetime, delta) tuples.  Windows
+        of the current period with no new hits are included with delta 0 so
+        their global counts can be refreshed.  An expired window's last hits
+        are written too; the window is forgotten once nothing is in flight.
+        """
+        now = time.time() if now is None else now
+        entries = []
+        with self._lock:
+            for (key, action, start), delta in self._unflushed.items():
+                entries.append((key, action, start, delta))
+            self._unflushed.clear()
+
+            for (key, action), window in list(self._windows.items()):
+                age = now - window.start
+                if age >= window.seconds:
+                    # No hit since the window expired, so _roll never moved
+                    # its pending hits to _unflushed: write them from here
+                    if window.pending:
+                        window.inflight += window.pending
+                        entries.append((key, action, window.start, window.pending))
+                        window.pending = 0
+                    elif age >= 2 * window.seconds and not window.inflight:
+                        del self._windows[(key, action)]
+                    continue
+                window.inflight += window.pending
+                entries.append((key, action, window.start, window.pending))
+                window.pending = 0
+
+        return [(key, action, datetime.fromtimestamp(start), delta)
+                for key, action, start, delta in entries]
+
+    def apply_counts(self, rows) -> None:
+        """Adopt global counts returned by the database after a write."""
+        with self._lock:
+            for key, action, window_start, count in rows:
+                window = self._windows.get((key, action))
+                if window is None or datetime.fromtimestamp(window.start) != window_start:
+                    continue
+                window.synced = max(window.synced + window.inflight, int(count))
+                window.inflight = 0
+
+    def restore_pending(self, entries) -> None:
+        """Return in-flight hits to the pending state after a failed write."""
+        with self._lock:
+            for key, action, window_start, delta in entries:
+                if not delta:
+                    continue
+                window = self._windows.get((key, action))
+                start = int(window_start.timestamp())
+                if window is not None and window.start == start:
+                    window.inflight -= delta
+                    window.pending += delta
+                else:
+                    flush_key = (key, action, start)
+                    self._unflushed[flush_key] = self._unflushed.get(flush_key, 0) + delta
+
+
+limiter = RateLimiter()
+
+
+async def sync_rate_limits() -> int:
+    """Write local hits to `rate_limits` and refresh global counts.
+
+    Returns the number of hits written.
+    """
+    from bot.database import sync_rate_limit_counts
+
+    entries = limiter.take_pending()
+    if not entries:
+        return 0
+    try:
+        rows = await sync_rate_limit_counts(entries)
+    except Exception:
+        limiter.restore_pending(entries)
+        raise
+    limiter.apply_counts(rows)
+    return sum(delta for _, _, _, delta in entries)
+
+
+def client_key(user_id=None, remote_addr: str = None) -> int:
+    """Return the limiter key: Telegram user id, or a negative id derived from the IP."""
+    if user_id:
+        return int(user_id)
+    return -(zlib.crc32((remote_addr or "unknown").encode()) + 1)
+
+
+def _flask_client_key() -> int:
+    from flask import request
+
+    user_id = request.args.get("user_id", type=int) or request.form.get("user_id", type=int)
+    if not user_id and request.is_json:
+        data = request.get_json(silent=True) or {}
+        user_id = data.get("user_id") if isinstance(data, dict) else None
+        try:
+            user_id = int(user_id) if user_id else None
+        except (TypeError, ValueError):
+            user_id = None
+    # The client controls everything in X-Forwarded-For except the address our
+    # proxy (Render) appended last: the peer it actually saw.
+    forwarded = request.headers.get("X-Forwarded-For", "")
+    remote_addr = forwarded.split(",")[-1].strip() or request.remote_addr
+    return client_key(user_id, remote_addr)
+
+
+def check_rate_limit(action: str, limit: int, window_seconds: int = 3600, key_func=None):
+    """Consume one unit for the current Flask request; a 429 response when over the limit, else None.
+
+    For views that validate their input first, so malformed requests do not
+    count against the quota.
+    """
+    from flask import jsonify
+
+    key = (key_func or _flask_client_key)()
+    state = limiter.hit(key, action, limit, window_seconds)
+    if state["allowed"]:
+        return None
+    response = jsonify({
+        'success': False,
+        'error': RATE_LIMIT_MESSAGE.format(retry_after=state["retry_after"]),
+    })
+    response.status_code = 429
+    response.headers["Retry-After"] = str(state["retry_after"])
+    return response
+
+
+def rate_limited(action: str, limit: int, window_seconds: int = 3600, key_func=None):
+    """Flask view decorator: answer 429 with Retry-After when over the limit."""
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            limited = check_rate_limit(action, limit, window_seconds, key_func)
+            if limited is not None:
+                return limited
+            return view(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def rate_limited_handler(action: str, limit: int, window_seconds: int = 3600):
+    """python-telegram-bot handler decorator; replies instead of running the handler.
+
+    The wrapped handler returns None when limited, so a ConversationHandler
+    stays in its current state.
+    """
+    def decorator(handler):
+        @functools.wraps(handler)
+        async def wrapper(update, context, *args, **kwargs):
+            user = update.effective_user
+            if user is not None:
+                state = limiter.hit(user.id, action, limit, window_seconds)
+                if not state["allowed"]:
+                    text = "⏳ " + RATE_LIMIT_MESSAGE.format(retry_after=state["retry_after"])
+                    if update.callback_query:
+                        await update.callback_query.answer(text, show_alert=True)
+                    elif update.effective_message:
+                        await update.effective_message.reply_text(text)
+                    return None
+            return await handler(update, context, *args, **kwargs)
+        return wrapper
+    return decorator
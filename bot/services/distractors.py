@@ -0,0 +1,183 @@
+"""
+Hard distractors for multiple-choice words and phrases.
+
+For every word and phrase of a level the index keeps a ranked list of
+confusable alternatives.  Candidates score higher for
+
+* the same category,
+* the same article (der/die/das) for nouns,
+* similar German spelling,
+* similar translation,
+
+and never share the item's German text or translation.  Spelling and
+translation similarity are the cosine of character-bigram vectors, a
+vectorized stand-in for edit distance: the whole level is scored as a
+few matrix products instead of N² Python comparisons.
+
+The indexes are built in the background at start-up (or the first time
+an item of the level is asked for) and rebuilt when the content version
+changes; a request then only samples from the precomputed list.
+"""
+
+import logging
+import random
+import re
+import threading
+import time
+
+import numpy as np
+
+from bot import content_manager as cm
+
+logger = logging.getLogger(__name__)
+
+# Alternatives kept per item
+TOP_K = 12
+
+# Score weights
+_SAME_CATEGORY = 3.0
+_SAME_ARTICLE = 1.5
+_SPELLING = 2.0
+_TRANSLATION = 1.0
+
+# Rows scored at once (bounds the N x N score matrix)
+_CHUNK = 512
+
+_ARTICLES = {"der": 1, "die": 2, "das": 3}
+_WORD_RE = re.compile(r"\w+")
+
+_lock = threading.Lock()
+_indexes = {}  # (kind, level_key) -> DistractorIndex
+
+
+def _fold(text: str) -> str:
+    return " ".join(_WORD_RE.findall((text or "").lower()))
+
+
+def _split_article(de: str) -> tuple:
+    """(article code, rest) for "die Straße" -> (2, "straße")."""
+    folded = _fold(de)
+    article, _, rest = folded.partition(" ")
+    if article in _ARTICLES and rest:
+        return _ARTICLES[article], rest
+    return 0, folded
+
+
+def _bigram_vectors(texts: list) -> np.ndarray:
+    """L2-normalized character-bigram counts, one row per text."""
+    vocabulary = {}
+    rows, cols = [], []
+    for row, text in enumerate(texts):
+        padded = f" {text} "
+        for i in range(len(padded) - 1):
+            rows.append(row)
+            cols.append(vocabulary.setdefault(padded[i:i + 2], len(vocabulary)))
+    matrix = np.zeros((len(texts), max(len(vocabulary), 1)), dtype=np.float32)
+    np.add.at(matrix, (np.array(rows, dtype=np.intp), np.array(cols, dtype=np.intp)), 1.0)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.maximum(norms, 1e-9)
+
+
+def _codes(values: list) -> np.ndarray:
+    mapping = {}
+    return np.array([mapping.setdefault(value, len(mapping)) for value in values], dtype=np.int32)
+
+
+class DistractorIndex:
+    """Ranked alternatives for the items of one level (words or phrases)."""
+
+    def __init__(self, kind: str, level_key: str, records: tuple):
+        self.kind = kind
+        self.level_key = level_key
+        self.version = cm.get_content_version()
+        self.size = len(records)
+        self.rows = {record[f"{kind}_id"]: row for row, record in enumerate(records)}
+        self.top = self._rank(records)
+
+    def _rank(self, records: tuple) -> np.ndarray:
+        n = len(records)
+        if n < 2:
+            return np.zeros((n, 0), dtype=np.int32)
+        articles, stems = zip(*(_split_article(record["de"]) for record in records))
+        articles = np.array(articles, dtype=np.int8)
+        spelling = _bigram_vectors(stems)
+        translations = [_fold(record["ru"]) for record in records]
+        meaning = _bigram_vectors(translations)
+        categories = _codes([record["category_id"] for record in records])
+        same_text = (_codes(stems), _codes(translations))
+
+        k = min(TOP_K, n - 1)
+        top = np.empty((n, k), dtype=np.int32)
+        for start in range(0, n, _CHUNK):
+            rows = slice(start, min(start + _CHUNK, n))
+            scores = _SPELLING * (spelling[rows] @ spelling.T) + _TRANSLATION * (meaning[rows] @ meaning.T)
+            scores += _SAME_CATEGORY * (categories[rows, None] == categories[None, :])
+            scores += _SAME_ARTICLE * ((articles[rows, None] == articles[None, :]) & (articles[rows, None] > 0))
+            # The item itself and anything that would read as the right answer
+            for codes in same_text:
+                scores[codes[rows, None] == codes[None, :]] = -np.inf
+            best = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+            order = np.argsort(-np.take_along_axis(scores, best, axis=1), axis=1)
+            top[rows] = np.take_along_axis(best, order, axis=1)
+        return top
+
+    def alternatives(self, item_id: str):
+        """Rows of the alternatives for *item_id*, best first."""
+        row = self.rows.get(item_id)
+        return self.top[row].tolist() if row is not None else []
+
+
+def _records(kind: str, major: str, sub: str, lang: str = "ru") -> tuple:
+    if kind == "word":
+        return cm.get_all_words(major, sub, lang=lang)
+    return cm.get_all_phrases_flat(major, sub, lang=lang)
+
+
+def get_index(kind: str, major: str, sub: str) -> DistractorIndex:
+    """Index of *kind* ("word" or "phrase") for a level, built on first use."""
+    key = (kind, cm._get_level_key(major, sub))
+    index = _indexes.get(key)
+    if index is not None and index.version == cm.get_content_version():
+        return index
+    with _lock:
+        index = _indexes.get(key)
+        if index is None or index.version != cm.get_content_version():
+            started = time.perf_counter()
+            index = _indexes[key] = DistractorIndex(kind, key[1], _records(kind, major, sub))
+            logger.info(
+                f"Distractor index {kind}s {key[1]}: {index.size} items "
+                f"in {(time.perf_counter() - started) * 1000:.0f} ms"
+            )
+        return index
+
+
+def pick_distractors(kind: str, item_id: str, count: int, lang: str = "ru", exclude_text: str = "") -> list:
+    """*count* alternatives for *item_id* from its level, sampled from the best ranked.
+
+    Returns [] for an unknown id; records are in *lang* like the getters.
+    """
+    major, _, rest = item_id.partition("_")
+    sub = rest.partition("_")[0]
+    if (major, sub) not in cm.AVAILABLE_LEVELS:
+        return []
+    index = get_index(kind, major, sub)
+    records = _records(kind, major, sub, lang)
+    if len(records) != index.size:
+        return []
+    candidates = [records[row] for row in index.alternatives(item_id) if records[row]["ru"] != exclude_text]
+    # A little variety: sample from twice as many as needed
+    pool = candidates[:count * 2]
+    return random.sample(pool, min(count, len(pool)))
+
+
+def build_all() -> None:
+    for level in cm.get_levels_with_content():
+        for kind in ("word", "phrase"):
+            get_index(kind, level["major"], level["sub"])
+
+
+def build_in_background() -> threading.Thread:
+    """Build the indexes of every level in a daemon thread (at start-up)."""
+    thread = threading.Thread(target=build_all, name="distractor-index", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,301 @@
+"""
+Adaptive placement test: computerized adaptive testing with 3PL IRT.
+
+Every diagnostic question is an item with discrimination a, difficulty b
+and guessing c = 1 / number of options:
+
+    P(correct | theta) = c + (1 - c) / (1 + exp(-a * (theta - b)))
+
+Until a question is calibrated (placement_irt.json, written by
+scripts/calibrate_placement.py from logged answers) b comes from its CEFR
+level: A1.1 ... C2.2 sit LEVEL_STEP apart around 0, and a is DEFAULT_A.
+
+The ability theta is the posterior mean (EAP) on a fixed grid with a
+normal prior; the posterior SD is its standard error.  The next question
+is the unanswered one with the most Fisher information at theta (one of
+the best TOP_CANDIDATES at random, so users do not all get the same
+questions).  The test stops once SE <= TARGET_SE after at least MIN_ITEMS
+answers, after MAX_ITEMS, or when the bank runs out; theta maps back to
+the nearest level.
+
+Every step works on the whole bank at once with NumPy, and calibration
+(Bock-Aitkin EM) on all logged answers at once.
+"""
+
+import logging
+import random
+import threading
+import time
+
+import numpy as np
+
+from bot import content_manager as cm
+
+logger = logging.getLogger(__name__)
+
+TARGET_SE = 0.5
+MIN_ITEMS = 5
+MAX_ITEMS = 12
+TOP_CANDIDATES = 2
+# Questions answered per API call: the next question plus what follows
+# each possible answer, this many levels deep
+LOOKAHEAD = 6
+
+DEFAULT_A = 1.5
+LEVEL_STEP = 0.5
+PRIOR_MEAN = 0.0
+PRIOR_SD = 1.5
+# Calibrated a, b replace the level defaults after this many logged answers
+MIN_CALIBRATION_ANSWERS = 30
+# Item parameter priors for calibration (around the level defaults)
+_A_PRIOR_SD = 0.5
+_B_PRIOR_SD = 1.0
+
+_GRID = np.linspace(-4.0, 4.0, 81)
+_LOG_PRIOR = -0.5 * ((_GRID - PRIOR_MEAN) / PRIOR_SD) ** 2
+
+LEVELS = tuple(f"{major}.{sub}" for major, sub in cm.AVAILABLE_LEVELS)
+_LEVEL_NAMES = {
+    "A1.1": "Начинающий",
+    "A1.2": "Продолжающий A1",
+    "A2.1": "Базовый пользователь",
+    "A2.2": "Уверенный базовый",
+    "B1.1": "Средний",
+    "B1.2": "Уверенный средний",
+    "B2.1": "Выше среднего",
+    "B2.2": "Продвинутый",
+    "C1.1": "Профессиональный",
+    "C1.2": "Уверенный профессиональный",
+    "C2.1": "Почти носитель",
+    "C2.2": "Свободное владение",
+}
+
+_lock = threading.Lock()
+_bank = None  # (content version, ItemBank)
+
+
+def level_theta(level: str) -> float:
+    """Ability at the centre of a level ("B1.2")."""
+    index = LEVELS.index(level) if level in LEVELS else 0
+    return (index - (len(LEVELS) - 1) / 2) * LEVEL_STEP
+
+
+def theta_level(theta: float) -> str:
+    index = int(round(theta / LEVEL_STEP + (len(LEVELS) - 1) / 2))
+    return LEVELS[min(max(index, 0), len(LEVELS) - 1)]
+
+
+def _icc(a: np.ndarray, b: np.ndarray, c: np.ndarray, theta: np.ndarray) -> np.ndarray:
+    """P(correct), items x theta."""
+    p = c[:, None] + (1 - c[:, None]) / (1 + np.exp(-a[:, None] * (theta[None, :] - b[:, None])))
+    return np.clip(p, 1e-6, 1 - 1e-6)
+
+
+class ItemBank:
+    """Diagnostic questions with their IRT parameters."""
+
+    def __init__(self, questions: list):
+        self.questions = list(questions)
+        # What the client sees: the question without its parameters
+        self.public = [{key: value for key, value in q.items() if key != "irt"} for q in self.questions]
+        self.ids = [question["id"] for question in self.questions]
+        self.rows = {item_id: row for row, item_id in enumerate(self.ids)}
+        self.size = len(self.questions)
+        self.a_prior = np.full(self.size, DEFAULT_A)
+        self.b_prior = np.array([level_theta(question.get("level", "")) for question in self.questions])
+        self.c = np.array([1 / len(q["options"]) if len(q.get("options", ())) > 1 else 0.0 for q in self.questions])
+        self.a, self.b = self.a_prior.copy(), self.b_prior.copy()
+        for row, question in enumerate(self.questions):
+            irt = question.get("irt")
+            if irt and irt.get("n", 0) >= MIN_CALIBRATION_ANSWERS:
+                self.a[row], self.b[row] = irt["a"], irt["b"]
+        p = _icc(self.a, self.b, self.c, _GRID)
+        self._log_p, self._log_q = np.log(p), np.log(1 - p)
+
+    def parse(self, responses: list) -> tuple:
+        """(rows, correct) of [{"id", "correct"}, ...]; unknown and repeated ids are skipped."""
+        rows, correct, seen = [], [], set()
+        for response in responses or ():
+            row = self.rows.get(str(response.get("id", "")))
+            if row is not None and row not in seen:
+                seen.add(row)
+                rows.append(row)
+                correct.append(bool(response.get("correct")))
+        return rows, correct
+
+    def log_posterior(self, rows: list, correct: list) -> np.ndarray:
+        """Unnormalized log posterior of theta on the grid."""
+        log_post = _LOG_PRIOR.copy()
+        if rows:
+            answers = np.array(correct)[:, None]
+            log_post += np.where(answers, self._log_p[rows], self._log_q[rows]).sum(axis=0)
+        return log_post
+
+    def answer(self, log_post: np.ndarray, row: int, correct: bool) -> np.ndarray:
+        """log_post updated with one more answer."""
+        return log_post + (self._log_p[row] if correct else self._log_q[row])
+
+    @staticmethod
+    def estimate(log_post: np.ndarray) -> tuple:
+        """(theta, standard error): EAP on the grid."""
+        weights = np.exp(log_post - log_post.max())
+        weights /= weights.sum()
+        theta = float(weights @ _GRID)
+        return theta, float(np.sqrt(weights @ (_GRID - theta) ** 2))
+
+    def information(self, theta: float) -> np.ndarray:
+        """Fisher information of every item at theta."""
+        p = _icc(self.a, self.b, self.c, np.array([theta]))[:, 0]
+        return self.a ** 2 * ((p - self.c) / (1 - self.c)) ** 2 * (1 - p) / p
+
+    def select(self, theta: float, rows: list) -> int:
+        """Row of the next question: one of the most informative unanswered ones."""
+        info = self.information(theta)
+        info[rows] = -np.inf
+        candidates = min(TOP_CANDIDATES, self.size - len(rows))
+        best = np.argpartition(-info, candidates - 1)[:candidates]
+        return int(random.choice(best))
+
+    def finished(self, rows: list, se: float) -> bool:
+        answered = len(rows)
+        return answered >= min(MAX_ITEMS, self.size) or (answered >= MIN_ITEMS and se <= TARGET_SE)
+
+
+def get_bank() -> ItemBank:
+    """The bank for the current content version (diagnostic test + calibration)."""
+    global _bank
+    version = cm.get_content_version()
+    current = _bank
+    if current is not None and current[0] == version:
+        return current[1]
+    with _lock:
+        if _bank is None or _bank[0] != version:
+            _bank = (version, ItemBank(cm.get_diagnostic_questions()))
+        return _bank[1]
+
+
+def level_result(theta: float, se: float, answered: int) -> dict:
+    """Recommendation in the shape of recommend_diagnostic_level, plus theta and SE."""
+    level = theta_level(theta)
+    major, sub = level.split(".")
+    return {
+        "major": major,
+        "sub": sub,
+        "name": f"{level} ({_LEVEL_NAMES.get(level, level)})",
+        "theta": round(theta, 3),
+        "se": round(se, 3),
+        "answered": answered,
+    }
+
+
+def _node(bank: ItemBank, rows: list, log_post: np.ndarray, depth: int):
+    """The next question and what follows each answer; {"done": True} when over, None past depth."""
+    theta, se = bank.estimate(log_post)
+    if bank.finished(rows, se):
+        return {"done": True}
+    if depth <= 0:
+        return None
+    row = bank.select(theta, rows)
+    return {
+        "question": bank.public[row],
+        "if_correct": _node(bank, rows + [row], bank.answer(log_post, row, True), depth - 1),
+        "if_wrong": _node(bank, rows + [row], bank.answer(log_post, row, False), depth - 1),
+    }
+
+
+def next_step(responses: list, lookahead: int = LOOKAHEAD) -> dict:
+    """Next step of the test for the answers so far ([{"id", "correct"}, ...]).
+
+    {"done": True, "result": level_result(...)} once the estimate is precise
+    enough, else {"done": False, "theta", "se", "answered", "next": node}
+    where node is {"question", "if_correct", "if_wrong"}: the children are
+    nodes, {"done": True} (the test is over after that answer) or None
+    (ask again with the answers given).
+    """
+    bank = get_bank()
+    rows, correct = bank.parse(responses)
+    log_post = bank.log_posterior(rows, correct)
+    theta, se = bank.estimate(log_post)
+    if bank.finished(rows, se):
+        return {"done": True, "result": level_result(theta, se, len(rows))}
+    return {
+        "done": False,
+        "theta": round(theta, 3),
+        "se": round(se, 3),
+        "answered": len(rows),
+        "next": _node(bank, rows, log_post, lookahead),
+    }
+
+
+def answered_items(responses: list) -> list:
+    """[(question id, correct), ...] of the valid answers, for logging."""
+    bank = get_bank()
+    rows, correct = bank.parse(responses)
+    return [(bank.ids[row], answer) for row, answer in zip(rows, correct)]
+
+
+# ── Calibration ──────────────────────────────────────────────────
+
+def _m_step(a, b, c, a0, b0, n, r, steps: int = 5) -> tuple:
+    """Fisher scoring of every item's (a, b) at once; n, r: expected answers / correct per grid point."""
+    for _ in range(steps):
+        d = _GRID[None, :] - b[:, None]
+        s = 1 / (1 + np.exp(-a[:, None] * d))
+        p = np.clip(c[:, None] + (1 - c[:, None]) * s, 1e-6, 1 - 1e-6)
+        dp = (1 - c[:, None]) * s * (1 - s)
+        residual = (r - n * p) / (p * (1 - p))
+        weight = n / (p * (1 - p)) * dp ** 2
+        grad_a = (residual * dp * d).sum(axis=1) - (a - a0) / _A_PRIOR_SD ** 2
+        grad_b = -a * (residual * dp).sum(axis=1) - (b - b0) / _B_PRIOR_SD ** 2
+        i_aa = (weight * d * d).sum(axis=1) + 1 / _A_PRIOR_SD ** 2
+        i_ab = -a * (weight * d).sum(axis=1)
+        i_bb = a ** 2 * weight.sum(axis=1) + 1 / _B_PRIOR_SD ** 2
+        det = i_aa * i_bb - i_ab ** 2
+        a = np.clip(a + (i_bb * grad_a - i_ab * grad_b) / det, 0.2, 4.0)
+        b = np.clip(b + (i_aa * grad_b - i_ab * grad_a) / det, -4.0, 4.0)
+    return a, b
+
+
+def calibrate(answers: list, iterations: int = 100, tolerance: float = 1e-4) -> dict:
+    """Item parameters from logged answers [(attempt, question id, correct), ...].
+
+    Marginal maximum likelihood (Bock-Aitkin EM over the ability grid) with
+    priors around the level defaults; c stays 1 / number of options.
+    Returns {question id: {"a", "b", "n"}} for questions with answers.
+    """
+    bank = get_bank()
+    attempts = {}
+    cells = [
+        (attempts.setdefault(attempt, len(attempts)), bank.rows[item_id], bool(correct))
+        for attempt, item_id, correct in answers if item_id in bank.rows
+    ]
+    if not cells:
+        return {}
+    people, items, correct = (np.array(column) for column in zip(*cells))
+    answered = np.zeros((len(attempts), bank.size))
+    right = np.zeros((len(attempts), bank.size))
+    answered[people, items] = 1.0
+    right[people, items] = correct
+
+    started = time.perf_counter()
+    a, b = bank.a_prior.copy(), bank.b_prior.copy()
+    for iteration in range(iterations):
+        p = _icc(a, b, bank.c, _GRID)
+        log_post = right @ np.log(p) + (answered - right) @ np.log(1 - p) + _LOG_PRIOR
+        posterior = np.exp(log_post - log_post.max(axis=1, keepdims=True))
+        posterior /= posterior.sum(axis=1, keepdims=True)
+        n, r = answered.T @ posterior, right.T @ posterior
+        new_a, new_b = _m_step(a, b, bank.c, bank.a_prior, bank.b_prior, n, r)
+        change = max(np.abs(new_a - a).max(), np.abs(new_b - b).max())
+        a, b = new_a, new_b
+        if change < tolerance:
+            break
+    logger.info(
+        f"Placement calibration: {len(attempts)} tests, {len(cells)} answers, "
+        f"{iteration + 1} EM iterations in {(time.perf_counter() - started) * 1000:.0f} ms"
+    )
+    counts = answered.sum(axis=0)
+    return {
+        bank.ids[row]: {"a": round(float(a[row]), 3), "b": round(float(b[row]), 3), "n": int(counts[row])}
+        for row in np.flatnonzero(counts)
+    }
@@ -0,0 +1,193 @@
+"""
+In-memory SRS review queues of active learners.
+
+The first flashcard session of a user loads all of their word (or phrase)
+progress with one query into a ReviewQueue: the SRS state of every
+reviewed item and a heap of (next_review_at, item_id).  Answers update the
+queue in place, the same way update_word_progress / save_phrase_progress
+update the row, and are written to the database in the background by one
+writer task, in answer order.  Later sessions are planned from memory
+(bot.services.session_planner), without a query.
+
+A queue is dropped after REVIEW_QUEUE_IDLE_SEC without use, or when it no
+longer matches the database (a failed write, account reset).  Queues are
+per process: progress written by another process (the bot worker and the
+web server) shows up once the queue is dropped.  REVIEW_QUEUE_IDLE_SEC=0
+disables the queues: sessions read the database and answers are written
+before the reply, as before.
+"""
+
+import asyncio
+import contextvars
+import heapq
+import logging
+from datetime import datetime, timedelta
+
+from bot import metrics
+from bot.cache import LRUCache
+from bot.config import REVIEW_QUEUE_IDLE_SEC, REVIEW_QUEUE_SIZE
+from bot.database import (
+    _srs_interval, get_phrase_progress_states, get_word_progress_states,
+    save_phrase_progress, update_word_progress,
+)
+
+logger = logging.getLogger(__name__)
+
+_STATE_QUERIES = {
+    "word": get_word_progress_states,
+    "phrase": get_phrase_progress_states,
+}
+
+# (user_id, kind) -> ReviewQueue; every use sets the entry again, so the TTL
+# counts from the last use
+_queues = LRUCache(REVIEW_QUEUE_SIZE, ttl=REVIEW_QUEUE_IDLE_SEC)
+
+# Background writes: (event loop, asyncio.Queue, writer task)
+_writer = None
+# user_id -> writes queued and not finished yet
+_pending = {}
+
+
+def enabled() -> bool:
+    return REVIEW_QUEUE_IDLE_SEC > 0
+
+
+class ReviewQueue:
+    """SRS state of one user's words or phrases with a due-time heap."""
+
+    def __init__(self, states: list):
+        self.states = {state["item_id"]: dict(state) for state in states}
+        self._rebuild()
+
+    def _rebuild(self) -> None:
+        self.heap = [
+            (state["next_review_at"], item_id)
+            for item_id, state in self.states.items() if state["next_review_at"] is not None
+        ]
+        heapq.heapify(self.heap)
+
+    def due(self, now: datetime) -> set:
+        """Ids due for review at *now*; drops outdated heap entries on the way."""
+        current = []
+        while self.heap and self.heap[0][0] <= now:
+            entry = heapq.heappop(self.heap)
+            if self.states[entry[1]]["next_review_at"] == entry[0]:
+                current.append(entry)
+        for entry in current:
+            heapq.heappush(self.heap, entry)
+        return {item_id for _, item_id in current}
+
+    def snapshot(self, now: datetime) -> list:
+        """States in the shape of get_word_progress_states rows, `due` as of *now*."""
+        due = self.due(now)
+        return [{**state, "due": item_id in due} for item_id, state in self.states.items()]
+
+    def apply(self, item_id: str, is_correct: bool, now: datetime) -> None:
+        """Update the item as update_word_progress updates its row."""
+        state = self.states.setdefault(item_id, {
+            "item_id": item_id, "wrong_count": 0, "last_wrong_at": None,
+            "next_review_at": None, "srs_streak": 0,
+        })
+        if is_correct:
+            state["srs_streak"] += 1
+            state["wrong_count"] = max(state["wrong_count"] - 1, 0)
+            state["next_review_at"] = now + _srs_interval(state["srs_streak"])
+        else:
+            state["srs_streak"] = 0
+            state["wrong_count"] += 1
+            state["last_wrong_at"] = now
+            state["next_review_at"] = now + timedelta(days=1)
+        # The old entry of the item stays in the heap until due() meets it
+        if len(self.heap) > 2 * len(self.states) + 64:
+            self._rebuild()
+        else:
+            heapq.heappush(self.heap, (state["next_review_at"], item_id))
+
+
+async def get_states(user_id: int, kind: str):
+    """Progress states of all of the user's *kind* items ("word" or "phrase").
+
+    Loads the queue with one query if the user has none; returns None when
+    the queues are disabled.
+    """
+    if not enabled():
+        return None
+    key = (user_id, kind)
+    queue = _queues.get(key)
+    if queue is None:
+        if _pending.get(user_id):
+            await flush_answers()
+        queue = ReviewQueue(await _STATE_QUERIES[kind](user_id))
+    _queues.set(key, queue)
+    return queue.snapshot(datetime.now())
+
+
+async def record_answer(user_id: int, kind: str, item_id: str, is_correct: bool, category_id: str = "") -> None:
+    """Save an answer: the queue now, the database in the background."""
+    if kind == "word":
+        write, args = update_word_progress, (user_id, item_id, is_correct)
+    else:
+        write, args = save_phrase_progress, (user_id, item_id, category_id, is_correct)
+    if not enabled():
+        await write(*args)
+        return
+
+    key = (user_id, kind)
+    queue = _queues.get(key)
+    if queue is not None:
+        queue.apply(item_id, is_correct, datetime.now())
+        _queues.set(key, queue)
+    _pending[user_id] = _pending.get(user_id, 0) + 1
+    _write_queue().put_nowait((user_id, write, args))
+
+
+def _write_queue() -> asyncio.Queue:
+    global _writer
+    loop = asyncio.get_running_loop()
+    if _writer is None or _writer[0] is not loop or _writer[2].done():
+        writes = asyncio.Queue()
+        # A fresh context: the writer must not inherit the caller's DB routing
+        task = loop.create_task(_write_loop(writes), name="review-writer", context=contextvars.Context())
+        _writer = (loop, writes, task)
+    return _writer[1]
+
+
+async def _write_loop(writes: asyncio.Queue) -> None:
+    while True:
+        user_id, write, args = await writes.get()
+        try:
+            await write(*args)
+        except Exception as e:
+            logger.error(f"Background progress write for user {user_id} failed: {e}")
+            forget_user_queues(user_id)
+        finally:
+            _pending[user_id] -= 1
+            if not _pending[user_id]:
+                del _pending[user_id]
+            writes.task_done()
+
+
+async def flush_answers() -> None:
+    """Wait until the answers recorded on this event loop are in the database."""
+    writer = _writer
+    if writer is not None and writer[0] is asyncio.get_running_loop():
+        await writer[1].join()
+
+
+def forget_user_queues(user_id: int) -> None:
+    """Drop the user's queues (their progress changed outside record_answer)."""
+    for kind in _STATE_QUERIES:
+        _queues.pop((user_id, kind))
+
+
+def _gauges() -> list:
+    stats = _queues.stats()
+    gauges = [
+        (f"cache_{key}", f"In-process cache {key}", {"cache": "review_queues"}, stats[key])
+        for key in ("size", "hits", "misses")
+    ]
+    gauges.append(("review_pending_writes", "Answers not written to the database yet", {}, sum(_pending.values())))
+    return gauges
+
+
+metrics.register_gauges(_gauges)
@@ -0,0 +1,289 @@
+"""
+Full-text search over vocabulary, phrases, dialogues and culture topics.
+
+The index is built from bot.content_manager for every level with content
+and rebuilt when the content version changes.  German, Russian and
+English fields and examples are indexed after the same folding as
+pronunciation checks (lower case, ß -> ss, ä/ö/ü -> ae/oe/ue; also ё -> е),
+so "strasse" finds "Straße".  The last query token is matched as a prefix
+for autocomplete; every token must match.  Headwords and names weigh
+more than descriptions, descriptions more than examples and dialogue
+lines; exact token matches beat prefix matches.  An entry that appears in
+several levels (the same German headword and type) is returned once, from
+its best-ranked level (the lowest one on a tie).
+"""
+
+import bisect
+import heapq
+import logging
+import re
+import threading
+import time
+
+from bot import content_manager as cm
+
+logger = logging.getLogger(__name__)
+
+DOC_TYPES = ("word", "phrase", "dialogue", "culture")
+MAX_LIMIT = 50
+
+# Field weights
+_HEADWORD = 4
+_DESCRIPTION = 2
+_TEXT = 1
+# Score factor for a prefix (not exact) token match
+_PREFIX_FACTOR = 0.6
+# Prefixes shorter than this only match whole tokens
+_MIN_PREFIX = 2
+# Matches for prefixes up to this length are merged when the index is built
+# (short prefixes expand to hundreds of terms)
+_MERGED_PREFIX = 3
+
+_FOLD = str.maketrans({"ß": "ss", "ä": "ae", "ö": "oe", "ü": "ue", "ё": "е"})
+_TOKEN_RE = re.compile(r"\w+")
+
+_lock = threading.Lock()
+_index = None  # (content version, SearchIndex)
+
+
+def normalize(text: str) -> str:
+    return " ".join(tokenize(text))
+
+
+def tokenize(text: str) -> list:
+    return _TOKEN_RE.findall((text or "").lower().translate(_FOLD))
+
+
+class SearchIndex:
+    def __init__(self):
+        self.docs = []
+        # token -> {doc index: best field weight}
+        self.postings = {}
+        self.terms = []
+        # short prefix -> {doc index: score}, exact and prefix matches merged
+        self.prefixes = {}
+        # per doc: "\nde\nru\nen\n" (normalized) and a tie-break below the
+        # smallest score step (shorter headword first, then index order)
+        self.headwords = []
+        self.tiebreak = []
+        # per doc: group of the same entry in other levels, (type, German
+        # headword) or the translation for topics without a German name
+        self.groups = []
+        self._group_ids = {}
+        self.by_level = {}
+        self.by_type = {}
+        self._seen = set()
+
+    def add(self, doc: dict, fields: list) -> None:
+        """Index *doc* (the search result) under [(text, weight), ...].
+
+        The same entry in several categories of a level is indexed once.
+        """
+        de, ru, en = normalize(doc["de"]), normalize(doc["ru"]), normalize(doc["en"])
+        key = (doc["type"], doc["level"], de, ru)
+        if key in self._seen:
+            return
+        self._seen.add(key)
+        doc_id = len(self.docs)
+        self.docs.append(doc)
+        self.headwords.append(f"\n{de}\n{ru}\n{en}\n")
+        self.tiebreak.append(-1e-9 * (min(len(de), 999) * 100_000 + doc_id))
+        group = (doc["type"], de or ru)
+        self.groups.append(self._group_ids.setdefault(group, len(self._group_ids)))
+        self.by_level.setdefault(doc["level"], set()).add(doc_id)
+        self.by_type.setdefault(doc["type"], set()).add(doc_id)
+        for text, weight in fields:
+            for token in tokenize(text):
+                postings = self.postings.setdefault(token, {})
+                if postings.get(doc_id, 0) < weight:
+                    postings[doc_id] = weight
+
+    def finish(self) -> None:
+        self.terms = sorted(self.postings)
+        self._seen = self._group_ids = None
+        prefixes = {term[:length] for term in self.terms for length in range(_MIN_PREFIX, _MERGED_PREFIX + 1)}
+        self.prefixes = {prefix: self._expand(prefix) for prefix in prefixes}
+
+    def _matches(self, token: str, prefix: bool) -> dict:
+        """{doc index: score} for one query token (read-only)."""
+        if not prefix or len(token) < _MIN_PREFIX:
+            return self.postings.get(token, {})
+        if len(token) <= _MERGED_PREFIX:
+            return self.prefixes.get(token, {})
+        return self._expand(token)
+
+    def _expand(self, token: str) -> dict:
+        scores = dict(self.postings.get(token, {}))
+        start = bisect.bisect_left(self.terms, token)
+        for term in self.terms[start:]:
+            if not term.startswith(token):
+                break
+            if term == token:
+                continue
+            for doc_id, weight in self.postings[term].items():
+                score = weight * _PREFIX_FACTOR
+                if scores.get(doc_id, 0) < score:
+                    scores[doc_id] = score
+        return scores
+
+    def search(self, query: str, levels=None, types=None, limit: int = 20) -> list:
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        unique = tuple(dict.fromkeys(tokens))
+        candidates = None
+        for token in unique:
+            matches = self._matches(token, prefix=token == tokens[-1])
+            if candidates is None:
+                candidates = matches
+            else:
+                candidates = {d: s + matches[d] for d, s in candidates.items() if d in matches}
+            if not candidates:
+                return []
+
+        ids = candidates.keys()
+        if levels:
+            ids = ids & set().union(*(self.by_level.get(level, ()) for level in levels))
+        if types:
+            ids = ids & set().union(*(self.by_type.get(kind, ()) for kind in types))
+
+        # The query is a headword or starts one: only docs matched in a
+        # headword for every token can qualify
+        threshold = len(unique) * _HEADWORD * _PREFIX_FACTOR
+        scores = candidates
+        exact, start = f"\n{' '.join(tokens)}\n", f"\n{' '.join(tokens)}"
+        for doc_id in [d for d in ids if candidates[d] >= threshold]:
+            headwords = self.headwords[doc_id]
+            if exact in headwords:
+                bonus = _HEADWORD
+            elif start in headwords:
+                bonus = _DESCRIPTION
+            else:
+                continue
+            if scores is candidates:
+                scores = dict(candidates)
+            scores[doc_id] += bonus
+
+        tiebreak, groups = self.tiebreak, self.groups
+        # One result per entry: the best-ranked of its levels
+        ranked = {}
+        for doc_id in ids:
+            rank = scores[doc_id] + tiebreak[doc_id]
+            current = ranked.get(groups[doc_id])
+            if current is None or rank > current[0]:
+                ranked[groups[doc_id]] = (rank, doc_id)
+        best = [doc_id for _, doc_id in heapq.nlargest(limit, ranked.values())]
+        return [self.docs[doc_id] for doc_id in best]
+
+
+def _add_words(index: SearchIndex, major: str, sub: str, level: str) -> None:
+    for word, word_en in zip(cm.get_all_words(major, sub), cm.get_all_words(major, sub, lang="en")):
+        index.add(
+            cm.FrozenDict({
+                "type": "word", "id": word["word_id"], "level": level, "category_id": word["category_id"],
+                "de": word["de"], "ru": word["ru"], "en": word_en["ru"], "example": word["example"],
+            }),
+            [
+                (word["de"], _HEADWORD), (word["ru"], _HEADWORD), (word_en["ru"], _HEADWORD),
+                (word["example"], _TEXT), (word["example_ru"], _TEXT), (word_en["example_ru"], _TEXT),
+            ],
+        )
+
+
+def _add_phrases(index: SearchIndex, major: str, sub: str, level: str) -> None:
+    for phrase, phrase_en in zip(cm.get_all_phrases_flat(major, sub), cm.get_all_phrases_flat(major, sub, lang="en")):
+        index.add(
+            cm.FrozenDict({
+                "type": "phrase", "id": phrase["phrase_id"], "level": level, "category_id": phrase["category_id"],
+                "de": phrase["de"], "ru": phrase["ru"], "en": phrase_en["ru"], "example": phrase["example"],
+            }),
+            [
+                (phrase["de"], _HEADWORD), (phrase["ru"], _HEADWORD), (phrase_en["ru"], _HEADWORD),
+                (phrase["context"], _DESCRIPTION), (phrase_en["context"], _DESCRIPTION),
+                (phrase["example"], _TEXT), (phrase["example_ru"], _TEXT), (phrase_en["example_ru"], _TEXT),
+            ],
+        )
+
+
+def _topic_fields(topic: dict, topic_en: dict, data: dict) -> list:
+    return [
+        (data.get("name_de", ""), _HEADWORD), (topic["name"], _HEADWORD), (topic_en["name"], _HEADWORD),
+        (topic["description"], _DESCRIPTION), (topic_en["description"], _DESCRIPTION),
+    ]
+
+
+def _add_dialogues(index: SearchIndex, major: str, sub: str, level: str) -> None:
+    topics = zip(cm.get_dialogue_topics(major, sub), cm.get_dialogue_topics(major, sub, lang="en"))
+    for topic, topic_en in topics:
+        data = cm.get_dialogue(topic["id"], major, sub) or {}
+        fields = _topic_fields(topic, topic_en, data)
+        for line in data.get("dialogue", []):
+            fields.extend((line.get(key, ""), _TEXT) for key in ("text", "text_ru", "text_en"))
+        index.add(
+            cm.FrozenDict({
+                "type": "dialogue", "id": topic["id"], "level": level,
+                "de": data.get("name_de", ""), "ru": topic["name"], "en": topic_en["name"],
+            }),
+            fields,
+        )
+
+
+def _add_culture(index: SearchIndex, major: str, sub: str, level: str) -> None:
+    topics = zip(cm.get_culture_topics(major, sub), cm.get_culture_topics(major, sub, lang="en"))
+    for topic, topic_en in topics:
+        data = cm.get_culture_topic(topic["id"], major, sub) or {}
+        fields = _topic_fields(topic, topic_en, data)
+        content = data.get("content") or {}
+        if isinstance(content, dict):
+            for key in ("title", "text", "facts", "tips"):
+                value = content.get(key) or ""
+                fields.append((" ".join(map(str, value)) if isinstance(value, list) else str(value), _TEXT))
+        index.add(
+            cm.FrozenDict({
+                "type": "culture", "id": topic["id"], "level": level,
+                "de": data.get("name_de", ""), "ru": topic["name"], "en": topic_en["name"],
+            }),
+            fields,
+        )
+
+
+def build_index() -> SearchIndex:
+    """Index every level with content (loads the levels that are not loaded yet)."""
+    started = time.perf_counter()
+    index = SearchIndex()
+    for level in cm.get_levels_with_content():
+        major, sub = level["major"], level["sub"]
+        for add in (_add_words, _add_phrases, _add_dialogues, _add_culture):
+            add(index, major, sub, level["name"])
+    index.finish()
+    logger.info(
+        f"Search index built: {len(index.docs)} entries, {len(index.terms)} terms "
+        f"in {(time.perf_counter() - started) * 1000:.0f} ms"
+    )
+    return index
+
+
+def get_index() -> SearchIndex:
+    """The index for the current content version, built on first use."""
+    global _index
+    version = cm.get_content_version()
+    current = _index
+    if current is not None and current[0] == version:
+        return current[1]
+    with _lock:
+        if _index is None or _index[0] != version:
+            _index = (version, build_index())
+        return _index[1]
+
+
+def search(query: str, levels=None, types=None, limit: int = 20) -> list:
+    """Ranked results for *query*; *levels* ("A1.1", ...) and *types* (DOC_TYPES) filter them."""
+    limit = max(1, min(limit, MAX_LIMIT))
+    return get_index().search(query, set(levels or ()), set(types or ()), limit)
+
+
+def build_in_background() -> threading.Thread:
+    """Build the index in a daemon thread so the first query doesn't pay for it."""
+    thread = threading.Thread(target=get_index, name="search-index", daemon=True)
+    thread.start()
+    return thread
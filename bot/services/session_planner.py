@@ -0,0 +1,89 @@
+"""
+Flashcard session planning shared by the Web App and the bot handlers.
+
+A session of up to SESSION_SIZE words or phrases is filled in order with
+
+1. items due for SRS review (next_review_at <= now), most overdue first,
+2. items with mistakes (most mistakes, then most recent), up to MAX_ERRORS,
+3. items the user has never seen, random,
+4. any other items, random.
+
+The user's progress for the whole scope (category or level) is read with
+one query (get_word_progress_states / get_phrase_progress_states); the
+selection itself runs in memory, so a second session (prefetch) costs no
+extra query.  Users with a review queue in memory (bot.services.review_queue)
+are planned without any query.
+"""
+
+import random
+
+from bot.database import get_phrase_progress_states, get_word_progress_states
+from bot.services import review_queue
+
+SESSION_SIZE = 10
+MAX_ERRORS = 5
+
+_STATE_QUERIES = {
+    "word": get_word_progress_states,
+    "phrase": get_phrase_progress_states,
+}
+
+
+class SessionPlan:
+    """Candidate ids of one scope, by priority; `select` draws sessions from them."""
+
+    def __init__(self, kind: str, items: list, states: list):
+        self.id_key = f"{kind}_id"
+        self.items = {item[self.id_key]: item for item in items}
+        by_id = {state["item_id"]: state for state in states if state["item_id"] in self.items}
+
+        due = [state for state in by_id.values() if state["due"]]
+        due.sort(key=lambda state: state["next_review_at"])
+        self.due = [state["item_id"] for state in due]
+
+        errors = [state for state in by_id.values() if state["wrong_count"]]
+        # most mistakes first, then most recent mistake (unknown time last)
+        errors.sort(key=lambda state: (state["last_wrong_at"] is not None, state["last_wrong_at"] or ""), reverse=True)
+        errors.sort(key=lambda state: state["wrong_count"], reverse=True)
+        self.errors = [state["item_id"] for state in errors]
+
+        self.new = [item_id for item_id in self.items if item_id not in by_id]
+        self.seen = [item_id for item_id in self.items if item_id in by_id]
+
+    def select(self, size: int = SESSION_SIZE, exclude=frozenset()) -> list:
+        """Up to *size* items in random order, skipping *exclude* ids."""
+        chosen = []
+        taken = set(exclude)
+
+        def take(ids, limit):
+            for item_id in ids:
+                if len(chosen) >= limit:
+                    return
+                if item_id not in taken:
+                    taken.add(item_id)
+                    chosen.append(item_id)
+
+        take(self.due, size)
+        take(self.errors, min(size, len(chosen) + MAX_ERRORS))
+        # Enough random candidates even if all of `taken` is among them
+        for ids in (self.new, self.seen):
+            take(random.sample(ids, min(len(ids), size + len(taken))), size)
+
+        session = [self.items[item_id] for item_id in chosen]
+        random.shuffle(session)
+        return session
+
+
+async def load_plan(user_id: int, kind: str, items: list) -> SessionPlan:
+    """Read the user's progress for *items* ("word" or "phrase"): review queue or one query."""
+    states = []
+    if user_id and items:
+        states = await review_queue.get_states(user_id, kind)
+        if states is None:
+            states = await _STATE_QUERIES[kind](user_id, [item[f"{kind}_id"] for item in items])
+    return SessionPlan(kind, items, states)
+
+
+async def plan_session(user_id: int, kind: str, items: list, size: int = SESSION_SIZE) -> list:
+    """One session for *user_id* from *items* (see the module docstring)."""
+    return (await load_plan(user_id, kind, items)).select(size)
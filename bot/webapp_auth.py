@@ -0,0 +1,78 @@
+"""
+Telegram Web App authentication.
+
+The Web App sends Telegram.WebApp.initData in the X-Telegram-Init-Data
+header.  Telegram signs it with the bot token: the `hash` field is
+HMAC-SHA256 of the other fields (sorted "key=value" lines) with the key
+HMAC-SHA256("WebAppData", bot token).  Only a payload with a valid hash,
+signed within WEBAPP_AUTH_MAX_AGE_SEC, identifies the user; the user_id
+a client puts in the query or the body is never trusted by views that
+use @webapp_user_required.
+
+    @app.route('/api/account/reset', methods=['POST'])
+    @webapp_user_required
+    def api_account_reset():
+        user_id = g.webapp_user_id
+"""
+
+import functools
+import hashlib
+import hmac
+import json
+import time
+from urllib.parse import parse_qsl
+
+from bot.config import TELEGRAM_BOT_TOKEN, WEBAPP_AUTH_MAX_AGE_SEC
+
+INIT_DATA_HEADER = "X-Telegram-Init-Data"
+
+
+def verify_init_data(init_data: str, bot_token: str = None, max_age: int = None, now: float = None):
+    """The signed user ({"id", "first_name", ...}) of *init_data*, or None if it is not valid."""
+    bot_token = TELEGRAM_BOT_TOKEN if bot_token is None else bot_token
+    max_age = WEBAPP_AUTH_MAX_AGE_SEC if max_age is None else max_age
+    if not init_data or not bot_token:
+        return None
+    try:
+        fields = dict(parse_qsl(init_data, keep_blank_values=True, strict_parsing=True))
+    except ValueError:
+        return None
+    received = fields.pop("hash", "")
+    data_check = "\n".join(f"{key}={value}" for key, value in sorted(fields.items()))
+    secret = hmac.new(b"WebAppData", bot_token.encode(), hashlib.sha256).digest()
+    expected = hmac.new(secret, data_check.encode(), hashlib.sha256).hexdigest()
+    if not hmac.compare_digest(expected, received):
+        return None
+
+    try:
+        auth_date = int(fields.get("auth_date", 0))
+        user = json.loads(fields.get("user", ""))
+    except ValueError:
+        return None
+    now = time.time() if now is None else now
+    if max_age and now - auth_date > max_age:
+        return None
+    if not isinstance(user, dict) or not isinstance(user.get("id"), int):
+        return None
+    return user
+
+
+def webapp_user_required(view):
+    """Flask view decorator: 401 unless the request carries valid initData; sets g.webapp_user_id."""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        from flask import g, jsonify, request
+
+        user = verify_init_data(request.headers.get(INIT_DATA_HEADER, ""))
+        if user is None:
+            return jsonify({'error': 'Telegram authentication required', 'success': False}), 401
+        g.webapp_user_id = user["id"]
+        return view(*args, **kwargs)
+    return wrapper
+
+
+def webapp_user_key() -> int:
+    """Rate limiter key of a @webapp_user_required view: the verified user id."""
+    from flask import g
+
+    return g.webapp_user_id
@@ -3,10 +3,16 @@ Initial schema — all CREATE TABLE and ALTER TABLE statements
 that were previously inside init_db().
 
 This migration is idempotent (IF NOT EXISTS / IF NOT EXISTS everywhere).
+Backfills and deduplication only apply to PostgreSQL databases created
+before this migration; a SQLite database is always created from scratch.
 """
 
+from bot.backends import POSTGRES, get_dialect
+
 
 async def upgrade(conn) -> None:
+    legacy = get_dialect(conn) == POSTGRES
+
     # ── Core tables ──────────────────────────────────────────────
     await conn.execute("""
         CREATE TABLE IF NOT EXISTS users (
@@ -155,6 +161,26 @@ async def upgrade(conn) -> None:
     await conn.execute("ALTER TABLE users ADD COLUMN IF NOT EXISTS diagnostic_completed INTEGER DEFAULT 0")
 
     # ── One-time data backfills ──────────────────────────────────
+    if legacy:
+        await _backfill(conn)
+
+    # ── Deduplication & unique indexes ───────────────────────────
+    if legacy and not await conn.fetchval(
+        "SELECT 1 FROM pg_indexes WHERE indexname = 'uniq_progress_user_word'"
+    ):
+        await _deduplicate(conn)
+
+    await conn.execute("""
+        CREATE UNIQUE INDEX IF NOT EXISTS uniq_progress_user_word
+            ON progress(user_id, word_id)
+    """)
+    await conn.execute("""
+        CREATE UNIQUE INDEX IF NOT EXISTS uniq_phrases_progress_user_phrase
+            ON phrases_progress(user_id, phrase_id)
+    """)
+
+
+async def _backfill(conn) -> None:
     # SRS backfill for words
     srs_done = await conn.fetchval(
         "SELECT 1 FROM progress WHERE next_review_at IS NOT NULL LIMIT 1"
@@ -200,52 +226,41 @@ async def upgrade(conn) -> None:
            OR (diagnostic_completed = 0 AND last_active_date IS NOT NULL)
     """)
 
-    # ── Deduplication & unique indexes ───────────────────────────
-    idx_exists = await conn.fetchval(
-        "SELECT 1 FROM pg_indexes WHERE indexname = 'uniq_progress_user_word'"
-    )
-    if not idx_exists:
-        await conn.execute("""
-            UPDATE progress p
-            SET correct_count = k.cc, wrong_count = k.wc,
-                last_reviewed = k.lr, last_wrong_at = k.lw
-            FROM (
-                SELECT MAX(id) AS id, user_id, word_id,
-                       SUM(correct_count) AS cc, SUM(wrong_count) AS wc,
-                       MAX(last_reviewed) AS lr, MAX(last_wrong_at) AS lw
-                FROM progress GROUP BY user_id, word_id HAVING COUNT(*) > 1
-            ) k WHERE p.id = k.id
-        """)
-        await conn.execute("""
-            DELETE FROM progress p1
-            WHERE EXISTS (
-                SELECT 1 FROM progress p2
-                WHERE p2.user_id = p1.user_id AND p2.word_id = p1.word_id AND p2.id > p1.id
-            )
-        """)
-        await conn.execute("""
-            UPDATE phrases_progress p
-            SET correct_count = k.cc, wrong_count = k.wc,
-                last_reviewed = k.lr, last_wrong_at = k.lw
-            FROM (
-                SELECT MAX(id) AS id, user_id, phrase_id,
-                       SUM(correct_count) AS cc, SUM(wrong_count) AS wc,
-                       MAX(last_reviewed) AS lr, MAX(last_wrong_at) AS lw
-                FROM phrases_progress GROUP BY user_id, phrase_id HAVING COUNT(*) > 1
-            ) k WHERE p.id = k.id
-        """)
-        await conn.execute("""
-            DELETE FROM phrases_progress p1
-            WHERE EXISTS (
-                SELECT 1 FROM phrases_progress p2
-                WHERE p2.user_id = p1.user_id AND p2.phrase_id = p1.phrase_id AND p2.id > p1.id
-            )
-        """)
-        await conn.execute("""
-            CREATE UNIQUE INDEX IF NOT EXISTS uniq_progress_user_word
-                ON progress(user_id, word_id)
-        """)
-        await conn.execute("""
-            CREATE UNIQUE INDEX IF NOT EXISTS uniq_phrases_progress_user_phrase
-                ON phrases_progress(user_id, phrase_id)
-        """)
+
+async def _deduplicate(conn) -> None:
+    await conn.execute("""
+        UPDATE progress p
+        SET correct_count = k.cc, wrong_count = k.wc,
+            last_reviewed = k.lr, last_wrong_at = k.lw
+        FROM (
+            SELECT MAX(id) AS id, user_id, word_id,
+                   SUM(correct_count) AS cc, SUM(wrong_count) AS wc,
+                   MAX(last_reviewed) AS lr, MAX(last_wrong_at) AS lw
+            FROM progress GROUP BY user_id, word_id HAVING COUNT(*) > 1
+        ) k WHERE p.id = k.id
+    """)
+    await conn.execute("""
+        DELETE FROM progress p1
+        WHERE EXISTS (
+            SELECT 1 FROM progress p2
+            WHERE p2.user_id = p1.user_id AND p2.word_id = p1.word_id AND p2.id > p1.id
+        )
+    """)
+    await conn.execute("""
+        UPDATE phrases_progress p
+        SET correct_count = k.cc, wrong_count = k.wc,
+            last_reviewed = k.lr, last_wrong_at = k.lw
+        FROM (
+            SELECT MAX(id) AS id, user_id, phrase_id,
+                   SUM(correct_count) AS cc, SUM(wrong_count) AS wc,
+                   MAX(last_reviewed) AS lr, MAX(last_wrong_at) AS lw
+            FROM phrases_progress GROUP BY user_id, phrase_id HAVING COUNT(*) > 1
+        ) k WHERE p.id = k.id
+    """)
+    await conn.execute("""
+        DELETE FROM phrases_progress p1
+        WHERE EXISTS (
+            SELECT 1 FROM phrases_progress p2
+            WHERE p2.user_id = p1.user_id AND p2.phrase_id = p1.phrase_id AND p2.id > p1.id
+        )
+    """)
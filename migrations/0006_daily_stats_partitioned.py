@@ -0,0 +1,130 @@
+"""
+Move daily_stats to a DATE column with monthly range partitioning and add
+the daily_stats_rollup table for weekly/monthly aggregates.
+
+The legacy table stored dates as TEXT ('%Y-%m-%d').  Rows are cast to DATE
+while copying; a partition is created for every month present in the data
+plus the current and next month, anything else lands in the DEFAULT
+partition.  Later partitions are created by the maintenance job
+(`bot.database.ensure_monthly_partitions`).
+
+SQLite has no partitioning: the table is rebuilt as a plain table.
+"""
+
+from datetime import date
+
+from bot.backends import SQLITE, get_dialect
+
+_DATE_RE = r"^\d{4}-\d{2}-\d{2}$"
+
+_DAILY_STATS_DDL = """
+    CREATE TABLE daily_stats (
+        user_id BIGINT NOT NULL,
+        date DATE NOT NULL,
+        words_learned INTEGER NOT NULL DEFAULT 0,
+        tests_completed INTEGER NOT NULL DEFAULT 0,
+        correct_answers INTEGER NOT NULL DEFAULT 0,
+        total_answers INTEGER NOT NULL DEFAULT 0,
+        CONSTRAINT daily_stats_user_date_pkey PRIMARY KEY (user_id, date),
+        FOREIGN KEY (user_id) REFERENCES users (user_id)
+    )
+"""
+
+_ROLLUP_DDL = """
+    CREATE TABLE IF NOT EXISTS daily_stats_rollup (
+        user_id BIGINT NOT NULL,
+        period TEXT NOT NULL CHECK (period IN ('week', 'month')),
+        period_start DATE NOT NULL,
+        days_active INTEGER NOT NULL DEFAULT 0,
+        words_learned INTEGER NOT NULL DEFAULT 0,
+        tests_completed INTEGER NOT NULL DEFAULT 0,
+        correct_answers INTEGER NOT NULL DEFAULT 0,
+        total_answers INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (user_id, period, period_start),
+        FOREIGN KEY (user_id) REFERENCES users (user_id)
+    )
+"""
+
+
+def _next_month(d: date) -> date:
+    return date(d.year + d.month // 12, d.month % 12 + 1, 1)
+
+
+async def _upgrade_sqlite(conn) -> None:
+    await conn.execute("ALTER TABLE daily_stats RENAME TO daily_stats_legacy")
+    await conn.execute(_DAILY_STATS_DDL)
+    await conn.execute(
+        """INSERT INTO daily_stats
+               (user_id, date, words_learned, tests_completed, correct_answers, total_answers)
+           SELECT user_id, date,
+                  COALESCE(words_learned, 0), COALESCE(tests_completed, 0),
+                  COALESCE(correct_answers, 0), COALESCE(total_answers, 0)
+           FROM daily_stats_legacy
+           WHERE user_id IS NOT NULL
+             AND date GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]'
+           ON CONFLICT (user_id, date) DO NOTHING"""
+    )
+    await conn.execute("DROP TABLE daily_stats_legacy")
+    await conn.execute(_ROLLUP_DDL)
+
+
+async def upgrade(conn) -> None:
+    if get_dialect(conn) == SQLITE:
+        await _upgrade_sqlite(conn)
+        return
+
+    relkind = await conn.fetchval(
+        "SELECT relkind FROM pg_class WHERE relname = 'daily_stats' AND relnamespace = 'public'::regnamespace"
+    )
+    if relkind == "p":
+        return  # already partitioned
+
+    rls_enabled = False
+    if relkind is not None:
+        rls_enabled = bool(await conn.fetchval(
+            "SELECT relrowsecurity FROM pg_class WHERE oid = 'daily_stats'::regclass"
+        ))
+        await conn.execute("ALTER TABLE daily_stats RENAME TO daily_stats_legacy")
+
+    await conn.execute(_DAILY_STATS_DDL + " PARTITION BY RANGE (date)")
+    await conn.execute("CREATE TABLE daily_stats_default PARTITION OF daily_stats DEFAULT")
+
+    this_month = date.today().replace(day=1)
+    months = {this_month, _next_month(this_month)}
+    if relkind is not None:
+        rows = await conn.fetch(
+            """SELECT DISTINCT date_trunc('month', date::date)::date AS month
+               FROM daily_stats_legacy WHERE date ~ $1""",
+            _DATE_RE,
+        )
+        months.update(row["month"] for row in rows)
+
+    for month in sorted(months):
+        await conn.execute(
+            f"CREATE TABLE daily_stats_y{month.year}m{month.month:02d} PARTITION OF daily_stats "
+            f"FOR VALUES FROM ('{month}') TO ('{_next_month(month)}')"
+        )
+
+    if relkind is not None:
+        await conn.execute(
+            """INSERT INTO daily_stats
+                   (user_id, date, words_learned, tests_completed, correct_answers, total_answers)
+               SELECT user_id, date::date,
+                      COALESCE(words_learned, 0), COALESCE(tests_completed, 0),
+                      COALESCE(correct_answers, 0), COALESCE(total_answers, 0)
+               FROM daily_stats_legacy
+               WHERE user_id IS NOT NULL AND date ~ $1
+               ON CONFLICT (user_id, date) DO NOTHING""",
+            _DATE_RE,
+        )
+        await conn.execute("DROP TABLE daily_stats_legacy")
+
+    await conn.execute(_ROLLUP_DDL)
+
+    # Recreating the table drops RLS set up by scripts/enable_rls_policies.sql
+    if rls_enabled:
+        for table in ("daily_stats", "daily_stats_rollup"):
+            await conn.execute(f"ALTER TABLE {table} ENABLE ROW LEVEL SECURITY")
+            await conn.execute(
+                f'CREATE POLICY "Deny all direct access to users" ON {table} FOR ALL USING (false)'
+            )
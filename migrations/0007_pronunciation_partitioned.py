@@ -0,0 +1,129 @@
+"""
+Partition pronunciation_progress by month (created_at) and add
+pronunciation_summary for compacted per-user, per-item aggregates.
+
+Existing attempts keep their ids; the id sequence is advanced past them.
+The maintenance job (`bot.database.compact_pronunciation_progress`) folds
+old months into pronunciation_summary and drops their partitions.
+
+SQLite has no partitioning: the table from 0002 is kept as is.
+"""
+
+from datetime import date
+
+from bot.backends import SQLITE, get_dialect
+
+_SUMMARY_DDL = """
+    CREATE TABLE IF NOT EXISTS pronunciation_summary (
+        user_id BIGINT NOT NULL,
+        item_type TEXT NOT NULL,
+        item_key TEXT NOT NULL DEFAULT '',
+        attempts INTEGER NOT NULL DEFAULT 0,
+        score_sum BIGINT NOT NULL DEFAULT 0,
+        best_score INTEGER NOT NULL DEFAULT 0,
+        last_score INTEGER NOT NULL DEFAULT 0,
+        last_verdict TEXT,
+        last_attempt_at TIMESTAMP,
+        excellent INTEGER NOT NULL DEFAULT 0,
+        good INTEGER NOT NULL DEFAULT 0,
+        retry INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (user_id, item_type, item_key),
+        FOREIGN KEY (user_id) REFERENCES users (user_id)
+    )
+"""
+
+
+def _next_month(d: date) -> date:
+    return date(d.year + d.month // 12, d.month % 12 + 1, 1)
+
+
+async def upgrade(conn) -> None:
+    if get_dialect(conn) == SQLITE:
+        await conn.execute(_SUMMARY_DDL)
+        return
+
+    relkind = await conn.fetchval(
+        "SELECT relkind FROM pg_class WHERE relname = 'pronunciation_progress' AND relnamespace = 'public'::regnamespace"
+    )
+    if relkind == "p":
+        return  # already partitioned
+
+    rls_enabled = False
+    if relkind is not None:
+        rls_enabled = bool(await conn.fetchval(
+            "SELECT relrowsecurity FROM pg_class WHERE oid = 'pronunciation_progress'::regclass"
+        ))
+        await conn.execute("ALTER TABLE pronunciation_progress RENAME TO pronunciation_progress_legacy")
+        await conn.execute("ALTER SEQUENCE IF EXISTS pronunciation_progress_id_seq RENAME TO pronunciation_progress_legacy_id_seq")
+
+    await conn.execute("""
+        CREATE TABLE pronunciation_progress (
+            id SERIAL,
+            user_id BIGINT NOT NULL,
+            item_type TEXT NOT NULL,
+            item_id TEXT,
+            target_text TEXT NOT NULL,
+            recognized_text TEXT NOT NULL,
+            score INTEGER NOT NULL,
+            verdict TEXT NOT NULL,
+            engine TEXT NOT NULL,
+            confidence REAL DEFAULT 0,
+            created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            CONSTRAINT pronunciation_progress_part_pkey PRIMARY KEY (id, created_at),
+            FOREIGN KEY (user_id) REFERENCES users (user_id)
+        ) PARTITION BY RANGE (created_at)
+    """)
+    await conn.execute(
+        "CREATE TABLE pronunciation_progress_default PARTITION OF pronunciation_progress DEFAULT"
+    )
+
+    this_month = date.today().replace(day=1)
+    months = {this_month, _next_month(this_month)}
+    if relkind is not None:
+        rows = await conn.fetch(
+            """SELECT DISTINCT date_trunc('month', created_at)::date AS month
+               FROM pronunciation_progress_legacy WHERE created_at IS NOT NULL"""
+        )
+        months.update(row["month"] for row in rows)
+
+    for month in sorted(months):
+        await conn.execute(
+            f"CREATE TABLE pronunciation_progress_y{month.year}m{month.month:02d} "
+            f"PARTITION OF pronunciation_progress "
+            f"FOR VALUES FROM ('{month}') TO ('{_next_month(month)}')"
+        )
+
+    if relkind is not None:
+        await conn.execute("""
+            INSERT INTO pronunciation_progress
+                (id, user_id, item_type, item_id, target_text, recognized_text,
+                 score, verdict, engine, confidence, created_at)
+            SELECT id, user_id, item_type, item_id, target_text, recognized_text,
+                   score, verdict, engine, confidence, COALESCE(created_at, CURRENT_TIMESTAMP)
+            FROM pronunciation_progress_legacy
+        """)
+        await conn.execute("""
+            SELECT setval(
+                pg_get_serial_sequence('pronunciation_progress', 'id'),
+                GREATEST((SELECT COALESCE(MAX(id), 0) FROM pronunciation_progress), 1)
+            )
+        """)
+        await conn.execute("DROP TABLE pronunciation_progress_legacy")
+
+    await conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_pronunciation_user_created
+            ON pronunciation_progress(user_id, created_at DESC)
+    """)
+    await conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_pronunciation_user_item
+            ON pronunciation_progress(user_id, item_type, item_id)
+    """)
+
+    await conn.execute(_SUMMARY_DDL)
+
+    if rls_enabled:
+        for table in ("pronunciation_progress", "pronunciation_summary"):
+            await conn.execute(f"ALTER TABLE {table} ENABLE ROW LEVEL SECURITY")
+            await conn.execute(
+                f'CREATE POLICY "Deny all direct access to users" ON {table} FOR ALL USING (false)'
+            )
@@ -0,0 +1,29 @@
+"""
+Log the answers of the adaptive placement test.
+
+Every finished test in the bot is one attempt, logged once; scripts/calibrate_placement.py fits
+the question parameters (bot.services.placement) from these rows.
+"""
+
+
+async def upgrade(conn) -> None:
+    await conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS placement_responses (
+            id SERIAL PRIMARY KEY,
+            user_id BIGINT NOT NULL,
+            attempt TEXT NOT NULL,
+            item_id TEXT NOT NULL,
+            correct INTEGER NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users (user_id)
+        )
+        """
+    )
+
+    await conn.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_placement_responses_user
+            ON placement_responses(user_id)
+        """
+    )
@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+"""Микробенчмарк геттеров bot.content_manager: время одного вызова.
+
+Контент всех уровней загружается заранее (init_all_levels), поэтому
+замер показывает только стоимость самого вызова:
+  python scripts/bench_content.py --level A1.1 --lang en --calls 2000
+
+Память, которую занимает загруженный контент (tracemalloc), по уровням,
+в байтах на уровень и на элемент (слово или фразу):
+  python scripts/bench_content.py --memory
+
+Холодный старт (новый процесс: импорт + init_content / init_all_levels)
+из JSON и из бандла (python -m bot.content_bundle build), а также ленивый
+старт (init_content(lazy=True)) и первый get_all_words после него, медиана запусков:
+  python scripts/bench_content.py --startup --runs 5
+"""
+
+import argparse
+import logging
+import os
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+BASE = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE))
+
+
+def _per_call(func, calls: int) -> float:
+    started = time.perf_counter()
+    for _ in range(calls):
+        func()
+    return (time.perf_counter() - started) / calls
+
+
+def _memory(cm) -> None:
+    tracemalloc.start()
+    total_bytes = total_items = 0
+    print(f"{'level':<8} {'items':>6} {'KiB':>9} {'bytes/item':>11}")
+    for level in cm.get_levels_with_content():
+        major, sub = level["major"], level["sub"]
+        before = tracemalloc.get_traced_memory()[0]
+        cm.init_content(major, sub)
+        size = tracemalloc.get_traced_memory()[0] - before
+        items = cm.get_vocabulary_stats(major, sub)["total_words"] + sum(
+            len(category.get("phrases", [])) for category in cm._load_all_phrases(major, sub).values()
+        )
+        total_bytes += size
+        total_items += items
+        print(f"{major}.{sub:<6} {items:>6} {size / 1024:>9.0f} {size / max(items, 1):>11.0f}")
+    print(f"{'total':<8} {total_items:>6} {total_bytes / 1024:>9.0f} {total_bytes / max(total_items, 1):>11.0f}")
+
+
+_STARTUP_SNIPPET = """
+import logging, time
+logging.disable(logging.INFO)
+started = time.perf_counter()
+from bot import content_manager as cm
+cm.{init}
+print(time.perf_counter() - started)
+"""
+
+
+def _startup(runs: int) -> None:
+    from bot.content_bundle import bundle_path
+
+    if not bundle_path().exists():
+        print(f"{bundle_path()} not found: run python -m bot.content_bundle build")
+        return
+    inits = {
+        "init_content": "init_content()",
+        "init_all_levels": "init_all_levels()",
+        "lazy": "init_content(lazy=True)",
+        "lazy+words": "init_content(lazy=True); cm.get_all_words()",
+    }
+    for init, call in inits.items():
+        for source, enabled in (("json", "0"), ("bundle", "1")):
+            env = {**os.environ, "CONTENT_BUNDLE_ENABLED": enabled}
+            times = [
+                float(subprocess.run(
+                    [sys.executable, "-c", _STARTUP_SNIPPET.format(init=call)],
+                    cwd=BASE, env=env, capture_output=True, text=True, check=True,
+                ).stdout)
+                for _ in range(runs)
+            ]
+            print(f"{init:<16} {source:<7} {statistics.median(times) * 1000:8.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark content getters")
+    parser.add_argument("--level", default="A1.1")
+    parser.add_argument("--lang", default="ru")
+    parser.add_argument("--calls", type=int, default=2000)
+    parser.add_argument("--memory", action="store_true", help="report memory per level instead")
+    parser.add_argument("--startup", action="store_true", help="time cold start from JSON and from the bundle")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    if args.startup:
+        _startup(args.runs)
+        return
+
+    logging.disable(logging.INFO)
+    from bot import content_manager as cm
+
+    if args.memory:
+        _memory(cm)
+        return
+
+    cm.init_all_levels()
+    major, sub = args.level.split(".")
+    lang = args.lang
+    category = next(iter(cm._load_all_vocabulary(major, sub)), "")
+    phrase_category = next(iter(cm._load_all_phrases(major, sub)), "")
+
+    getters = {
+        "get_all_words": lambda: cm.get_all_words(major, sub, lang=lang),
+        "get_words_by_category": lambda: cm.get_words_by_category(category, major, sub, lang=lang),
+        "get_categories": lambda: cm.get_categories(major, sub, lang=lang),
+        "get_all_phrases_flat": lambda: cm.get_all_phrases_flat(major, sub, lang=lang),
+        "get_phrases_by_category": lambda: cm.get_phrases_by_category(phrase_category, major, sub, lang=lang),
+        "get_all_tests": lambda: cm.get_all_tests(major, sub, lang=lang),
+        "get_dialogue_topics": lambda: cm.get_dialogue_topics(major, sub, lang=lang),
+        "get_culture_topics": lambda: cm.get_culture_topics(major, sub, lang=lang),
+        "get_exercise_sets": lambda: cm.get_exercise_sets(major, sub, lang=lang),
+    }
+
+    print(f"{args.level} lang={lang}, {args.calls} calls each")
+    for name, func in getters.items():
+        size = len(func())
+        print(f"{name:<26} items={size:<5} {_per_call(func, args.calls) * 1e6:10.2f} us/call")
+
+
+if __name__ == "__main__":
+    main()
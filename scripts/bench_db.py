@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""Нагрузочный тест bot.database: параллельные ответы и чтение статистики.
+
+По умолчанию работает на временной SQLite-базе, без сети:
+  python scripts/bench_db.py --users 50 --answers 40
+
+Против PostgreSQL (таблицы будут изменены!):
+  DATABASE_URL=postgresql://... python scripts/bench_db.py
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BASE = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE))
+
+
+def _report(name: str, samples: list, wall: float) -> None:
+    samples = sorted(samples)
+    p95 = samples[int(len(samples) * 0.95) - 1] if samples else 0
+    print(f"{name:<22} n={len(samples):<6} {len(samples) / wall:8.0f} op/s  "
+          f"median={statistics.median(samples) * 1000:6.2f} ms  p95={p95 * 1000:6.2f} ms")
+
+
+async def _timed(samples: list, coro) -> None:
+    started = time.perf_counter()
+    await coro
+    samples.append(time.perf_counter() - started)
+
+
+async def run(users: int, answers: int) -> None:
+    from bot import database as db
+    from bot.account import delete_account
+
+    await db.init_db()
+    base_id = 9_000_000_000
+
+    samples = []
+    started = time.perf_counter()
+    await asyncio.gather(*[
+        _timed(samples, db.update_word_progress(base_id + u, f"bench_{a}", a % 3 != 0))
+        for u in range(users) for a in range(answers)
+    ])
+    _report("update_word_progress", samples, time.perf_counter() - started)
+
+    samples = []
+    started = time.perf_counter()
+    await asyncio.gather(*[
+        _timed(samples, db.update_daily_stats(base_id + u, words=1, correct=1, total=1))
+        for u in range(users) for _ in range(answers // 4 or 1)
+    ])
+    _report("update_daily_stats", samples, time.perf_counter() - started)
+
+    samples = []
+    started = time.perf_counter()
+    await asyncio.gather(*[
+        _timed(samples, db.get_user_stats(base_id + u))
+        for u in range(users) for _ in range(5)
+    ])
+    _report("get_user_stats", samples, time.perf_counter() - started)
+
+    for u in range(users):
+        await delete_account(base_id + u)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark bot.database")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--answers", type=int, default=40)
+    args = parser.parse_args()
+
+    if not os.getenv("DATABASE_URL"):
+        tmp = tempfile.mkdtemp(prefix="bench_db_")
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+    print(f"DATABASE_URL={os.environ['DATABASE_URL'][:40]}")
+    asyncio.run(run(args.users, args.answers))
+
+
+if __name__ == "__main__":
+    main()
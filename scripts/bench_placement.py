@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+"""Сравнение старого поэтапного теста уровня с адаптивным (симуляция).
+
+Для N смоделированных учеников с известным уровнем (A1.1 ... C2.2,
+поровну) отвечает по модели 3PL с параметрами вопросов из
+bot.services.placement и сравнивает:
+  staged — этапы A1-A2 / B1-B2 / C1-C2 и recommend_diagnostic_level
+           (следующий этап проходится, если он был бы предложен);
+  adaptive — bot.services.placement.next_step, как его обходит Web App.
+
+Печатает среднее число вопросов, долю точного попадания в уровень и
+попадания с ошибкой не больше одного подуровня, число запросов к API
+(staged: загрузка вопросов + рекомендация).
+
+  python scripts/bench_placement.py --students 1200
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+BASE = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE))
+
+
+def _answer(bank, rng, row: int, theta: float) -> bool:
+    p = bank.c[row] + (1 - bank.c[row]) / (1 + np.exp(-bank.a[row] * (theta - bank.b[row])))
+    return bool(rng.random() < p)
+
+
+def _staged(cm, bank, rng, theta: float) -> tuple:
+    results, asked = {}, 0
+    for stage in cm.get_diagnostic_stages():
+        questions = cm.get_diagnostic_questions(stage["id"], stage.get("questions_count"), shuffle=True)
+        correct = sum(_answer(bank, rng, bank.rows[q["id"]], theta) for q in questions)
+        asked += len(questions)
+        results[stage["id"]] = {"correct": correct, "total": len(questions)}
+        if correct / len(questions) < float(stage.get("offer_next_if_score_at_least", 1.1)):
+            break
+    level = cm.recommend_diagnostic_level(results)
+    return f"{level['major']}.{level['sub']}", asked, 2
+
+
+def _adaptive(placement, bank, rng, theta: float) -> tuple:
+    responses, calls = [], 0
+    while True:
+        step = placement.next_step(responses)
+        calls += 1
+        if step["done"]:
+            result = step["result"]
+            return f"{result['major']}.{result['sub']}", len(responses), calls
+        node = step["next"]
+        while node and not node.get("done"):
+            question = node["question"]
+            correct = _answer(bank, rng, bank.rows[question["id"]], theta)
+            responses.append({"id": question["id"], "correct": correct})
+            node = node["if_correct" if correct else "if_wrong"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate staged vs adaptive placement tests")
+    parser.add_argument("--students", type=int, default=1200)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    from bot import content_manager as cm
+    from bot.services import placement
+
+    random.seed(args.seed)
+    rng = np.random.default_rng(args.seed)
+    bank = placement.get_bank()
+    levels = placement.LEVELS
+    print(f"{bank.size} вопросов, {args.students} учеников")
+    print(f"{'':>9} {'вопросов':>9} {'точно':>7} {'±1':>7} {'запросов':>9} {'мс/тест':>8}")
+    for name, run in (("staged", lambda t: _staged(cm, bank, rng, t)),
+                      ("adaptive", lambda t: _adaptive(placement, bank, rng, t))):
+        asked = exact = near = calls = 0
+        started = time.perf_counter()
+        for i in range(args.students):
+            true_level = levels[i % len(levels)]
+            theta = placement.level_theta(true_level) + rng.uniform(-0.25, 0.25)
+            level, count, requests = run(theta)
+            distance = abs(levels.index(level) - levels.index(true_level))
+            asked += count
+            exact += distance == 0
+            near += distance <= 1
+            calls += requests
+        elapsed = (time.perf_counter() - started) / args.students * 1000
+        n = args.students
+        print(f"{name:>9} {asked / n:9.1f} {exact / n:7.1%} {near / n:7.1%} {calls / n:9.1f} {elapsed:8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+"""Бенчмарк планирования сессии карточек на больших каталогах.
+
+Для синтетического каталога из N слов (по умолчанию 1000, 10000 и 50000)
+и пользователя, который уже видел часть слов (--reviewed, доля), сравнивает:
+  old — прежняя схема: get_due_word_ids + get_reviewed_word_ids +
+        get_priority_word_ids (три запроса) и отбор в Python;
+  plan — bot.services.session_planner: один запрос состояния
+        (get_word_progress_states) и отбор в памяти;
+  prefetch — plan + вторая сессия (select(exclude=...)) без запроса;
+  queue — активный пользователь: очередь повторений уже в памяти
+        (bot.services.review_queue), без запросов.
+
+По умолчанию работает на временной SQLite-базе, без сети:
+  python scripts/bench_session.py --sizes 1000 10000 50000 --runs 20
+
+Против PostgreSQL (таблица progress будет изменена!):
+  DATABASE_URL=postgresql://... python scripts/bench_session.py
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+BASE = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE))
+
+SESSION_SIZE = 10
+MAX_ERRORS = 5
+
+
+async def _seed(db, user_id: int, word_ids: list, reviewed: float) -> None:
+    """Progress rows for a share of word_ids: some due, some with mistakes."""
+    await db.ensure_user(user_id)
+    now = datetime.now()
+    rows = []
+    for word_id in random.sample(word_ids, int(len(word_ids) * reviewed)):
+        wrong = random.choice((0, 0, 0, 1, 2))
+        review = now + timedelta(days=random.uniform(-10, 20))
+        rows.append((user_id, word_id, random.randint(1, 5), wrong, now, now if wrong else None, 1, review))
+    pool = await db.get_pool()
+    async with pool.acquire() as conn:
+        await conn.execute("DELETE FROM progress WHERE user_id = $1", user_id)
+        await conn.executemany(
+            """INSERT INTO progress
+                   (user_id, word_id, correct_count, wrong_count, last_reviewed, last_wrong_at, srs_streak, next_review_at)
+               VALUES ($1, $2, $3, $4, $5, $6, $7, $8)""",
+            rows
+        )
+
+
+async def _old_session(db, user_id: int, words: list) -> list:
+    """The pre-planner selection: three queries, then due / errors / new / random."""
+    word_ids = [w["word_id"] for w in words]
+    word_map = {w["word_id"]: w for w in words}
+    session_ids = list(await db.get_due_word_ids(user_id, word_ids, limit=SESSION_SIZE))
+    for word_id in (await db.get_priority_word_ids(user_id, word_ids))[:MAX_ERRORS]:
+        if len(session_ids) < SESSION_SIZE and word_id not in session_ids:
+            session_ids.append(word_id)
+    if len(session_ids) < SESSION_SIZE:
+        reviewed = await db.get_reviewed_word_ids(user_id, word_ids)
+        new_ids = [wid for wid in word_ids if wid not in reviewed]
+        random.shuffle(new_ids)
+        taken = set(session_ids)
+        session_ids.extend(wid for wid in new_ids[:SESSION_SIZE] if wid not in taken)
+        session_ids = session_ids[:SESSION_SIZE]
+    session = [word_map[wid] for wid in session_ids]
+    random.shuffle(session)
+    return session
+
+
+async def _prefetch(planner, user_id: int, words: list) -> list:
+    plan = await planner.load_plan(user_id, "word", words)
+    cards = plan.select()
+    return cards + plan.select(exclude={card["word_id"] for card in cards})
+
+
+async def _time(func, runs: int, before=None) -> float:
+    samples = []
+    for _ in range(runs):
+        if before:
+            before()
+        started = time.perf_counter()
+        await func()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples)
+
+
+async def run(sizes: list, reviewed: float, runs: int) -> None:
+    from bot import database as db
+    from bot.services import review_queue, session_planner as planner
+
+    await db.init_db()
+    user_id = 9_100_000_000
+
+    cold = (lambda: review_queue.forget_user_queues(user_id)) if review_queue.enabled() else None
+    print(f"{'words':>7} {'reviewed':>9} {'old':>10} {'plan':>10} {'prefetch':>10} {'queue':>10}")
+    for size in sizes:
+        words = [{"word_id": f"bench_{i}", "de": f"Wort {i}", "ru": f"слово {i}"} for i in range(size)]
+        await _seed(db, user_id, [w["word_id"] for w in words], reviewed)
+        old = await _time(lambda: _old_session(db, user_id, words), runs)
+        new = await _time(lambda: planner.plan_session(user_id, "word", words), runs, cold)
+        both = await _time(lambda: _prefetch(planner, user_id, words), runs, cold)
+        warm = await _time(lambda: planner.plan_session(user_id, "word", words), runs)
+        print(f"{size:>7} {int(size * reviewed):>9} {old * 1000:8.2f}ms {new * 1000:8.2f}ms "
+              f"{both * 1000:8.2f}ms {warm * 1000:8.2f}ms")
+
+    from bot.account import delete_account
+    await delete_account(user_id)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark flashcard session planning")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--reviewed", type=float, default=0.3, help="share of words with progress")
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    if not os.getenv("DATABASE_URL"):
+        tmp = tempfile.mkdtemp(prefix="bench_session_")
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+    print(f"DATABASE_URL={os.environ['DATABASE_URL'][:40]}")
+    asyncio.run(run(args.sizes, args.reviewed, args.runs))
+
+
+if __name__ == "__main__":
+    main()
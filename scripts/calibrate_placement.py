@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+"""Калибровка вопросов адаптивного теста уровня по ответам пользователей.
+
+Читает все ответы из placement_responses (каждый пройденный в боте тест —
+отдельная попытка), оценивает параметры вопросов a (различающая сила)
+и b (сложность) моделью 3PL (bot.services.placement.calibrate) и
+записывает data/diagnostic/placement_irt.json.  Вопрос использует свои
+параметры вместо значений по уровню, когда на него набралось не меньше
+MIN_CALIBRATION_ANSWERS ответов.  Работающий сервер подхватит файл сам
+(content_watcher) или после перезапуска.
+
+  python scripts/calibrate_placement.py
+  python scripts/calibrate_placement.py --since 2026-01-01 --dry-run
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+from datetime import datetime
+from pathlib import Path
+
+BASE = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE))
+
+
+async def run(since, dry_run: bool) -> None:
+    from bot import content_manager as cm
+    from bot import database as db
+    from bot.services import placement
+
+    await db.init_db()
+    answers = await db.get_placement_answers(since)
+    attempts = len({attempt for attempt, _, _ in answers})
+    print(f"Ответов: {len(answers)}, тестов: {attempts}")
+    items = placement.calibrate(answers)
+    if not items:
+        print("Нет ответов для калибровки")
+        return
+
+    bank = placement.get_bank()
+    print(f"{'вопрос':<14} {'уровень':<8} {'n':>5} {'a':>6} {'b':>6} {'b по уровню':>12}")
+    for item_id, params in sorted(items.items(), key=lambda item: item[1]["b"]):
+        row = bank.rows[item_id]
+        level = bank.questions[row].get("level", "")
+        mark = "" if params["n"] >= placement.MIN_CALIBRATION_ANSWERS else "  (мало ответов)"
+        print(f"{item_id:<14} {level:<8} {params['n']:>5} {params['a']:>6.2f} {params['b']:>6.2f} "
+              f"{bank.b_prior[row]:>12.2f}{mark}")
+
+    if dry_run:
+        return
+    payload = {
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "answers": len(answers),
+        "tests": attempts,
+        "items": items,
+    }
+    path = cm.DIAGNOSTIC_CALIBRATION_PATH
+    tmp = path.with_suffix(".json.tmp")
+    tmp.write_text(json.dumps(payload, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+    os.replace(tmp, path)
+    print(f"Записано: {path.relative_to(BASE)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Calibrate placement test questions from logged answers")
+    parser.add_argument("--since", type=datetime.fromisoformat, default=None, help="only answers since (ISO date)")
+    parser.add_argument("--dry-run", action="store_true", help="print the parameters, do not write the file")
+    args = parser.parse_args()
+    asyncio.run(run(args.since, args.dry_run))
+
+
+if __name__ == "__main__":
+    main()
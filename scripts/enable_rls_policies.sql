@@ -1,9 +1,12 @@
 -- Включаем RLS на всех таблицах (идемпотентно: повторный вызов не ломает)
 ALTER TABLE daily_stats ENABLE ROW LEVEL SECURITY;
+ALTER TABLE daily_stats_rollup ENABLE ROW LEVEL SECURITY;
 ALTER TABLE dialogues_progress ENABLE ROW LEVEL SECURITY;
 ALTER TABLE feedback ENABLE ROW LEVEL SECURITY;
 ALTER TABLE grammar_results ENABLE ROW LEVEL SECURITY;
 ALTER TABLE phrases_progress ENABLE ROW LEVEL SECURITY;
+ALTER TABLE pronunciation_progress ENABLE ROW LEVEL SECURITY;
+ALTER TABLE pronunciation_summary ENABLE ROW LEVEL SECURITY;
 ALTER TABLE progress ENABLE ROW LEVEL SECURITY;
 ALTER TABLE users ENABLE ROW LEVEL SECURITY;
 
@@ -11,6 +14,9 @@ ALTER TABLE users ENABLE ROW LEVEL SECURITY;
 DROP POLICY IF EXISTS "Deny all direct access to users" ON daily_stats;
 CREATE POLICY "Deny all direct access to users" ON daily_stats FOR ALL USING (false);
 
+DROP POLICY IF EXISTS "Deny all direct access to users" ON daily_stats_rollup;
+CREATE POLICY "Deny all direct access to users" ON daily_stats_rollup FOR ALL USING (false);
+
 DROP POLICY IF EXISTS "Deny all direct access to users" ON dialogues_progress;
 CREATE POLICY "Deny all direct access to users" ON dialogues_progress FOR ALL USING (false);
 
@@ -23,6 +29,12 @@ CREATE POLICY "Deny all direct access to users" ON grammar_results FOR ALL USING
 DROP POLICY IF EXISTS "Deny all direct access to users" ON phrases_progress;
 CREATE POLICY "Deny all direct access to users" ON phrases_progress FOR ALL USING (false);
 
+DROP POLICY IF EXISTS "Deny all direct access to users" ON pronunciation_progress;
+CREATE POLICY "Deny all direct access to users" ON pronunciation_progress FOR ALL USING (false);
+
+DROP POLICY IF EXISTS "Deny all direct access to users" ON pronunciation_summary;
+CREATE POLICY "Deny all direct access to users" ON pronunciation_summary FOR ALL USING (false);
+
 DROP POLICY IF EXISTS "Deny all direct access to users" ON progress;
 CREATE POLICY "Deny all direct access to users" ON progress FOR ALL USING (false);
 
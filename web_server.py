@@ -2,7 +2,8 @@
 Web server for Telegram Web App + Bot Webhook
 Combined server for Render free tier (single web service)
 """
-from flask import Flask, render_template_string, jsonify, request
+from flask import Flask, render_template_string, jsonify, request, Response, g
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
 import os
 import asyncio
@@ -12,32 +13,46 @@ import random
 
 from bot.content_manager import (
     get_all_words, get_categories, get_words_by_category,
-    get_all_tests, get_test_questions, init_content, format_grammar_theory_text,
+    get_all_tests, get_test_questions, init_content, warm_up_content, format_grammar_theory_text,
     get_phrases_categories, get_phrases_by_category, get_all_phrases_flat,
     get_dialogue_topics, get_dialogue, get_dialogue_exercises,
     get_category_distractors,
     get_available_levels, get_levels_with_content, set_level,
-    get_current_level_str, get_current_level,
+    get_current_level_str, get_current_level, use_level, reset_level,
     get_culture_topics, get_culture_topic,
     get_exercise_sets, get_exercise_set, get_exercise_tasks,
-    get_diagnostic_stages, get_diagnostic_questions, recommend_diagnostic_level
+    get_diagnostic_stages, get_diagnostic_questions, recommend_diagnostic_level,
+    get_content_version, ContentRecord, AVAILABLE_LEVELS, VIEW_LANGS
 )
 from bot.database import (
-    get_user_stats, update_word_progress, save_grammar_result,
-    update_daily_stats, init_db, save_phrase_progress, save_dialogue_progress,
+    get_user_stats, save_grammar_result,
+    update_daily_stats, init_db, save_dialogue_progress,
     save_culture_progress, save_exercise_set_progress,
-    get_or_create_user, save_feedback, get_user_feedback, get_feedback_count,
-    get_priority_word_ids, get_priority_phrase_ids,
-    get_detailed_user_progress, get_user_settings, set_user_level, set_diagnostic_completed,
-    save_pronunciation_progress, get_pronunciation_stats, consume_rate_limit,
-    get_user_premium, get_user_language, set_user_language,
+    ensure_user, is_known_user, read_only, save_feedback, get_user_feedback, get_feedback_count,
+    get_detailed_user_progress, set_user_level, set_diagnostic_completed,
+    save_pronunciation_progress, get_pronunciation_stats,
+    get_user_profile, peek_user_profile, set_user_language,
     FEEDBACK_STATUS_LABELS, MAX_FEEDBACK_LENGTH
 )
 from bot.config import (
-    TELEGRAM_BOT_TOKEN, DATABASE_URL, PRONUN_TIMEOUT_SEC, PRONUN_RATE_LIMIT_PER_HOUR
+    TELEGRAM_BOT_TOKEN, DATABASE_URL, PRONUN_TIMEOUT_SEC, PRONUN_RATE_LIMIT_PER_HOUR,
+    AUDIO_RATE_LIMIT_PER_MINUTE, FEEDBACK_RATE_LIMIT_PER_HOUR, EXPORT_RATE_LIMIT_PER_HOUR, ACCOUNT_RATE_LIMIT_PER_HOUR,
+    CONTENT_LAZY_LOAD, CONTENT_WARMUP, CONTENT_RESPONSE_CACHE_SIZE
 )
+from bot.account import reset_account, delete_account, export_account, EXPORT_FORMATS
+from bot import metrics
+from bot.cache import LRUCache
 from bot.monitoring import init_sentry
+from bot.maintenance import start_maintenance
+from bot.content_watcher import start_content_watcher
+from bot.ratelimit import check_rate_limit, rate_limited
+from bot.webapp_auth import webapp_user_required, webapp_user_key
 from bot.services.pronunciation import evaluate_pronunciation
+from bot.services.distractors import pick_distractors, build_in_background as build_distractor_index
+from bot.services import placement
+from bot.services.review_queue import record_answer
+from bot.services.session_planner import SessionPlan, load_plan
+from bot.services.search import search as search_content, build_in_background as build_search_index, DOC_TYPES
 
 # Telegram bot imports
 from telegram import Update
@@ -55,9 +70,91 @@ logger = logging.getLogger(__name__)
 
 init_sentry()
 
+
+class ContentJSONProvider(DefaultJSONProvider):
+    """JSON provider that serializes slotted content records as objects."""
+
+    @staticmethod
+    def default(o):
+        if isinstance(o, ContentRecord):
+            return o.to_dict()
+        return DefaultJSONProvider.default(o)
+
+
 app = Flask(__name__)
+app.json = ContentJSONProvider(app)
 CORS(app)
 
+# Content-only endpoints: serialized JSON by (content version, endpoint, path
+# args, level, lang).  Entries of an old version are never hit again and age
+# out of the LRU.  Only known levels and languages and non-empty payloads are
+# cached, so made-up parameters cannot fill it.
+_content_responses = LRUCache(CONTENT_RESPONSE_CACHE_SIZE)
+
+
+def _content_cache_key(args: tuple):
+    """Cache key of the request, or None if its ?major=&sub=/?lang= are not known ones."""
+    major, sub = request.args.get('major'), request.args.get('sub')
+    lang = request.args.get('lang', 'ru')
+    if lang not in VIEW_LANGS:
+        return None
+    if major and sub and (major, sub) not in AVAILABLE_LEVELS:
+        return None
+    # A known ?major=&sub= is the request's level (_bind_content_level)
+    return (get_content_version(), request.endpoint, args, get_current_level(), lang)
+
+
+def _is_empty(payload) -> bool:
+    """No content: an empty list, or a dict without any non-empty value (unknown id)."""
+    if isinstance(payload, dict):
+        return not any(payload.values())
+    return not payload
+
+
+def content_response(build, *args):
+    """JSON of build() for a content-only endpoint, serialized once per content version.
+
+    *args* are the endpoint's path arguments; the level (?major=&sub= or the
+    request's default) and ?lang= are part of the key.  Requests with an
+    unknown level or language and empty payloads are served uncached.
+    """
+    key = _content_cache_key(args)
+    body = _content_responses.get(key) if key is not None else None
+    if body is None:
+        payload = build()
+        body = app.json.response(payload).get_data()
+        if key is not None and not _is_empty(payload):
+            _content_responses.set(key, body)
+    return app.response_class(body, mimetype=app.json.mimetype)
+
+
+def _content_response_gauges() -> list:
+    stats = _content_responses.stats()
+    return [
+        (f"cache_{key}", f"In-process cache {key}", {"cache": "content_responses"}, stats[key])
+        for key in ("size", "hits", "misses")
+    ]
+
+
+metrics.register_gauges(_content_response_gauges)
+
+
+@app.before_request
+def _bind_content_level():
+    """Content level for this request: ?major=&sub=, else the default level.
+
+    Request-scoped (contextvars), so concurrent requests of different users
+    never see each other's level.
+    """
+    g.content_level_token = use_level(request.args.get('major'), request.args.get('sub'))
+
+
+@app.teardown_request
+def _unbind_content_level(exc=None):
+    token = g.pop('content_level_token', None)
+    if token is not None:
+        reset_level(token)
+
 # Global bot application instance
 bot_application = None
 
@@ -98,6 +195,51 @@ def run_bot_async(coro, timeout: int = 30):
     return future.result(timeout=timeout)
 
 
+_STREAM_END = object()
+
+
+def stream_bot_async(agen, timeout: int = 30):
+    """Iterate async generator *agen* on the bot loop, chunk by chunk, from a WSGI thread."""
+    async def _next():
+        try:
+            return await agen.__anext__()
+        except StopAsyncIteration:
+            return _STREAM_END
+
+    try:
+        while True:
+            item = run_bot_async(_next(), timeout=timeout)
+            if item is _STREAM_END:
+                return
+            yield item
+    finally:
+        # Client went away or the stream failed: release the cursor/transaction.
+        try:
+            run_bot_async(agen.aclose(), timeout=timeout)
+        except Exception as e:
+            logger.warning(f"Failed to close stream: {e}")
+
+
+def ensure_user_exists(user_id: int, timeout: int = 30):
+    """Create the users row if needed; skips the bot loop for known users."""
+    if not is_known_user(user_id):
+        run_bot_async(ensure_user(user_id), timeout=timeout)
+
+
+def get_profile(user_id: int, timeout: int = 30) -> dict:
+    """Return the cached user profile; loads it on the bot loop only on a miss."""
+    profile = peek_user_profile(user_id)
+    if profile is None:
+        profile = run_bot_async(get_user_profile(user_id), timeout=timeout)
+    return profile
+
+
+def get_user_level(user_id: int) -> tuple:
+    """Return the user's saved (major, sub) level."""
+    settings = get_profile(user_id)
+    return settings.get("major_level", "A1"), settings.get("sub_level", "1")
+
+
 def create_bot_application():
     """Create and configure the bot application.
     В режиме Web App обрабатывается только /start; остальные команды ведут в приложение.
@@ -132,11 +274,19 @@ async def init_bot():
 def init_app():
     """Initialize application on startup."""
     # Initialize content from JSON files
-    init_content()
+    init_content(lazy=CONTENT_LAZY_LOAD)
+    if CONTENT_WARMUP:
+        warm_up_content()
+    if not CONTENT_LAZY_LOAD:
+        build_search_index()
+        build_distractor_index()
+    start_content_watcher()
     # Initialize database (create tables if needed) — required for web API endpoints
     try:
         run_bot_async(init_db())
         logger.info("Database initialized successfully")
+        # Partition upkeep and rollups run in the background on the bot loop
+        start_maintenance(_get_bot_loop())
     except Exception as e:
         logger.error(f"Failed to initialize database: {e}")
     # Don't initialize bot here - do it lazily on first webhook request
@@ -1418,11 +1568,7 @@ HTML_TEMPLATE = """
                 diagnosticTest: 'Диагностический тест',
                 testUnavailable: 'Тест временно недоступен. Выберите уровень вручную.',
                 testLoadError: 'Не удалось загрузить тест. Выберите уровень вручную.',
-                stageComplete: 'Этап завершен',
-                diagnostics: 'Диагностика',
                 resultNofM: 'Результат: {n} из {m}',
-                continueStage: 'Продолжить: {name}',
-                finishAndGetResult: 'Завершить и получить результат',
                 testResult: 'Результат теста',
                 recommendedLevel: 'Рекомендуемый уровень: {name}',
                 accept: 'Принять ({name})',
@@ -1464,7 +1610,6 @@ HTML_TEMPLATE = """
                 accuracy: 'Точность',
                 fluency: 'Плавность',
                 completeness: 'Полнота',
-                nextStage: 'следующий этап',
                 quizLabel: 'Квиз',
             },
             en: {
@@ -1585,10 +1730,7 @@ HTML_TEMPLATE = """
                 diagnosticTest: 'Diagnostic test',
                 testUnavailable: 'Test temporarily unavailable. Choose a level manually.',
                 testLoadError: 'Failed to load test. Choose a level manually.',
-                stageComplete: 'Stage complete', diagnostics: 'Diagnostics',
                 resultNofM: 'Result: {n} of {m}',
-                continueStage: 'Continue: {name}',
-                finishAndGetResult: 'Finish and get result',
                 testResult: 'Test result',
                 recommendedLevel: 'Recommended level: {name}',
                 accept: 'Accept ({name})', chooseManuallyShort: 'Choose manually',
@@ -1622,7 +1764,7 @@ HTML_TEMPLATE = """
                 score: 'Score', recognized: 'Recognized',
                 mistakesLabel: 'Mistakes', tipLabel: 'Tip',
                 accuracy: 'Accuracy', fluency: 'Fluency', completeness: 'Completeness',
-                nextStage: 'next stage', quizLabel: 'Quiz',
+                quizLabel: 'Quiz',
             },
             de: {
                 subtitle: 'Deutsch lernen leicht und effektiv',
@@ -1742,10 +1884,7 @@ HTML_TEMPLATE = """
                 diagnosticTest: 'Diagnosetest',
                 testUnavailable: 'Test vorübergehend nicht verfügbar. Wählen Sie ein Niveau manuell.',
                 testLoadError: 'Test konnte nicht geladen werden. Wählen Sie ein Niveau manuell.',
-                stageComplete: 'Etappe abgeschlossen', diagnostics: 'Diagnostik',
                 resultNofM: 'Ergebnis: {n} von {m}',
-                continueStage: 'Weiter: {name}',
-                finishAndGetResult: 'Abschließen und Ergebnis erhalten',
                 testResult: 'Testergebnis',
                 recommendedLevel: 'Empfohlenes Niveau: {name}',
                 accept: 'Akzeptieren ({name})', chooseManuallyShort: 'Manuell wählen',
@@ -1779,7 +1918,7 @@ HTML_TEMPLATE = """
                 score: 'Bewertung', recognized: 'Erkannt',
                 mistakesLabel: 'Fehler', tipLabel: 'Tipp',
                 accuracy: 'Genauigkeit', fluency: 'Flüssigkeit', completeness: 'Vollständigkeit',
-                nextStage: 'nächste Etappe', quizLabel: 'Quiz',
+                quizLabel: 'Quiz',
             }
         };
 
@@ -1891,6 +2030,9 @@ HTML_TEMPLATE = """
         let currentPhrases = [];
         let currentPhraseIndex = 0;
         let isPhraseTransitionInProgress = false;
+        // Sessions prefetched with the previous one: {key, cards, at}
+        let nextWordSession = null;
+        let nextPhraseSession = null;
         let currentDialogueId = null;
         let currentDialogue = null;
         let currentDialogueReplicaIndex = 0;
@@ -1909,12 +2051,9 @@ HTML_TEMPLATE = """
         let currentExTaskIndex = 0;
         let currentExScore = 0;
         let onboardingRequired = false;
-        let onboardingStages = [];
-        let onboardingStageIndex = 0;
-        let onboardingQuestions = [];
-        let onboardingQuestionIndex = 0;
+        let onboardingResponses = [];
+        let onboardingNode = null;
         let onboardingCorrect = 0;
-        let onboardingStageResults = {};
         let onboardingRecommended = { major: 'A1', sub: '1', name: 'A1.1' };
         let activeRecorder = null;
         let activeStream = null;
@@ -2226,6 +2365,10 @@ HTML_TEMPLATE = """
             const header = document.getElementById('main-header');
             header.classList.remove('hidden', 'compact');
             headerShown = true;
+
+            // Leaving the category lists drops the prefetched sessions
+            nextWordSession = null;
+            nextPhraseSession = null;
             
             // Reset views
             document.getElementById('categories-view').style.display = 'block';
@@ -2317,53 +2460,53 @@ HTML_TEMPLATE = """
 
         async function startDiagnosticOnboarding() {
             setOnboardingHTML(`<div class="loading">${t('loadingQuestions')}</div>`);
+            onboardingResponses = [];
+            onboardingNode = null;
+            onboardingCorrect = 0;
+            await fetchDiagnosticStep(true);
+        }
+
+        // The server answers with the next question and what follows each
+        // answer a few questions deep; it is asked again only past that tree.
+        async function fetchDiagnosticStep(first = false) {
             try {
-                const response = await fetch('/api/diagnostic/questions');
+                const response = await fetch('/api/diagnostic/adaptive', {
+                    method: 'POST',
+                    headers: {'Content-Type': 'application/json'},
+                    body: JSON.stringify({ responses: onboardingResponses })
+                });
                 if (!response.ok) {
-                    throw new Error('questions fetch failed');
+                    throw new Error('adaptive step failed');
                 }
-                const payload = await response.json();
-                onboardingStages = Array.isArray(payload.stages) ? payload.stages : [];
-                onboardingStageResults = {};
-                onboardingStageIndex = 0;
-
-                if (!onboardingStages.length) {
+                const step = await response.json();
+                if (step.done) {
+                    onboardingRecommended = step.result;
+                    showDiagnosticResult();
+                    return;
+                }
+                if (!step.next) {
                     tg.showAlert?.(t('testUnavailable'));
                     showManualLevelSelection();
                     return;
                 }
-
-                startOnboardingStage(0);
+                onboardingNode = step.next;
+                renderDiagnosticQuestion();
             } catch (error) {
-                tg.showAlert?.(t('testLoadError'));
+                console.error('fetchDiagnosticStep error:', error);
+                tg.showAlert?.(t(first ? 'testLoadError' : 'testUnavailable'));
                 showManualLevelSelection();
             }
         }
 
-        function startOnboardingStage(index) {
-            onboardingStageIndex = index;
-            onboardingQuestions = onboardingStages[index]?.questions || [];
-            onboardingQuestionIndex = 0;
-            onboardingCorrect = 0;
-            renderDiagnosticQuestion();
-        }
-
         function renderDiagnosticQuestion() {
-            if (onboardingQuestionIndex >= onboardingQuestions.length) {
-                handleOnboardingStageCompleted();
-                return;
-            }
-
-            const q = onboardingQuestions[onboardingQuestionIndex];
-            const stage = onboardingStages[onboardingStageIndex] || {};
+            const q = onboardingNode.question;
             const optionsHtml = (q.options || [])
                 .map((option, idx) => `<button type="button" class="option" data-diag-index="${idx}">${option}</button>`)
                 .join('');
 
             setOnboardingHTML(`
                 <h2>${t('diagnosticTest')}</h2>
-                <p><strong>${stage.name || ''}</strong></p>
-                <p>${t('questionNofM', {n: onboardingQuestionIndex + 1, m: onboardingQuestions.length})}</p>
+                <p>${t('questionN', {n: onboardingResponses.length + 1})}</p>
                 <div class="question-card" style="margin-bottom: 12px;">
                     <div class="question-text">${q.question || ''}</div>
                 </div>
@@ -2373,86 +2516,26 @@ HTML_TEMPLATE = """
             const optionsRoot = document.getElementById('diag-options');
             optionsRoot.querySelectorAll('button[data-diag-index]').forEach(btn => {
                 btn.onclick = () => {
-                    const selected = Number(btn.getAttribute('data-diag-index'));
-                    if (selected === q.correct) onboardingCorrect++;
-                    onboardingQuestionIndex++;
-                    renderDiagnosticQuestion();
+                    const correct = Number(btn.getAttribute('data-diag-index')) === q.correct;
+                    if (correct) onboardingCorrect++;
+                    onboardingResponses.push({ id: q.id, correct });
+                    const next = onboardingNode[correct ? 'if_correct' : 'if_wrong'];
+                    if (next && !next.done) {
+                        onboardingNode = next;
+                        renderDiagnosticQuestion();
+                        return;
+                    }
+                    // End of the tree or of the test: the server has the result or more questions
+                    setOnboardingHTML(`<div class="loading">${t('loadingQuestions')}</div>`);
+                    fetchDiagnosticStep();
                 };
             });
         }
 
-        function handleOnboardingStageCompleted() {
-            const stage = onboardingStages[onboardingStageIndex] || {};
-            const stageId = stage.id;
-            const total = onboardingQuestions.length;
-            const ratio = total > 0 ? onboardingCorrect / total : 0;
-            onboardingStageResults[stageId] = {
-                correct: onboardingCorrect,
-                total: total
-            };
-
-            const hasNext = onboardingStageIndex + 1 < onboardingStages.length;
-            const threshold = Number(stage.offer_next_if_score_at_least ?? 1.1);
-            if (hasNext && ratio >= threshold) {
-                const nextName = onboardingStages[onboardingStageIndex + 1]?.name || t('nextStage');
-                setOnboardingHTML(`
-                    <h2>${t('stageComplete')}</h2>
-                    <p><strong>${stage.name || t('diagnostics')}</strong></p>
-                    <p>${t('resultNofM', {n: onboardingCorrect, m: total})}</p>
-                    <div class="btn-group">
-                        <button type="button" class="btn btn-primary" data-action="continueDiagnosticStage">
-                            ${t('continueStage', {name: nextName})}
-                        </button>
-                        <button type="button" class="btn btn-secondary" data-action="finishDiagnosticNow">
-                            ${t('finishAndGetResult')}
-                        </button>
-                    </div>
-                `);
-                return;
-            }
-
-            showDiagnosticResult();
-        }
-
-        function continueDiagnosticStage() {
-            const nextIndex = onboardingStageIndex + 1;
-            if (nextIndex >= onboardingStages.length) {
-                showDiagnosticResult();
-                return;
-            }
-            startOnboardingStage(nextIndex);
-        }
-
-        function finishDiagnosticNow() {
-            showDiagnosticResult();
-        }
-
-        async function showDiagnosticResult() {
-            try {
-                const response = await fetch('/api/diagnostic/recommend', {
-                    method: 'POST',
-                    headers: {'Content-Type': 'application/json'},
-                    body: JSON.stringify({
-                        stage_results: onboardingStageResults
-                    })
-                });
-                if (response.ok) {
-                    onboardingRecommended = await response.json();
-                }
-            } catch (error) {
-                console.error('showDiagnosticResult error:', error);
-            }
-
-            const stageSummary = Object.entries(onboardingStageResults)
-                .map(([stageId, stat]) => {
-                    const title = stageId.replace('_', '-');
-                    return `<li>${title}: ${stat.correct}/${stat.total}</li>`;
-                })
-                .join('');
-
+        function showDiagnosticResult() {
             setOnboardingHTML(`
                 <h2>${t('testResult')}</h2>
-                <ul style="margin: 0 0 12px 18px;">${stageSummary}</ul>
+                <p>${t('resultNofM', {n: onboardingCorrect, m: onboardingResponses.length})}</p>
                 <p>${t('recommendedLevel', {name: onboardingRecommended.name})}</p>
                 <div class="btn-group">
                     <button type="button" class="btn btn-primary" data-action="acceptDiagnosticRecommendation">
@@ -2604,10 +2687,32 @@ HTML_TEMPLATE = """
             }
         }
         
+        // A prefetched session ({key, cards, at}, see nextWordSession) was
+        // planned before the previous session's answers were saved, so it is
+        // used only for a quick "next session": dropped after PREFETCH_TTL_MS
+        // or when the user goes back to the main menu.
+        const PREFETCH_TTL_MS = 5 * 60 * 1000;
+
+        function takePrefetchedSession(prefetched, key) {
+            if (prefetched && prefetched.key === key && Date.now() - prefetched.at < PREFETCH_TTL_MS) {
+                return prefetched.cards;
+            }
+            return null;
+        }
+
         async function startFlashcards(categoryId) {
             try {
-                const response = await fetch(`/api/session/words?category=${categoryId}&user_id=${userId}&${levelQuery()}`);
-                currentWords = await response.json();
+                const key = `${categoryId}|${levelQuery()}`;
+                const prefetched = takePrefetchedSession(nextWordSession, key);
+                nextWordSession = null;
+                if (prefetched) {
+                    currentWords = prefetched;
+                } else {
+                    const response = await fetch(`/api/session/words?category=${categoryId}&user_id=${userId}&prefetch=1&${levelQuery()}`);
+                    const data = await response.json();
+                    currentWords = data.cards || [];
+                    nextWordSession = data.next && data.next.length ? {key, cards: data.next, at: Date.now()} : null;
+                }
                 currentWordIndex = 0;
                 currentCategory = categoryId;
                 wordSessionCorrect = 0;
@@ -2684,21 +2789,26 @@ HTML_TEMPLATE = """
             if (pronounceResult) pronounceResult.style.display = 'none';
 
             let options = [];
-            try {
-                // Get options from the same category
-                const response = await fetch(`/api/words/random?count=3&exclude=${word.word_id}&exclude_ru=${encodeURIComponent(word.ru)}&category=${currentCategory}&${levelQuery()}`);
-                if (!response.ok) {
-                    throw new Error('Failed to load random word options');
+            if (word.options) {
+                // Options come with the session
+                options = [word, ...word.options].sort(() => Math.random() - 0.5);
+            } else {
+                try {
+                    // Get options from the same category
+                    const response = await fetch(`/api/words/random?count=3&exclude=${word.word_id}&exclude_ru=${encodeURIComponent(word.ru)}&category=${currentCategory}&${levelQuery()}`);
+                    if (!response.ok) {
+                        throw new Error('Failed to load random word options');
+                    }
+                    const wrongWords = await response.json();
+                    options = [word, ...wrongWords].sort(() => Math.random() - 0.5);
+                } catch (error) {
+                    // Fallback keeps card/options in sync even on API errors
+                    const localWrongWords = currentWords
+                        .filter(w => w.word_id !== word.word_id && w.ru !== word.ru)
+                        .sort(() => Math.random() - 0.5)
+                        .slice(0, 3);
+                    options = [word, ...localWrongWords].sort(() => Math.random() - 0.5);
                 }
-                const wrongWords = await response.json();
-                options = [word, ...wrongWords].sort(() => Math.random() - 0.5);
-            } catch (error) {
-                // Fallback keeps card/options in sync even on API errors
-                const localWrongWords = currentWords
-                    .filter(w => w.word_id !== word.word_id && w.ru !== word.ru)
-                    .sort(() => Math.random() - 0.5)
-                    .slice(0, 3);
-                options = [word, ...localWrongWords].sort(() => Math.random() - 0.5);
             }
 
             document.getElementById('word-progress').textContent =
@@ -3265,8 +3375,17 @@ HTML_TEMPLATE = """
 
         async function startPhrases(categoryId) {
             try {
-                const response = await fetch(`/api/session/phrases?category=${categoryId}&user_id=${userId}&${levelQuery()}`);
-                currentPhrases = await response.json();
+                const key = `${categoryId}|${levelQuery()}`;
+                const prefetched = takePrefetchedSession(nextPhraseSession, key);
+                nextPhraseSession = null;
+                if (prefetched) {
+                    currentPhrases = prefetched;
+                } else {
+                    const response = await fetch(`/api/session/phrases?category=${categoryId}&user_id=${userId}&prefetch=1&${levelQuery()}`);
+                    const data = await response.json();
+                    currentPhrases = data.cards || [];
+                    nextPhraseSession = data.next && data.next.length ? {key, cards: data.next, at: Date.now()} : null;
+                }
                 currentPhraseIndex = 0;
                 currentPhrasesCategory = categoryId;
                 phraseSessionCorrect = 0;
@@ -3347,21 +3466,26 @@ HTML_TEMPLATE = """
             if (phrasePronRes) phrasePronRes.style.display = 'none';
             
             let options = [];
-            try {
-                // Get wrong options
-                const optResponse = await fetch(`/api/phrases/random?count=3&exclude=${phrase.phrase_id}&exclude_ru=${encodeURIComponent(phrase.ru)}&${levelQuery()}`);
-                if (!optResponse.ok) {
-                    throw new Error('Failed to load random phrase options');
+            if (phrase.options) {
+                // Options come with the session
+                options = [phrase, ...phrase.options].sort(() => Math.random() - 0.5);
+            } else {
+                try {
+                    // Get wrong options
+                    const optResponse = await fetch(`/api/phrases/random?count=3&exclude=${phrase.phrase_id}&exclude_ru=${encodeURIComponent(phrase.ru)}&${levelQuery()}`);
+                    if (!optResponse.ok) {
+                        throw new Error('Failed to load random phrase options');
+                    }
+                    const wrongPhrases = await optResponse.json();
+                    options = [phrase, ...wrongPhrases].sort(() => Math.random() - 0.5);
+                } catch (error) {
+                    // Fallback keeps phrase/options synchronized
+                    const localWrongPhrases = currentPhrases
+                        .filter(p => p.phrase_id !== phrase.phrase_id && p.ru !== phrase.ru)
+                        .sort(() => Math.random() - 0.5)
+                        .slice(0, 3);
+                    options = [phrase, ...localWrongPhrases].sort(() => Math.random() - 0.5);
                 }
-                const wrongPhrases = await optResponse.json();
-                options = [phrase, ...wrongPhrases].sort(() => Math.random() - 0.5);
-            } catch (error) {
-                // Fallback keeps phrase/options synchronized
-                const localWrongPhrases = currentPhrases
-                    .filter(p => p.phrase_id !== phrase.phrase_id && p.ru !== phrase.ru)
-                    .sort(() => Math.random() - 0.5)
-                    .slice(0, 3);
-                options = [phrase, ...localWrongPhrases].sort(() => Math.random() - 0.5);
             }
 
             document.getElementById('phrase-progress').textContent =
@@ -3687,7 +3811,7 @@ HTML_TEMPLATE = """
         
         async function loadCultureTopics() {
             try {
-                const levelRes = await fetch('/api/levels/current');
+                const levelRes = await fetch(`/api/levels/current?user_id=${userId}`);
                 if (levelRes.ok) {
                     const levelData = await levelRes.json();
                     currentLevelMajor = levelData.major || 'A1';
@@ -3841,7 +3965,7 @@ HTML_TEMPLATE = """
         
         async function loadExercisesSets() {
             try {
-                const levelRes = await fetch('/api/levels/current');
+                const levelRes = await fetch(`/api/levels/current?user_id=${userId}`);
                 if (levelRes.ok) {
                     const levelData = await levelRes.json();
                     currentLevelMajor = levelData.major || 'A1';
@@ -4133,6 +4257,23 @@ def api_levels():
     return jsonify(levels)
 
 
+@app.route('/api/search')
+def api_search():
+    """Search words, phrases, dialogues and culture topics across levels.
+
+    ?q=  query (the last word matches as a prefix, for autocomplete)
+    ?level=A1.1,A1.2  ?type=word,phrase  ?limit=20 (max 50)
+    """
+    query = request.args.get('q', '').strip()[:100]
+    levels = [level for level in request.args.get('level', '').split(',') if level]
+    types = [kind for kind in request.args.get('type', '').split(',') if kind]
+    if any(kind not in DOC_TYPES for kind in types):
+        return jsonify({"error": f"type must be one of {', '.join(DOC_TYPES)}"}), 400
+    limit = request.args.get('limit', 20, type=int)
+    results = search_content(query, levels, types, limit) if query else []
+    return jsonify({"query": query, "results": results})
+
+
 @app.route('/api/levels/with-content')
 def api_levels_with_content():
     """Get only levels that have content."""
@@ -4142,8 +4283,15 @@ def api_levels_with_content():
 
 @app.route('/api/levels/current')
 def api_current_level():
-    """Get current level."""
+    """Get the user's level (?user_id=), else the request/default level."""
+    user_id = request.args.get('user_id', type=int)
     major, sub = get_current_level()
+    if user_id:
+        try:
+            ensure_user_exists(user_id)
+            major, sub = get_user_level(user_id)
+        except Exception as e:
+            logger.error(f"Failed to load level for user {user_id}: {e}")
     return jsonify({
         "major": major,
         "sub": sub,
@@ -4153,14 +4301,25 @@ def api_current_level():
 
 @app.route('/api/levels/set', methods=['POST'])
 def api_set_level():
-    """Set current level."""
-    data = request.json
+    """Validate a level and save it for the user (body: major, sub, user_id).
+
+    The level is per user; there is no process-wide current level to change.
+    """
+    data = request.json or {}
     major = data.get('major', 'A1')
     sub = data.get('sub', '1')
+    user_id = data.get('user_id')
     
     success = set_level(major, sub)
     
     if success:
+        if user_id:
+            try:
+                ensure_user_exists(user_id)
+                run_bot_async(set_user_level(user_id, major, sub))
+            except Exception as e:
+                logger.error(f"Failed to save level for user {user_id}: {e}")
+                return jsonify({"success": False, "error": "Failed to save level"}), 500
         return jsonify({
             "success": True,
             "level": f"{major}.{sub}"
@@ -4184,13 +4343,9 @@ def api_onboarding_status():
         })
 
     try:
-        run_bot_async(get_or_create_user(user_id, None, None))
-        settings = run_bot_async(get_user_settings(user_id))
-        major = settings.get("major_level", "A1")
-        sub = settings.get("sub_level", "1")
-
-        # Sync runtime content level with persisted user level.
-        set_level(major, sub)
+        ensure_user_exists(user_id)
+        settings = get_profile(user_id)
+        major, sub = get_user_level(user_id)
 
         return jsonify({
             "onboarding_required": not bool(settings.get("diagnostic_completed", 0)),
@@ -4210,7 +4365,7 @@ def api_get_language():
     if not user_id:
         return jsonify({"language": "ru"})
     try:
-        lang = run_bot_async(get_user_language(user_id))
+        lang = get_profile(user_id)["ui_language"] or "ru"
         return jsonify({"language": lang})
     except Exception as e:
         logger.error(f"Failed to get language for user {user_id}: {e}")
@@ -4263,6 +4418,23 @@ def api_diagnostic_recommend():
     return jsonify(recommendation)
 
 
+@app.route('/api/diagnostic/adaptive', methods=['POST'])
+def api_diagnostic_adaptive():
+    """Next step of the adaptive placement test for the answers so far.
+
+    Body: {responses: [{id, correct}, ...]}.  Returns the next questions as
+    a small tree (see bot.services.placement.next_step), or the recommended
+    level once the test is over.  The answers are graded by the client, so
+    they are not logged for calibration; only the bot's test is.
+    """
+    data = request.json or {}
+    responses = data.get("responses") or []
+    if not isinstance(responses, list) or not all(isinstance(r, dict) for r in responses):
+        return jsonify({"error": "responses must be a list of {id, correct}"}), 400
+    step = placement.next_step(responses)
+    return jsonify(step)
+
+
 @app.route('/api/onboarding/complete', methods=['POST'])
 def api_onboarding_complete():
     """Persist selected level and finish onboarding."""
@@ -4281,7 +4453,7 @@ def api_onboarding_complete():
         }), 400
 
     try:
-        run_bot_async(get_or_create_user(user_id, None, None))
+        ensure_user_exists(user_id)
         run_bot_async(set_user_level(user_id, major, sub))
         run_bot_async(set_diagnostic_completed(user_id, True))
         return jsonify({
@@ -4303,11 +4475,8 @@ def api_categories():
     lang = request.args.get('lang', 'ru')
 
     if major and sub:
-        categories = get_categories(major, sub, lang=lang)
-    else:
-        categories = get_categories(lang=lang)
-
-    return jsonify(categories)
+        return content_response(lambda: get_categories(major, sub, lang=lang))
+    return content_response(lambda: get_categories(lang=lang))
 
 @app.route('/api/words')
 def api_words():
@@ -4324,16 +4493,63 @@ def api_words():
 
     return jsonify(words)
 
-SESSION_SIZE = 10
-MAX_ERROR_WORDS = 5
-MAX_ERROR_PHRASES = 5
+# Wrong answer options embedded in every session card
+SESSION_OPTIONS = 3
+
+
+def _with_options(kind: str, cards: list, pool: list, lang: str) -> list:
+    """Copy the cards with SESSION_OPTIONS wrong answers each (hard distractors, else random from pool)."""
+    id_key = f"{kind}_id"
+    result = []
+    for card in cards:
+        options = pick_distractors(kind, card[id_key], SESSION_OPTIONS, lang=lang, exclude_text=card["ru"])
+        if len(options) < SESSION_OPTIONS:
+            taken = {option[id_key] for option in options}
+            taken.add(card[id_key])
+            rest = [item for item in pool if item[id_key] not in taken and item["ru"] != card["ru"]]
+            options += random.sample(rest, min(SESSION_OPTIONS - len(options), len(rest)))
+        result.append({**card, "options": options})
+    return result
+
+
+def _empty_session_response():
+    """No cards for the category or level, in the shape the request asked for."""
+    if request.args.get('prefetch', type=int):
+        return jsonify({"cards": [], "next": []})
+    return jsonify([])
+
+
+def _session_response(kind: str, items: list, user_id: int, lang: str):
+    """Session cards with options; with ?prefetch=1 also the next session.
+
+    Both sessions come from one plan (one progress query, see
+    bot.services.session_planner); the next session skips this one's cards
+    and reflects progress as it is now, before this session's answers are saved.
+    """
+    try:
+        plan = run_bot_async(load_plan(user_id, kind, items))
+    except Exception as e:
+        logger.warning(f"Session plan without progress for user {user_id}: {e}")
+        plan = SessionPlan(kind, items, [])
+
+    cards = plan.select()
+    if not request.args.get('prefetch', type=int):
+        return jsonify(_with_options(kind, cards, items, lang))
+
+    next_cards = plan.select(exclude={card[plan.id_key] for card in cards})
+    return jsonify({
+        "cards": _with_options(kind, cards, items, lang),
+        "next": _with_options(kind, next_cards, items, lang),
+    })
 
 
 @app.route('/api/session/words')
 def api_session_words():
-    """Build a session of up to SESSION_SIZE words with error priority."""
-    import random
+    """Build a session of up to SESSION_SIZE words (due, error, new, random).
 
+    Each card carries `options` (wrong answers); ?prefetch=1 returns
+    {"cards": [...], "next": [...]} with the following session as well.
+    """
     category_id = request.args.get('category')
     user_id = request.args.get('user_id', type=int)
     major = request.args.get('major')
@@ -4346,35 +4562,18 @@ def api_session_words():
         words = get_all_words(major, sub, lang=lang) if major and sub else get_all_words(lang=lang)
 
     if not words:
-        return jsonify([])
-
-    # Build session with error priority (same logic as bot handler)
-    word_ids = [w["word_id"] for w in words]
-    error_ids = []
-    if user_id:
-        try:
-            error_ids = run_bot_async(get_priority_word_ids(user_id, word_ids))
-        except Exception:
-            pass
-
-    word_map = {w["word_id"]: w for w in words}
-    error_words = [word_map[wid] for wid in error_ids[:MAX_ERROR_WORDS] if wid in word_map]
-    error_id_set = set(wid for wid in error_ids[:MAX_ERROR_WORDS])
-    remaining = [w for w in words if w["word_id"] not in error_id_set]
-    random.shuffle(remaining)
-    fill_count = SESSION_SIZE - len(error_words)
-    new_words = remaining[:fill_count]
+        return _empty_session_response()
 
-    session = error_words + new_words
-    random.shuffle(session)
-    return jsonify(session)
+    # Same planner as the bot handler
+    return _session_response("word", words, user_id, lang)
 
 
 @app.route('/api/session/phrases')
 def api_session_phrases():
-    """Build a session of up to SESSION_SIZE phrases with error priority."""
-    import random
+    """Build a session of up to SESSION_SIZE phrases (due, error, new, random).
 
+    Cards carry `options` and ?prefetch=1 works as in /api/session/words.
+    """
     category_id = request.args.get('category')
     user_id = request.args.get('user_id', type=int)
     major = request.args.get('major')
@@ -4387,7 +4586,7 @@ def api_session_phrases():
         phrases = get_all_phrases_flat(major, sub, lang=lang) if major and sub else get_all_phrases_flat(lang=lang)
 
     if not phrases:
-        return jsonify([])
+        return _empty_session_response()
 
     # Deduplicate
     seen = set()
@@ -4397,31 +4596,13 @@ def api_session_phrases():
             seen.add(p["phrase_id"])
             unique.append(p)
 
-    # Build session with error priority
-    phrase_ids = [p["phrase_id"] for p in unique]
-    error_ids = []
-    if user_id:
-        try:
-            error_ids = run_bot_async(get_priority_phrase_ids(user_id, phrase_ids))
-        except Exception:
-            pass
-
-    phrase_map = {p["phrase_id"]: p for p in unique}
-    error_phrases = [phrase_map[pid] for pid in error_ids[:MAX_ERROR_PHRASES] if pid in phrase_map]
-    error_id_set = set(pid for pid in error_ids[:MAX_ERROR_PHRASES])
-    remaining = [p for p in unique if p["phrase_id"] not in error_id_set]
-    random.shuffle(remaining)
-    fill_count = SESSION_SIZE - len(error_phrases)
-    new_phrases = remaining[:fill_count]
-
-    session = error_phrases + new_phrases
-    random.shuffle(session)
-    return jsonify(session)
+    return _session_response("phrase", unique, user_id, lang)
 
 
 @app.route('/api/words/random')
 def api_random_words():
-    """Get random words for current level or specified level."""
+    """Get wrong answer options for a word (exclude=word_id): its precomputed
+    hard distractors, else random words of the category / level."""
     count = int(request.args.get('count', 3))
     exclude = request.args.get('exclude', '')
     exclude_ru = request.args.get('exclude_ru', '')
@@ -4432,6 +4613,11 @@ def api_random_words():
 
     import random
 
+    if exclude:
+        options = pick_distractors("word", exclude, count, lang=lang, exclude_text=exclude_ru)
+        if len(options) == count:
+            return jsonify(options)
+
     # If category specified, get words from that category only
     if category:
         words = get_words_by_category(category, major, sub, lang=lang) if major and sub else get_words_by_category(category, lang=lang)
@@ -4459,8 +4645,9 @@ def api_random_words():
     # If still not enough, supplement from all words
     if len(filtered) < count:
         all_words = get_all_words(major, sub, lang=lang) if major and sub else get_all_words(lang=lang)
-        extra = [w for w in all_words if w.get('word_id') != exclude and w not in filtered]
-        filtered.extend(extra)
+        taken = {w.get('word_id') for w in filtered}
+        taken.add(exclude)
+        filtered.extend(w for w in all_words if w.get('word_id') not in taken)
 
     return jsonify(random.sample(filtered, min(count, len(filtered))))
 
@@ -4471,8 +4658,9 @@ def api_tests():
     sub = request.args.get('sub')
     lang = request.args.get('lang', 'ru')
 
-    tests = get_all_tests(major, sub, lang=lang) if major and sub else get_all_tests(lang=lang)
-    return jsonify(tests)
+    return content_response(
+        lambda: get_all_tests(major, sub, lang=lang) if major and sub else get_all_tests(lang=lang)
+    )
 
 
 @app.route('/api/tests/<test_id>/questions')
@@ -4482,14 +4670,16 @@ def api_test_questions(test_id):
     sub = request.args.get('sub')
     lang = request.args.get('lang', 'ru')
 
-    if major and sub:
-        questions = get_test_questions(test_id, major, sub)
-        theory_text = format_grammar_theory_text(test_id, major, sub, lang=lang)
-    else:
-        questions = get_test_questions(test_id)
-        theory_text = format_grammar_theory_text(test_id, lang=lang)
+    def build():
+        if major and sub:
+            questions = get_test_questions(test_id, major, sub)
+            theory_text = format_grammar_theory_text(test_id, major, sub, lang=lang)
+        else:
+            questions = get_test_questions(test_id)
+            theory_text = format_grammar_theory_text(test_id, lang=lang)
+        return {"questions": questions, "theory_text": theory_text}
 
-    return jsonify({"questions": questions, "theory_text": theory_text})
+    return content_response(build, test_id)
 
 @app.route('/api/progress')
 def api_progress():
@@ -4651,7 +4841,7 @@ def api_progress():
             'items': exercise_items
         },
         'pronunciation': pronunciation_stats,
-        'is_premium': bool(run_bot_async(get_user_premium(user_id))),
+        'is_premium': bool(get_profile(user_id)["is_premium"]),
     })
 
 @app.route('/api/progress/word', methods=['POST'])
@@ -4663,10 +4853,10 @@ def api_update_word_progress():
         return jsonify({'error': 'User not authenticated'}), 401
 
     try:
-        run_bot_async(get_or_create_user(user_id, None, None))
+        ensure_user_exists(user_id)
 
         is_correct = data.get('is_correct', False)
-        run_bot_async(update_word_progress(user_id, data['word_id'], is_correct))
+        run_bot_async(record_answer(user_id, "word", data['word_id'], is_correct))
 
         words = 1 if is_correct else 0
         correct = 1 if is_correct else 0
@@ -4686,7 +4876,7 @@ def api_save_grammar_result():
         return jsonify({'error': 'User not authenticated'}), 401
 
     try:
-        run_bot_async(get_or_create_user(user_id, None, None))
+        ensure_user_exists(user_id)
         run_bot_async(save_grammar_result(user_id, data['test_id'], data['score'], data['total']))
         run_bot_async(update_daily_stats(user_id, tests=1, correct=data['score'], total=data['total']))
         return jsonify({'success': True})
@@ -4713,24 +4903,14 @@ def api_pronunciation_check():
     if not audio_file:
         return jsonify({'success': False, 'error': 'audio file is required'}), 400
 
-    try:
-        limit_state = run_bot_async(
-            consume_rate_limit(
-                user_id=user_id,
-                action="pronunciation_check",
-                limit=PRONUN_RATE_LIMIT_PER_HOUR,
-                window_seconds=3600,
-            ),
-            timeout=PRONUN_TIMEOUT_SEC,
-        )
-        if not limit_state.get("allowed", True):
-            return jsonify({
-                'success': False,
-                'error': f"Слишком много запросов. Повторите через {limit_state.get('retry_after', 60)} сек."
-            }), 429
+    # Counted only for valid requests
+    limited = check_rate_limit("pronunciation_check", limit=PRONUN_RATE_LIMIT_PER_HOUR, window_seconds=3600)
+    if limited is not None:
+        return limited
 
+    try:
         audio_bytes = audio_file.read()
-        is_premium = bool(run_bot_async(get_user_premium(user_id), timeout=PRONUN_TIMEOUT_SEC))
+        is_premium = bool(get_profile(user_id, timeout=PRONUN_TIMEOUT_SEC)["is_premium"])
         result = evaluate_pronunciation(
             audio_bytes=audio_bytes,
             filename=audio_file.filename or "pronunciation.wav",
@@ -4739,7 +4919,6 @@ def api_pronunciation_check():
             is_premium=is_premium,
         )
 
-        run_bot_async(get_or_create_user(user_id, None, None), timeout=PRONUN_TIMEOUT_SEC)
         run_bot_async(
             save_pronunciation_progress(
                 user_id=user_id,
@@ -4769,9 +4948,9 @@ def api_pronunciation_check():
 
 
 @app.route('/api/audio/<text>')
+@rate_limited("audio", limit=AUDIO_RATE_LIMIT_PER_MINUTE, window_seconds=60)
 def api_audio(text):
     """Generate and return audio file for given text (on-the-fly, no caching)."""
-    from flask import Response
     from gtts import gTTS
     from urllib.parse import unquote
     import io
@@ -4804,8 +4983,9 @@ def api_phrases_categories():
     sub = request.args.get('sub')
     lang = request.args.get('lang', 'ru')
 
-    categories = get_phrases_categories(major, sub, lang=lang) if major and sub else get_phrases_categories(lang=lang)
-    return jsonify(categories)
+    return content_response(
+        lambda: get_phrases_categories(major, sub, lang=lang) if major and sub else get_phrases_categories(lang=lang)
+    )
 
 
 @app.route('/api/phrases')
@@ -4826,7 +5006,8 @@ def api_phrases():
 
 @app.route('/api/phrases/random')
 def api_random_phrases():
-    """Get random phrases for wrong answer options."""
+    """Get wrong answer options for a phrase (exclude=phrase_id): its precomputed
+    hard distractors, else random phrases of the level."""
     import random
 
     count = int(request.args.get('count', 3))
@@ -4836,6 +5017,11 @@ def api_random_phrases():
     sub = request.args.get('sub')
     lang = request.args.get('lang', 'ru')
 
+    if exclude:
+        options = pick_distractors("phrase", exclude, count, lang=lang, exclude_text=exclude_ru)
+        if len(options) == count:
+            return jsonify(options)
+
     all_phrases = get_all_phrases_flat(major, sub, lang=lang) if major and sub else get_all_phrases_flat(lang=lang)
     filtered = [p for p in all_phrases
                 if p.get('phrase_id') != exclude and p.get('ru') != exclude_ru]
@@ -4852,8 +5038,9 @@ def api_dialogue_topics():
     sub = request.args.get('sub')
     lang = request.args.get('lang', 'ru')
 
-    topics = get_dialogue_topics(major, sub, lang=lang) if major and sub else get_dialogue_topics(lang=lang)
-    return jsonify(topics)
+    return content_response(
+        lambda: get_dialogue_topics(major, sub, lang=lang) if major and sub else get_dialogue_topics(lang=lang)
+    )
 
 
 @app.route('/api/dialogues/<topic_id>')
@@ -4885,8 +5072,9 @@ def api_culture_topics():
     sub = request.args.get('sub')
     lang = request.args.get('lang', 'ru')
 
-    topics = get_culture_topics(major, sub, lang=lang) if major and sub else get_culture_topics(lang=lang)
-    return jsonify(topics)
+    return content_response(
+        lambda: get_culture_topics(major, sub, lang=lang) if major and sub else get_culture_topics(lang=lang)
+    )
 
 
 @app.route('/api/culture/<topic_id>')
@@ -4910,8 +5098,9 @@ def api_exercise_sets():
     sub = request.args.get('sub')
     lang = request.args.get('lang', 'ru')
 
-    sets = get_exercise_sets(major, sub, lang=lang) if major and sub else get_exercise_sets(lang=lang)
-    return jsonify(sets)
+    return content_response(
+        lambda: get_exercise_sets(major, sub, lang=lang) if major and sub else get_exercise_sets(lang=lang)
+    )
 
 
 @app.route('/api/exercises/<set_id>')
@@ -4949,11 +5138,11 @@ def api_update_phrase_progress():
         return jsonify({'error': 'User not authenticated'}), 401
 
     try:
-        run_bot_async(get_or_create_user(user_id, None, None))
+        ensure_user_exists(user_id)
 
         is_correct = data.get('is_correct', False)
-        run_bot_async(save_phrase_progress(
-            user_id, data['phrase_id'], data['category_id'], is_correct
+        run_bot_async(record_answer(
+            user_id, "phrase", data['phrase_id'], is_correct, category_id=data['category_id']
         ))
 
         words = 1 if is_correct else 0
@@ -4977,7 +5166,7 @@ def api_update_dialogue_progress():
     
     # Убеждаемся, что пользователь существует в базе
     try:
-        run_bot_async(get_or_create_user(user_id, None, None))
+        ensure_user_exists(user_id)
     except Exception as e:
         logger.error(f"Error creating user {user_id}: {e}")
         # Продолжаем выполнение, так как пользователь может уже существовать
@@ -5012,14 +5201,14 @@ def api_update_culture_progress():
         return jsonify({'error': 'User not authenticated'}), 401
 
     try:
-        run_bot_async(get_or_create_user(user_id, None, None))
+        ensure_user_exists(user_id)
     except Exception as e:
         logger.error(f"Error creating user {user_id}: {e}")
 
     major = data.get('major')
     sub = data.get('sub')
     if not major or not sub:
-        major, sub = get_current_level()
+        major, sub = get_user_level(user_id)
 
     topic_id = data.get('topic_id')
     if not topic_id:
@@ -5050,14 +5239,14 @@ def api_update_exercise_progress():
         return jsonify({'error': 'User not authenticated'}), 401
 
     try:
-        run_bot_async(get_or_create_user(user_id, None, None))
+        ensure_user_exists(user_id)
     except Exception as e:
         logger.error(f"Error creating user {user_id}: {e}")
 
     major = data.get('major')
     sub = data.get('sub')
     if not major or not sub:
-        major, sub = get_current_level()
+        major, sub = get_user_level(user_id)
 
     set_id = data.get('set_id')
     if not set_id:
@@ -5099,6 +5288,7 @@ def api_get_feedback():
 
 
 @app.route('/api/feedback', methods=['POST'])
+@rate_limited("feedback", limit=FEEDBACK_RATE_LIMIT_PER_HOUR, window_seconds=3600)
 def api_submit_feedback():
     """Submit new feedback."""
     data = request.json
@@ -5119,7 +5309,7 @@ def api_submit_feedback():
     
     try:
         # Ensure user exists
-        run_bot_async(get_or_create_user(user_id, None, None))
+        ensure_user_exists(user_id)
         
         # Save feedback
         feedback_id = run_bot_async(save_feedback(user_id, text))
@@ -5141,6 +5331,60 @@ def api_feedback_status_labels():
     return jsonify(FEEDBACK_STATUS_LABELS)
 
 
+# ============= ACCOUNT API ENDPOINTS =============
+# The user comes from the signed Telegram initData (bot/webapp_auth.py), never
+# from a user_id in the query or body.
+
+@app.route('/api/account/export')
+@webapp_user_required
+@rate_limited("account_export", limit=EXPORT_RATE_LIMIT_PER_HOUR, window_seconds=3600, key_func=webapp_user_key)
+def api_account_export():
+    """Download all user data as JSON (default) or CSV, streamed from the database."""
+    user_id = g.webapp_user_id
+    fmt = request.args.get('format', 'json')
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({'error': f'Unsupported format. Use one of: {", ".join(EXPORT_FORMATS)}'}), 400
+
+    mimetype = 'application/json' if fmt == 'json' else 'text/csv'
+    return Response(
+        stream_bot_async(export_account(user_id, fmt)),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename="german-a1-{user_id}.{fmt}"'}
+    )
+
+
+@app.route('/api/account/reset', methods=['POST'])
+@webapp_user_required
+@rate_limited("account_change", limit=ACCOUNT_RATE_LIMIT_PER_HOUR, window_seconds=3600, key_func=webapp_user_key)
+def api_account_reset():
+    """Delete all learning progress; the account and feedback stay."""
+    user_id = g.webapp_user_id
+    try:
+        run_bot_async(reset_account(user_id))
+        logger.info(f"User {user_id} reset all progress")
+        return jsonify({'success': True})
+    except Exception as e:
+        logger.error(f"Error resetting progress for user {user_id}: {e}")
+        return jsonify({'error': 'Failed to reset progress', 'success': False}), 500
+
+
+@app.route('/api/account/delete', methods=['POST'])
+@webapp_user_required
+@rate_limited("account_change", limit=ACCOUNT_RATE_LIMIT_PER_HOUR, window_seconds=3600, key_func=webapp_user_key)
+def api_account_delete():
+    """Delete the account with all its data. Requires {"confirm": true}."""
+    data = request.json or {}
+    user_id = g.webapp_user_id
+    if data.get('confirm') is not True:
+        return jsonify({'error': 'Confirmation required', 'success': False}), 400
+    try:
+        deleted = run_bot_async(delete_account(user_id))
+        return jsonify({'success': True, 'deleted': deleted})
+    except Exception as e:
+        logger.error(f"Error deleting account {user_id}: {e}")
+        return jsonify({'error': 'Failed to delete account', 'success': False}), 500
+
+
 # ============= TELEGRAM BOT WEBHOOK ENDPOINTS =============
 
 @app.route('/webhook', methods=['POST'])
@@ -5276,6 +5520,7 @@ def _require_admin(f):
 @_require_admin
 def admin_stats():
     """Dashboard statistics: user counts, DAU/MAU, popular sections."""
+    @read_only
     async def _stats():
         from bot.database import get_pool
         pool = await get_pool()
@@ -5337,6 +5582,7 @@ def admin_feedback_list():
     limit = min(request.args.get("limit", 50, type=int), 200)
     offset = request.args.get("offset", 0, type=int)
 
+    @read_only
     async def _fetch():
         from bot.database import get_pool
         pool = await get_pool()
@@ -5398,6 +5644,13 @@ def admin_feedback_update(feedback_id: int):
         return jsonify({"error": str(e)}), 500
 
 
+@app.route("/metrics")
+@_require_admin
+def metrics_endpoint():
+    """Prometheus metrics: query/pool-wait histograms, cache and routing gauges."""
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+
 # ============= HEALTH / DEBUG =============
 
 @app.route('/health')